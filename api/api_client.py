@@ -14,6 +14,7 @@ from config.api_config import (
     WP_API_BASE_PATH, EXTERNAL_IMAGE_API, EXTERNAL_AI_SEARCH_API,
     ZHIPU_API_URL, CATEGORY_DETECTION_PROMPT, get_headers
 )
+from api.media_stream import image_content_type
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
@@ -143,10 +144,8 @@ class WordPressAPI:
             # 生成文件名
             file_name = f"featured-image-{int(time.time())}.{extension}"
 
-            # 设置Content-Type
-            content_type = f'image/{extension}'
-            if extension == 'jpg':
-                content_type = 'image/jpeg'
+            # 设置Content-Type（例如ico为image/x-icon，不能简单拼接为image/ico）
+            content_type = image_content_type(extension)
 
             # 上传到WordPress
             headers = {
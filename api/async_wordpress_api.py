@@ -0,0 +1,631 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List, Union
+
+import httpx
+
+from config.api_config import WP_TERMS_PER_PAGE, MEDIA_CHUNK_SIZE
+from api.media_stream import SpooledImage, check_image_headers, spool_image_async
+from api.wordpress_base import WordPressAPIBase
+from utils.image_encoder import get_max_image_bytes
+from api.term_index import TermIndex
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class AsyncWordPressAPI(WordPressAPIBase):
+    """WordPress API异步交互类，方法与返回结果与WordPressAPI保持一致"""
+
+    def __init__(self, wp_url: str, wp_username: str, wp_password: str, client: httpx.AsyncClient):
+        """初始化异步WordPress API客户端
+
+        Args:
+            wp_url: WordPress站点URL
+            wp_username: WordPress用户名
+            wp_password: WordPress密码
+            client: 共享的异步HTTP连接池
+        """
+        super().__init__(wp_url, wp_username, wp_password)
+        self.client = client
+        # 连接池与外部API共享，认证信息按请求传递，避免发送到其他站点
+        self.auth = httpx.BasicAuth(self.wp_username, self.wp_password)
+
+        self._media_capabilities_lock = asyncio.Lock()
+
+    async def validate_connection(self) -> bool:
+        """验证WordPress API连接
+
+        Returns:
+            连接是否成功
+        """
+        try:
+            response = await self.client.get(f"{self.wp_api_url}/users/me", auth=self.auth)
+            response.raise_for_status()
+            logger.info(f"成功连接到WordPress站点: {self.wp_url}")
+            return True
+        except Exception as e:
+            logger.error(f"无法连接到WordPress API: {str(e)}")
+            raise ConnectionError(f"WordPress API连接失败: {str(e)}")
+
+    async def upload_media(self, image_url: str) -> Dict[str, Any]:
+        """上传媒体文件到WordPress
+
+        Args:
+            image_url: 图片URL
+
+        Returns:
+            包含媒体ID的字典，复用已上传的媒体时reused为True；新上传的媒体附带source_url和sha256，
+            文章创建成功后需交给remember_media()登记，之后才会被其他文章复用
+        """
+        # 同一来源URL已上传过时直接复用，无需下载
+        media_id = self._find_cached_media(source_url=image_url)
+        if media_id and await self._media_exists(media_id):
+            logger.info(f"复用已上传的特色图片，媒体ID: {media_id}")
+            return {'success': True, 'media_id': media_id, 'reused': True}
+
+        try:
+            # 流式下载图片，超过大小上限或不是图片时提前中止
+            with await self._download_image(image_url) as image:
+                # 内容相同的图片（不同URL）已上传过时直接复用，无需转换和上传
+                media_id = self._find_cached_media(sha256=image.sha256)
+                if media_id and await self._media_exists(media_id):
+                    logger.info(f"复用内容相同的已上传图片，媒体ID: {media_id}")
+                    self._remember_media(image_url, image.sha256, media_id)
+                    return {'success': True, 'media_id': media_id, 'reused': True}
+
+                result = await self._upload_image(image_url, image)
+                if result.get('success'):
+                    result.update(source_url=image_url, sha256=image.sha256)
+                return result
+
+        except Exception as e:
+            logger.error(f"上传特色图片时出错: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def _download_image(self, image_url: str) -> SpooledImage:
+        """分块下载图片到缓冲区，先检查响应头，读取过程中检查大小上限和文件头
+
+        Args:
+            image_url: 图片URL
+
+        Returns:
+            SpooledImage，使用完毕后需关闭
+        """
+        max_bytes = get_max_image_bytes()
+        async with self.client.stream('GET', image_url, follow_redirects=True) as response:
+            response.raise_for_status()
+            check_image_headers(response.headers, max_bytes)
+            return await spool_image_async(response.aiter_bytes(MEDIA_CHUNK_SIZE), max_bytes)
+
+    async def _upload_image(self, image_url: str, image: SpooledImage) -> Dict[str, Any]:
+        """缩小并重新编码图片后上传体积最小的版本，失败时回退到原始格式
+
+        Args:
+            image_url: 图片URL（用于推断原始格式）
+            image: 已下载的图片
+
+        Returns:
+            包含媒体ID的字典
+        """
+        try:
+            # 图片处理在图片编码进程池中执行，这里通过线程等待结果，避免阻塞事件循环
+            capabilities = await self.get_media_capabilities()
+            loop = asyncio.get_running_loop()
+            # 较大的图片已落盘，只把文件路径交给编码进程
+            source = image.source()
+            optimized_image, extension = await loop.run_in_executor(
+                None, self._optimize_image, source,
+                capabilities['extensions'], capabilities['max_upload_bytes']
+            )
+            # 选中的就是原图时直接从缓冲区上传
+            keep_original = optimized_image is source
+            del source
+
+            result = None
+            if extension:
+                result = await self._perform_upload(image if keep_original else optimized_image, extension)
+                if result.get('success') or keep_original:
+                    return result
+                if self._is_upload_type_rejected(result):
+                    self._reject_media_extension(extension)
+
+            # 如果图片处理失败或上传失败，使用原始格式（优先使用文件头识别的格式）；
+            # 站点不接受原始格式或大小时不再重复上传
+            original_extension = self._fallback_extension(image_url, image)
+            if original_extension is None:
+                return result or {'success': False, 'error': f"站点不接受该图片（{len(image)} 字节）"}
+
+            if result:
+                logger.warning(f"{extension}格式上传失败，尝试使用原始格式")
+            return await self._perform_upload(image, original_extension)
+
+        except Exception as e:
+            logger.error(f"上传特色图片时出错: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def get_media_capabilities(self) -> Dict[str, Any]:
+        """探测站点允许上传的图片扩展名和单个文件大小上限，结果在本进程和站点缓存中复用
+
+        Returns:
+            包含extensions（允许的扩展名列表，None表示未知）和max_upload_bytes（0表示未知）的字典
+        """
+        if self._media_capabilities is not None:
+            return self._media_capabilities
+
+        async with self._media_capabilities_lock:
+            if self._media_capabilities is not None:
+                return self._media_capabilities
+
+            capabilities = self._cached_media_capabilities()
+            if capabilities is None:
+                try:
+                    response = await self.client.get(self.wp_editor_settings_url, auth=self.auth,
+                                                     params={'_fields': 'allowedMimeTypes,maxUploadFileSize'})
+                    response.raise_for_status()
+                    capabilities = self._parse_media_capabilities(response.json())
+                    logger.info(f"站点允许上传的图片格式: {capabilities['extensions']}，"
+                                f"单个文件上限: {capabilities['max_upload_bytes'] or '未知'} 字节")
+                except Exception as e:
+                    logger.info(f"无法获取站点媒体上传设置: {str(e)}，将根据上传结果自动判断")
+                    capabilities = {'extensions': None, 'max_upload_bytes': 0}
+                self._save_media_capabilities(capabilities)
+
+            self._media_capabilities = capabilities
+            return capabilities
+
+    async def _media_exists(self, media_id: int) -> bool:
+        """确认缓存中的媒体仍存在于站点上（每个媒体ID每次运行只确认一次），已被删除时移除缓存记录
+
+        Args:
+            media_id: 缓存中的媒体ID
+
+        Returns:
+            媒体是否可以复用，无法确认时返回False（重新上传）
+        """
+        if media_id in self._verified_media:
+            return True
+        try:
+            response = await self.client.get(f"{self.wp_api_url}/media/{media_id}", auth=self.auth,
+                                             params={'_fields': 'id'})
+            return self._media_probe_result(media_id, response)
+        except Exception as e:
+            logger.warning(f"无法确认缓存的媒体 {media_id} 是否存在: {str(e)}，将重新上传")
+            return False
+
+    async def delete_media(self, media_id: int) -> Dict[str, Any]:
+        """永久删除媒体文件（例如文章被放弃时刚上传的特色图片），同时删除本地缓存中的记录
+
+        Args:
+            media_id: 媒体ID
+
+        Returns:
+            包含success的结果字典
+        """
+        self._forget_media(media_id)
+        try:
+            response = await self.client.delete(f"{self.wp_api_url}/media/{media_id}", auth=self.auth,
+                                                params={'force': 'true'})
+            response.raise_for_status()
+            logger.info(f"已删除未使用的特色图片，媒体ID: {media_id}")
+            return {'success': True}
+        except Exception as e:
+            logger.warning(f"删除媒体 {media_id} 失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def _perform_upload(self, image_data: Union[bytes, SpooledImage], extension: str) -> Dict[str, Any]:
+        """执行媒体上传
+
+        Args:
+            image_data: 图片二进制数据，或从缓冲区分块发送的SpooledImage
+            extension: 文件扩展名（不含点）
+
+        Returns:
+            包含上传结果的字典
+        """
+        try:
+            headers = self._upload_headers(extension)
+            headers['Content-Length'] = str(len(image_data))
+
+            upload_response = await self.client.post(
+                f"{self.wp_api_url}/media",
+                content=image_data,
+                headers=headers,
+                auth=self.auth
+            )
+            upload_response.raise_for_status()
+
+            return self._parse_upload_response(upload_response.json(), extension)
+
+        except Exception as e:
+            logger.error(f"上传媒体（{extension}格式）时出错: {str(e)}")
+            return self._upload_error(e)
+
+    async def ensure_stylesheet(self, css: str, version: str) -> Dict[str, Any]:
+        """将共享样式表写入站点全局样式的自定义CSS，同一版本在站点缓存有效期内只注册一次
+
+        Args:
+            css: 共享样式表内容
+            version: 样式表版本号
+
+        Returns:
+            结果字典，registered表示本次是否实际写入
+        """
+        if self._stylesheet_registered(version):
+            return {'success': True, 'registered': False}
+
+        try:
+            response = await self.client.get(f"{self.wp_api_url}/themes", auth=self.auth,
+                                             params={'status': 'active'})
+            response.raise_for_status()
+            styles_url = self._global_styles_url(response.json())
+            if not styles_url:
+                return {'success': False, 'error': "当前主题不支持全局样式（需要WordPress 6.2+的区块主题）"}
+
+            response = await self.client.get(styles_url, auth=self.auth, params={'context': 'edit'})
+            response.raise_for_status()
+            styles = self._styles_with_stylesheet(response.json(), css, version)
+
+            response = await self.client.post(styles_url, auth=self.auth, json={'styles': styles})
+            response.raise_for_status()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+        self._mark_stylesheet_registered(version)
+        return {'success': True, 'registered': True}
+
+    async def publish_post(self, title: str, content: str, categories: list = None,
+                           tags: list = None, featured_media_id: Optional[int] = None) -> Dict[str, Any]:
+        """发布文章到WordPress
+
+        Args:
+            title: 文章标题
+            content: 文章内容（HTML格式）
+            categories: 分类ID列表
+            tags: 标签ID列表
+            featured_media_id: 特色图片ID
+
+        Returns:
+            包含发布状态的字典
+        """
+        try:
+            post_data = self._build_post_data(title, content, categories, tags, featured_media_id)
+
+            response = await self.client.post(f"{self.wp_api_url}/posts", json=post_data, auth=self.auth)
+            response.raise_for_status()
+
+            return self._parse_post_response(response.json())
+
+        except Exception as e:
+            logger.error(f"发布文章时出错: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def publish_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量发布多篇文章，站点支持时通过批量接口分组提交
+
+        Args:
+            posts: 文章列表，每项包含title, content, categories, tags, featured_media_id
+
+        Returns:
+            与输入顺序一致的发布结果列表
+        """
+        if not posts:
+            return []
+
+        responses = await self.batch_request(self._post_create_requests(posts))
+
+        # 站点不支持批量接口时，逐篇发布
+        if responses is None:
+            return list(await asyncio.gather(*(self.publish_post(**post) for post in posts)))
+
+        return self._parse_post_responses(responses)
+
+    async def get_batch_limit(self) -> int:
+        """探测站点批量接口支持情况及单次最大请求数
+
+        Returns:
+            单次批量请求的最大子请求数，不支持批量接口时返回0
+        """
+        if self._batch_limit is not None:
+            return self._batch_limit
+
+        cached_limit = self._cached_batch_limit()
+        if cached_limit is not None:
+            self._batch_limit = cached_limit
+            return self._batch_limit
+
+        try:
+            response = await self.client.options(self.wp_batch_url, auth=self.auth)
+            response.raise_for_status()
+            self._batch_limit = self._parse_batch_limit(response.json())
+            logger.info(f"站点支持批量接口，单次最多 {self._batch_limit} 个请求")
+        except Exception as e:
+            logger.info(f"站点不支持批量接口，将逐个发送请求: {str(e)}")
+            self._batch_limit = 0
+
+        self._save_meta('batch_limit', self._batch_limit)
+        return self._batch_limit
+
+    async def batch_request(self, sub_requests: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """通过 /wp-json/batch/v1 批量发送请求，超出站点上限时自动分组
+
+        Args:
+            sub_requests: 子请求列表，每项包含method, path(如 /wp/v2/posts), body
+
+        Returns:
+            与输入顺序一致的响应列表（每项包含status, body），站点不支持批量接口时返回None
+        """
+        limit = await self.get_batch_limit()
+        if not limit:
+            return None
+
+        responses = []
+        for start in range(0, len(sub_requests), limit):
+            group = sub_requests[start:start + limit]
+            try:
+                response = await self.client.post(self.wp_batch_url, auth=self.auth,
+                                                  json={'validation': 'normal', 'requests': group})
+                if response.status_code == 404 and not responses:
+                    # 旧版本WordPress没有批量接口
+                    logger.info("站点不支持批量接口，将逐个发送请求")
+                    self._batch_limit = 0
+                    return None
+                response.raise_for_status()
+                group_responses = response.json().get('responses', [])
+            except Exception as e:
+                logger.error(f"批量请求失败: {str(e)}")
+                group_responses = []
+
+            responses.extend(self._batch_group_responses(group, group_responses))
+
+        return responses
+
+    async def get_categories(self) -> List[Dict[str, Any]]:
+        """获取所有分类
+
+        Returns:
+            分类列表，每个分类包含id, name, slug信息
+        """
+        return (await self._get_category_index()).terms()
+
+    async def get_tags(self) -> List[Dict[str, Any]]:
+        """获取所有标签
+
+        Returns:
+            标签列表，每个标签包含id, name, slug信息
+        """
+        return (await self._get_tag_index()).terms()
+
+    async def _get_category_index(self) -> TermIndex:
+        """获取分类索引，首次调用时分页拉取全部分类"""
+        if self._categories_cache is not None:
+            return self._categories_cache
+
+        try:
+            self._categories_cache = TermIndex(await self._fetch_all_terms('categories'))
+            logger.info(f"成功获取分类列表，共 {len(self._categories_cache)} 个")
+            return self._categories_cache
+        except Exception as e:
+            logger.error(f"获取分类列表失败: {str(e)}")
+            return TermIndex()
+
+    async def _get_tag_index(self) -> TermIndex:
+        """获取标签索引，首次调用时分页拉取全部标签"""
+        if self._tags_cache is not None:
+            return self._tags_cache
+
+        try:
+            self._tags_cache = TermIndex(await self._fetch_all_terms('tags'))
+            logger.info(f"成功获取标签列表，共 {len(self._tags_cache)} 个")
+            return self._tags_cache
+        except Exception as e:
+            logger.error(f"获取标签列表失败: {str(e)}")
+            return TermIndex()
+
+    async def _fetch_all_terms(self, taxonomy: str) -> List[Dict[str, Any]]:
+        """分页拉取某个分类法的全部条目，获取总页数后并发请求其余页面
+
+        Args:
+            taxonomy: categories 或 tags
+
+        Returns:
+            全部条目列表（只包含id, name, slug字段）
+        """
+        url = f"{self.wp_api_url}/{taxonomy}"
+
+        async def fetch_page(page: int):
+            response = await self.client.get(url, auth=self.auth, params=self._terms_page_params(page))
+            response.raise_for_status()
+            return response
+
+        first_page = await fetch_page(1)
+        terms = first_page.json()
+        total_pages = int(first_page.headers.get('X-WP-TotalPages', 1) or 1)
+
+        if total_pages > 1:
+            for response in await asyncio.gather(*(fetch_page(page) for page in range(2, total_pages + 1))):
+                terms.extend(response.json())
+
+        return terms
+
+    async def get_category_id_by_name(self, name: str) -> Optional[int]:
+        """根据分类名称获取ID
+
+        Args:
+            name: 分类名称
+
+        Returns:
+            分类ID，如果未找到返回None
+        """
+        return (await self._get_category_index()).get_id(name)
+
+    async def get_tag_id_by_name(self, name: str) -> Optional[int]:
+        """根据标签名称获取ID
+
+        Args:
+            name: 标签名称
+
+        Returns:
+            标签ID，如果未找到返回None
+        """
+        return (await self._get_tag_index()).get_id(name)
+
+    async def create_category_if_not_exists(self, name: str) -> int:
+        """创建分类，如果不存在
+
+        Args:
+            name: 分类名称
+
+        Returns:
+            分类ID
+        """
+        category_id = await self.get_category_id_by_name(name)
+        if category_id:
+            return category_id
+
+        try:
+            response = await self.client.post(f"{self.wp_api_url}/categories", json={"name": name}, auth=self.auth)
+            response.raise_for_status()
+            new_category = response.json()
+            logger.info(f"成功创建分类 '{name}'，ID: {new_category.get('id')}")
+
+            # 将新分类直接写入缓存索引，无需重新拉取
+            self._cache_term('categories', new_category)
+
+            return new_category.get('id')
+        except Exception as e:
+            logger.error(f"创建分类 '{name}' 失败: {str(e)}")
+            return 1  # 返回默认分类ID
+
+    async def create_tag_if_not_exists(self, name: str) -> int:
+        """创建标签，如果不存在
+
+        Args:
+            name: 标签名称
+
+        Returns:
+            标签ID
+        """
+        tag_id = await self.get_tag_id_by_name(name)
+        if tag_id:
+            return tag_id
+
+        try:
+            response = await self.client.post(f"{self.wp_api_url}/tags", json={"name": name}, auth=self.auth)
+            response.raise_for_status()
+            new_tag = response.json()
+            logger.info(f"成功创建标签 '{name}'，ID: {new_tag.get('id')}")
+
+            # 将新标签直接写入缓存索引，无需重新拉取
+            self._cache_term('tags', new_tag)
+
+            return new_tag.get('id')
+        except Exception as e:
+            logger.error(f"创建标签 '{name}' 失败: {str(e)}")
+            return None
+
+    async def create_categories(self, names: List[str]) -> Dict[str, int]:
+        """批量创建不存在的分类
+
+        Args:
+            names: 分类名称列表
+
+        Returns:
+            分类名称到ID的映射
+        """
+        index = await self._get_category_index()
+        return await self._create_terms('categories', names, index.get_id, self.create_category_if_not_exists)
+
+    async def create_tags(self, names: List[str]) -> Dict[str, int]:
+        """批量创建不存在的标签
+
+        Args:
+            names: 标签名称列表
+
+        Returns:
+            标签名称到ID的映射
+        """
+        index = await self._get_tag_index()
+        return await self._create_terms('tags', names, index.get_id, self.create_tag_if_not_exists)
+
+    async def _create_terms(self, taxonomy: str, names: List[str], get_id_by_name, create_one) -> Dict[str, int]:
+        """批量创建分类法条目，站点不支持批量接口时逐个创建
+
+        Args:
+            taxonomy: categories 或 tags
+            names: 名称列表
+            get_id_by_name: 在已加载的索引中按名称查询ID的方法
+            create_one: 逐个创建的协程方法
+
+        Returns:
+            名称到ID的映射，创建失败的名称不在结果中
+        """
+        term_ids, missing = self._split_known_terms(names, get_id_by_name)
+        if not missing:
+            return term_ids
+
+        responses = await self.batch_request(self._term_create_requests(taxonomy, missing))
+
+        if responses is None:
+            for name in missing:
+                term_id = await create_one(name)
+                if term_id:
+                    term_ids[name] = term_id
+            return term_ids
+
+        return self._apply_term_responses(taxonomy, missing, responses, term_ids)
+
+    async def refresh_term_caches(self) -> None:
+        """增量刷新已加载的分类和标签缓存，策略与WordPressAPI.refresh_term_caches相同"""
+        refreshed = True
+        for taxonomy in ('categories', 'tags'):
+            index = self._term_index(taxonomy)
+            if index is None:
+                continue
+            try:
+                await self._refresh_term_index(taxonomy, index)
+            except Exception as e:
+                refreshed = False
+                logger.warning(f"刷新{self._taxonomy_label(taxonomy)}缓存失败: {str(e)}")
+
+        # 只有确认与站点一致后才写回快照（同时刷新有效期），刷新失败时保留原快照按期过期
+        if refreshed:
+            self.save_site_cache()
+
+    async def _refresh_term_index(self, taxonomy: str, index: TermIndex) -> None:
+        """增量刷新单个分类法的缓存索引"""
+        url = f"{self.wp_api_url}/{taxonomy}"
+        label = self._taxonomy_label(taxonomy)
+
+        probe = await self.client.get(url, auth=self.auth, params=self._term_probe_params())
+        probe.raise_for_status()
+        newest_id, total = self._parse_term_probe(probe.json(), probe.headers, index)
+        known_newest_id = index.max_id()
+        if total == len(index) and newest_id == known_newest_id:
+            return
+
+        # 新条目的ID最大，按ID倒序拉取直到遇到已缓存的最新条目
+        added = 0
+        page = 1
+        while newest_id > known_newest_id:
+            response = await self.client.get(url, auth=self.auth,
+                                             params=self._terms_page_params(page, newest_first=True))
+            response.raise_for_status()
+            terms = response.json()
+            page_added, known_reached = self._absorb_new_terms(index, terms, known_newest_id)
+            added += page_added
+            if known_reached or len(terms) < WP_TERMS_PER_PAGE:
+                break
+            page += 1
+
+        if len(index) != total:
+            # 有条目被删除，完整重新拉取
+            new_index = TermIndex(await self._fetch_all_terms(taxonomy))
+            self._set_term_index(taxonomy, new_index)
+            logger.info(f"{label}缓存已完整刷新，共 {len(new_index)} 个")
+            return
+
+        logger.info(f"{label}缓存增量更新 {added} 个，共 {len(index)} 个")
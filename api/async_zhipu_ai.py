@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import httpx
+
+from config.api_config import (ZHIPU_MODEL, ZHIPU_API_URL, CATEGORY_DETECTION_PROMPT, TAG_DETECTION_PROMPT,
+                               CLASSIFICATION_PROMPT, ZHIPU_BATCH_SIZE, ZHIPU_BATCH_WAIT, ZHIPU_STREAM)
+from api.zhipu_ai import ZhipuAIClient
+from api.classification_cache import ClassificationCache, classification_cache_key
+from utils.rate_limiter import AsyncTokenBucketLimiter, estimate_tokens
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class AsyncZhipuAIClient:
+    """智普AI异步交互类，直接调用HTTP接口，方法与返回结果与ZhipuAIClient保持一致"""
+
+    def __init__(self, api_key: str, client: httpx.AsyncClient, model: str = None,
+                 cache: Optional[ClassificationCache] = None, limiter: Optional[AsyncTokenBucketLimiter] = None,
+                 stream: bool = ZHIPU_STREAM):
+        """初始化异步智普AI客户端
+
+        Args:
+            api_key: 智普API密钥
+            client: 共享的异步HTTP连接池
+            model: 使用的模型，如未指定则使用配置中的默认模型
+            cache: 分类结果缓存，为None时每次都调用模型
+            limiter: 请求限流器（每分钟请求数、token数和并发数），为None时不限制
+            stream: 是否使用流式回复，解析出有效答案后立即停止接收
+        """
+        self.api_key = api_key
+        self.model = model or ZHIPU_MODEL
+        self.cache = cache
+        self.limiter = limiter
+        self.stream = stream
+        self.client = client
+        self.api_url = ZHIPU_API_URL
+        logger.info(f"已初始化异步智普AI客户端，使用模型: {self.model}")
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        """读取分类结果缓存，未启用缓存或出错时返回None"""
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"读取分类结果缓存失败: {str(e)}")
+            return None
+
+    def _cache_put(self, key: str, value: Any) -> None:
+        """写入分类结果缓存，只缓存模型成功返回的结果"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(key, value)
+        except Exception as e:
+            logger.warning(f"写入分类结果缓存失败: {str(e)}")
+
+    def _cached_classification(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的合并检测结果，缓存结果不是本次模型给出的，from_model为False"""
+        cached = self._cache_get(key)
+        if cached is None:
+            return None
+        return {'category': cached.get('category', ''), 'tags': cached.get('tags', []), 'from_model': False}
+
+    def _cache_classification(self, key: str, result: Dict[str, Any]) -> None:
+        """缓存合并检测结果，只缓存模型成功给出的结果"""
+        if result.get('from_model'):
+            self._cache_put(key, {'category': result['category'], 'tags': result['tags']})
+
+    async def _chat(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                    response_format: Optional[Dict[str, str]] = None,
+                    early_stop: Optional[Callable[[str], bool]] = None) -> str:
+        """经限流器排队后发送聊天完成请求，返回回复文本
+
+        Args:
+            messages: 消息列表
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            response_format: 输出格式，例如 {"type": "json_object"}
+            early_stop: 启用流式回复时，对已收到的文本返回True即停止接收并关闭连接
+
+        Returns:
+            模型回复的文本（提前停止时为已收到的部分）
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+
+        reserved = estimate_tokens(messages, max_tokens)
+        if self.limiter:
+            await self.limiter.acquire(reserved)
+        used = None
+        try:
+            if self.stream and early_stop is not None:
+                payload["stream"] = True
+                text = ''
+                # 离开async with时关闭连接，提前停止时不再接收剩余的回复
+                async with self.client.stream(
+                    "POST", self.api_url,
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json=payload
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        data = line[5:].strip()
+                        if data == '[DONE]':
+                            break
+                        chunk = json.loads(data)
+                        used = (chunk.get('usage') or {}).get('total_tokens') or used
+                        choices = chunk.get('choices') or []
+                        if choices:
+                            text += (choices[0].get('delta') or {}).get('content') or ''
+                            if early_stop(text):
+                                break
+                return text.strip()
+
+            response = await self.client.post(
+                self.api_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=payload
+            )
+            response.raise_for_status()
+            data = response.json()
+            used = (data.get('usage') or {}).get('total_tokens')
+            return data['choices'][0]['message']['content'].strip()
+        finally:
+            if self.limiter:
+                self.limiter.release(reserved, used)
+
+    async def detect_category(self, keyword: str, summary: str, categories: List[str], with_source: bool = False):
+        """检测文章应该属于哪个分类
+
+        Args:
+            keyword: 文章关键词
+            summary: 文章摘要
+            categories: 可选分类列表
+            with_source: 为True时同时返回结果是否由模型本次成功给出
+
+        Returns:
+            最匹配的分类名称；with_source为True时返回(分类名称, 是否来自模型)，
+            请求失败、回复无法匹配或命中缓存时后者为False
+        """
+        cache_key = classification_cache_key('category', self.model, CATEGORY_DETECTION_PROMPT,
+                                             categories, keyword, summary)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章分类(缓存): '{cached}'")
+            return (cached, False) if with_source else cached
+
+        try:
+            prompt = CATEGORY_DETECTION_PROMPT.format(
+                categories=", ".join(categories),
+                keyword=keyword,
+                summary=summary
+            )
+
+            category_name = await self._chat(
+                messages=[
+                    {"role": "system", "content": "你是一个帮助内容创作者对文章进行分类的助手。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.01,
+                max_tokens=50,
+                early_stop=lambda text: ZhipuAIClient._category_complete(text, categories)
+            )
+            # 只缓存与可选列表匹配的结果
+            matched = ZhipuAIClient._match_category(category_name, categories)
+            category = matched or ZhipuAIClient._parse_category(category_name, categories)
+            if matched:
+                self._cache_put(cache_key, category)
+            return (category, matched is not None) if with_source else category
+
+        except Exception as e:
+            logger.error(f"使用智普AI检测分类时出错: {str(e)}")
+            category = categories[0] if categories else ""
+            return (category, False) if with_source else category
+
+    async def detect_tags(self, keyword: str, summary: str, available_tags: List[str], with_source: bool = False):
+        """检测文章应该使用哪些标签
+
+        Args:
+            keyword: 文章关键词
+            summary: 文章摘要
+            available_tags: 可用标签列表
+            with_source: 为True时同时返回结果是否由模型本次成功给出
+
+        Returns:
+            最适合的标签列表（1-3个）；with_source为True时返回(标签列表, 是否来自模型)，
+            请求失败、回复中没有可用标签或命中缓存时后者为False
+        """
+        cache_key = classification_cache_key('tags', self.model, TAG_DETECTION_PROMPT,
+                                             available_tags, keyword, summary)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章标签(缓存): {', '.join(cached)}")
+            return (cached, False) if with_source else cached
+
+        try:
+            prompt = TAG_DETECTION_PROMPT.format(
+                tags=", ".join(available_tags),
+                keyword=keyword,
+                summary=summary
+            )
+
+            tag_text = await self._chat(
+                messages=[
+                    {"role": "system", "content": "你是一个帮助内容创作者为文章添加标签的助手。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=50,
+                early_stop=lambda text: ZhipuAIClient._tags_complete(text, available_tags)
+            )
+            # 只缓存与可用列表匹配的结果
+            matched = ZhipuAIClient._match_tags(tag_text, available_tags)
+            tags = ZhipuAIClient._parse_tags(tag_text, available_tags)
+            if matched:
+                self._cache_put(cache_key, tags)
+            return (tags, bool(matched)) if with_source else tags
+
+        except Exception as e:
+            logger.error(f"使用智普AI检测标签时出错: {str(e)}")
+            tags = available_tags[:min(3, len(available_tags))]
+            return (tags, False) if with_source else tags
+
+    async def classify(self, keyword: str, summary: str, categories: List[str],
+                       available_tags: List[str]) -> Dict[str, Any]:
+        """一次请求同时检测文章的分类和标签
+
+        Args:
+            keyword: 文章关键词
+            summary: 文章摘要
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            包含category（分类名称）、tags（1-3个标签）和from_model的字典；
+            from_model表示结果由模型本次成功给出，请求失败、回复无法匹配可选列表或命中缓存时为False
+        """
+        cache_key = ZhipuAIClient._classify_cache_key(self.model, keyword, summary, categories, available_tags)
+        cached = self._cached_classification(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章分类和标签(缓存): '{cached['category']}'，{', '.join(cached['tags'])}")
+            return cached
+        return await self._classify_uncached(keyword, summary, categories, available_tags, cache_key)
+
+    async def _classify_uncached(self, keyword: str, summary: str, categories: List[str],
+                                 available_tags: List[str], cache_key: str) -> Dict[str, Any]:
+        """不查缓存，直接请求模型检测单篇文章的分类和标签"""
+        try:
+            prompt = CLASSIFICATION_PROMPT.format(
+                categories=", ".join(categories),
+                tags=", ".join(available_tags),
+                keyword=keyword,
+                summary=summary
+            )
+
+            text = await self._chat(
+                messages=[
+                    {"role": "system", "content": "你是一个帮助内容创作者对文章进行分类并添加标签的助手。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.01,
+                max_tokens=100,
+                response_format={"type": "json_object"},
+                early_stop=ZhipuAIClient._json_complete
+            )
+            result = ZhipuAIClient._parse_classification(text, categories, available_tags)
+            self._cache_classification(cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"使用智普AI检测分类和标签时出错: {str(e)}")
+            return ZhipuAIClient._default_classification(categories, available_tags)
+
+    async def classify_many(self, items: List[Tuple[str, str]], categories: List[str],
+                            available_tags: List[str], batch_size: int = ZHIPU_BATCH_SIZE,
+                            check_cache: bool = True) -> List[Dict[str, Any]]:
+        """在一个Prompt中同时检测多篇文章的分类和标签
+
+        Args:
+            items: (关键词, 摘要) 列表
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+            batch_size: 每次请求最多包含的文章数
+            check_cache: 是否先查询分类结果缓存
+
+        Returns:
+            与items顺序一致的结果列表，每项包含category、tags和from_model
+        """
+        batch_size = max(1, int(batch_size))
+        keys = [ZhipuAIClient._classify_cache_key(self.model, keyword, summary, categories, available_tags)
+                for keyword, summary in items]
+        results = [None] * len(items)
+        pending = []
+        for index, key in enumerate(keys):
+            cached = self._cached_classification(key) if check_cache else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            if len(chunk) == 1:
+                index = chunk[0]
+                results[index] = await self._classify_uncached(*items[index], categories, available_tags,
+                                                               keys[index])
+                continue
+
+            try:
+                text = await self._chat(
+                    messages=ZhipuAIClient._batch_messages([items[index] for index in chunk],
+                                                           categories, available_tags),
+                    temperature=0.01,
+                    max_tokens=ZhipuAIClient._batch_max_tokens(len(chunk)),
+                    response_format={"type": "json_object"},
+                    early_stop=ZhipuAIClient._json_complete
+                )
+                parsed = ZhipuAIClient._parse_batch_classification(text, len(chunk), categories, available_tags)
+            except Exception as e:
+                logger.error(f"使用智普AI批量检测 {len(chunk)} 篇文章的分类和标签时出错: {str(e)}")
+                for index in chunk:
+                    results[index] = ZhipuAIClient._default_classification(categories, available_tags)
+                continue
+
+            logger.info(f"AI批量检测文章分类和标签: 1次请求完成 {sum(1 for r in parsed if r)}/{len(chunk)} 篇")
+            for index, result in zip(chunk, parsed):
+                if result is None:
+                    # 模型遗漏的文章单独再请求一次
+                    result = await self._classify_uncached(*items[index], categories, available_tags, keys[index])
+                else:
+                    self._cache_classification(keys[index], result)
+                results[index] = result
+
+        return results
+
+
+class AsyncClassificationBatcher:
+    """将同时进行的多个协程的分类请求合并为一次多篇文章的请求，接口与AsyncZhipuAIClient.classify一致"""
+
+    def __init__(self, client: AsyncZhipuAIClient, batch_size: int = ZHIPU_BATCH_SIZE,
+                 max_wait: float = ZHIPU_BATCH_WAIT):
+        """初始化请求合并器
+
+        Args:
+            client: 异步智普AI客户端
+            batch_size: 每批最多文章数
+            max_wait: 等待凑满一批的最长时间（秒）
+        """
+        self.client = client
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max_wait
+        # (分类列表, 标签列表) -> [((关键词, 摘要), Future)]
+        self._pending = {}
+        # (分类列表, 标签列表) -> 当前批次的等待计时器
+        self._timers = {}
+        self._tasks = set()
+
+    async def classify(self, keyword: str, summary: str, categories: List[str],
+                       available_tags: List[str]) -> Dict[str, Any]:
+        """检测文章的分类和标签，与其他协程的请求合并发送
+
+        Returns:
+            包含category、tags和from_model的字典
+        """
+        # 缓存命中时无需排队等待
+        cached = self.client._cached_classification(
+            ZhipuAIClient._classify_cache_key(self.client.model, keyword, summary, categories, available_tags))
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        group = (tuple(categories), tuple(available_tags))
+        future = loop.create_future()
+        queue = self._pending.setdefault(group, [])
+        queue.append(((keyword, summary), future))
+        if len(queue) >= self.batch_size:
+            # 凑满后立即发送，取消本批的计时器，避免它提前发送下一批
+            timer = self._timers.pop(group, None)
+            if timer is not None:
+                timer.cancel()
+            self._flush(group, queue)
+        elif len(queue) == 1:
+            self._timers[group] = loop.call_later(self.max_wait, self._flush, group, queue)
+        return await future
+
+    def _flush(self, group: Tuple[tuple, tuple], queue: List[Tuple[Tuple[str, str], asyncio.Future]]) -> None:
+        """发送指定的一批；该批已经发送时不做任何处理"""
+        if self._pending.get(group) is not queue:
+            return
+        batch = self._pending.pop(group)
+        self._timers.pop(group, None)
+        task = asyncio.ensure_future(self._run(group, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: Tuple[tuple, tuple], batch: List[Tuple[Tuple[str, str], asyncio.Future]]) -> None:
+        categories, available_tags = list(group[0]), list(group[1])
+        try:
+            results = await self.client.classify_many([item for item, _ in batch], categories, available_tags,
+                                                      self.batch_size, check_cache=False)
+        except Exception as e:
+            logger.error(f"批量检测文章分类和标签出错: {str(e)}")
+            results = [ZhipuAIClient._default_classification(categories, available_tags)] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
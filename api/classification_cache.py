@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""智普AI分类结果缓存
+
+按模型、Prompt模板、候选列表、关键词和摘要生成缓存键，将分类/标签检测结果持久化到SQLite，
+重复或重试的关键词无需再次调用模型。条目超过有效期后失效，超过容量时按最近使用时间淘汰。
+
+另外按关键词记录模型做出的分类决定，供本地预分类器学习。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from config.api_config import ZHIPU_CACHE_PATH, ZHIPU_CACHE_TTL, ZHIPU_CACHE_SIZE
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 命中统计（进程内所有缓存实例共用）
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_stats_lock = threading.Lock()
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def classification_cache_key(kind: str, model: str, template: str, candidates: List[str],
+                             keyword: str, summary: str) -> str:
+    """生成分类结果的缓存键
+
+    Args:
+        kind: 结果类型，例如category、tags
+        model: 模型名称
+        template: Prompt模板
+        candidates: 候选分类或标签列表
+        keyword: 文章关键词
+        summary: 文章摘要
+
+    Returns:
+        缓存键（SHA-256十六进制摘要）
+    """
+    parts = [kind, model, _digest(template), _digest('\n'.join(candidates)), keyword, _digest(summary)]
+    return _digest('\x1f'.join(parts))
+
+
+class ClassificationCache:
+    """基于SQLite的分类结果缓存，支持有效期和LRU淘汰，线程安全"""
+
+    def __init__(self, path: str, ttl: float = ZHIPU_CACHE_TTL, max_entries: int = ZHIPU_CACHE_SIZE):
+        """打开（必要时创建）缓存数据库
+
+        Args:
+            path: 数据库文件路径
+            ttl: 条目有效期（秒），超过有效期的条目视为未命中；不使用缓存时不应创建实例（见open_classification_cache）
+            max_entries: 最大条目数，0表示不限制
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS classifications (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS classifications_last_used ON classifications (last_used);
+                CREATE TABLE IF NOT EXISTS decisions (
+                    keyword TEXT PRIMARY KEY,
+                    category TEXT,
+                    tags TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+            """)
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果，未命中或已过期时返回None
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM classifications WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+                row = None
+            if row:
+                self._conn.execute("UPDATE classifications SET last_used = ? WHERE key = ?", (now, key))
+
+        with _stats_lock:
+            _stats['hits' if row else 'misses'] += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Any) -> None:
+        """写入缓存结果，超过容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的结果
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            if not self.max_entries:
+                return
+            overflow = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM classifications WHERE key IN "
+                    "(SELECT key FROM classifications ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                with _stats_lock:
+                    _stats['evictions'] += overflow
+
+    def save_decision(self, keyword: str, category: Optional[str], tags: List[str]) -> None:
+        """记录模型对某个关键词做出的分类决定
+
+        Args:
+            keyword: 文章关键词
+            category: 分类名称，None表示保留原值
+            tags: 标签名称列表，为空表示保留原值
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                # 分类与标签分别检测时分两次记录，缺少的一项保留原值
+                "INSERT INTO decisions (keyword, category, tags, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (keyword) DO UPDATE SET "
+                "category = COALESCE(excluded.category, category), "
+                "tags = CASE WHEN excluded.tags = '[]' THEN tags ELSE excluded.tags END, "
+                "created_at = excluded.created_at",
+                (keyword, category, json.dumps(tags, ensure_ascii=False), time.time())
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM decisions WHERE keyword NOT IN "
+                    "(SELECT keyword FROM decisions ORDER BY created_at DESC LIMIT ?)", (self.max_entries,)
+                )
+
+    def load_decisions(self, limit: int) -> List[Dict[str, Any]]:
+        """加载最近的分类决定
+
+        Args:
+            limit: 最多加载的条数
+
+        Returns:
+            包含keyword、category和tags的字典列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT keyword, category, tags FROM decisions ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{'keyword': keyword, 'category': category, 'tags': json.loads(tags)}
+                for keyword, category, tags in rows]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def open_classification_cache(config: Dict[str, Any]) -> Optional[ClassificationCache]:
+    """根据配置打开分类结果缓存
+
+    Args:
+        config: 配置字典，读取zhipu_cache_path、zhipu_cache_ttl和zhipu_cache_size字段
+
+    Returns:
+        ClassificationCache实例，zhipu_cache_ttl小于等于0（不使用缓存）或打开失败时返回None
+    """
+    ttl = float(config.get('zhipu_cache_ttl', ZHIPU_CACHE_TTL))
+    if ttl <= 0:
+        return None
+
+    path = config.get('zhipu_cache_path') or ZHIPU_CACHE_PATH
+    if not os.path.isabs(path):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, path)
+
+    try:
+        return ClassificationCache(path, ttl, int(config.get('zhipu_cache_size', ZHIPU_CACHE_SIZE)))
+    except Exception as e:
+        logger.warning(f"无法打开分类结果缓存 {path}: {str(e)}，将不使用缓存")
+        return None
+
+
+def get_classification_cache_stats() -> Dict[str, int]:
+    """获取分类结果缓存的命中、未命中和淘汰次数"""
+    with _stats_lock:
+        return dict(_stats)
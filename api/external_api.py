@@ -1,12 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import requests
 import logging
 from typing import Dict, Any
 from urllib.parse import quote
 
 from config.api_config import EXTERNAL_IMAGE_API, EXTERNAL_AI_SEARCH_API
+from api.http_session import get_shared_session
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
@@ -19,6 +19,7 @@ class ExternalAPI:
         """初始化外部API客户端"""
         self.image_api_url = EXTERNAL_IMAGE_API
         self.ai_search_api_url = EXTERNAL_AI_SEARCH_API
+        self.session = get_shared_session()
 
     def get_featured_image(self, width: int = 960, height: int = 540) -> Dict[str, Any]:
         """获取特色图片
@@ -36,7 +37,7 @@ class ExternalAPI:
                 'height': height,
                 'type': 'json'
             }
-            response = requests.get(self.image_api_url, params=params)
+            response = self.session.get(self.image_api_url, params=params)
             response.raise_for_status()
             data = response.json()
 
@@ -62,7 +63,7 @@ class ExternalAPI:
         """
         try:
             params = {'keyword': quote(keyword)}
-            response = requests.get(self.ai_search_api_url, params=params)
+            response = self.session.get(self.ai_search_api_url, params=params)
             response.raise_for_status()
             data = response.json()
 
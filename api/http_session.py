@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""共享HTTP连接池
+
+所有对外请求（WordPress、外部API、图片下载、智普AI）都通过这里创建的会话发出，
+统一设置连接池大小、Keep-Alive、连接/读取超时，避免每次请求都重新进行TCP+TLS握手，
+也避免慢速上游无限期占用工作线程。会话均带有api.resilience中的重试与熔断逻辑。
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Optional, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.api_config import (
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_KEEP_ALIVE, HTTP2_ENABLED
+)
+from api.resilience import ResilientSession, create_resilient_httpx_client, create_resilient_async_client
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 当前生效的连接池设置，由configure_http()根据配置文件更新
+_settings = {
+    'pool_size': HTTP_POOL_SIZE,
+    'connect_timeout': HTTP_CONNECT_TIMEOUT,
+    'read_timeout': HTTP_READ_TIMEOUT,
+    'keep_alive': HTTP_KEEP_ALIVE,
+    'http2': HTTP2_ENABLED,
+}
+
+# 不携带认证信息的共享会话（外部API、图片下载）
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """为未显式指定超时的请求设置默认超时的HTTPAdapter"""
+
+    def __init__(self, timeout: tuple, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure_http(config: Dict[str, Any]) -> Dict[str, Any]:
+    """根据配置文件更新连接池设置，需在创建任何API客户端之前调用
+
+    Args:
+        config: 配置字典，读取http_pool_size、http_connect_timeout、http_read_timeout、
+                http_keep_alive、http2等字段
+
+    Returns:
+        更新后的连接池设置
+    """
+    global _shared_session
+
+    _settings['pool_size'] = max(1, int(config.get('http_pool_size', HTTP_POOL_SIZE)))
+    _settings['connect_timeout'] = float(config.get('http_connect_timeout', HTTP_CONNECT_TIMEOUT))
+    _settings['read_timeout'] = float(config.get('http_read_timeout', HTTP_READ_TIMEOUT))
+    _settings['keep_alive'] = bool(config.get('http_keep_alive', HTTP_KEEP_ALIVE))
+    _settings['http2'] = bool(config.get('http2', HTTP2_ENABLED))
+
+    # 设置变化后丢弃旧的共享会话，下次使用时按新设置重建
+    with _shared_session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
+
+    if _settings['http2']:
+        logger.info("requests会话仅支持HTTP/1.1，HTTP/2仅对httpx客户端（智普AI、异步模式）生效")
+
+    logger.info(f"HTTP连接池设置: 连接数 {_settings['pool_size']}，"
+                f"连接超时 {_settings['connect_timeout']} 秒，读取超时 {_settings['read_timeout']} 秒，"
+                f"Keep-Alive {'开启' if _settings['keep_alive'] else '关闭'}，"
+                f"HTTP/2 {'开启' if _settings['http2'] else '关闭'}")
+    return dict(_settings)
+
+
+def get_timeout() -> tuple:
+    """获取(连接超时, 读取超时)元组"""
+    return _settings['connect_timeout'], _settings['read_timeout']
+
+
+def create_session(retry_post_hosts: Iterable[str] = ()) -> requests.Session:
+    """按当前设置创建新的requests会话，适用于需要单独携带认证信息的客户端
+
+    Args:
+        retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机
+
+    Returns:
+        配置好连接池、默认超时和重试熔断的会话
+    """
+    session = ResilientSession(retry_post_hosts)
+    adapter = TimeoutHTTPAdapter(
+        timeout=get_timeout(),
+        pool_connections=_settings['pool_size'],
+        pool_maxsize=_settings['pool_size'],
+        pool_block=False
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if not _settings['keep_alive']:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """获取不携带认证信息的共享会话，用于外部API和图片下载
+
+    Returns:
+        进程内共享的会话
+    """
+    global _shared_session
+
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = create_session()
+    return _shared_session
+
+
+def _http2_available() -> bool:
+    """检查是否开启并可以使用HTTP/2（需要安装h2: pip install httpx[http2]）"""
+    if not _settings['http2']:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("已开启HTTP/2但未安装h2库，将使用HTTP/1.1")
+        return False
+
+
+def _httpx_options(pool_size: Optional[int] = None) -> Dict[str, Any]:
+    """生成httpx客户端的公共参数
+
+    Args:
+        pool_size: 覆盖默认连接池大小
+    """
+    import httpx
+
+    pool_size = pool_size or _settings['pool_size']
+    return {
+        'limits': httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size if _settings['keep_alive'] else 0
+        ),
+        'timeout': httpx.Timeout(_settings['read_timeout'], connect=_settings['connect_timeout']),
+        'http2': _http2_available(),
+    }
+
+
+def create_httpx_client(pool_size: Optional[int] = None, retry_post_hosts: Iterable[str] = ()):
+    """按当前设置创建同步httpx客户端，用于智普AI SDK
+
+    Args:
+        pool_size: 覆盖默认连接池大小
+        retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机
+
+    Returns:
+        带重试与熔断的httpx.Client实例
+    """
+    return create_resilient_httpx_client(retry_post_hosts, **_httpx_options(pool_size))
+
+
+def create_async_client(pool_size: Optional[int] = None, retry_post_hosts: Iterable[str] = ()):
+    """按当前设置创建异步httpx客户端，用于异步发布模式
+
+    Args:
+        pool_size: 覆盖默认连接池大小
+        retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机
+
+    Returns:
+        带重试与熔断的httpx.AsyncClient实例
+    """
+    return create_resilient_async_client(retry_post_hosts, **_httpx_options(pool_size))
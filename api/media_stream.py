@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""图片流式下载与上传
+
+下载时分块读取并边读边计算SHA-256，先检查Content-Type、Content-Length和文件头魔数，
+超过大小上限或不是图片的响应会在读完之前被拒绝。内容先写入内存，超过MEDIA_SPOOL_SIZE后
+转存到命名临时文件：上传时直接从该缓冲区分块发送，图片编码进程按文件路径自行读取，
+较大的图片不会整体读入发布进程的内存，每个工作线程的内存占用保持平稳。
+"""
+
+import io
+import os
+import hashlib
+import mimetypes
+import tempfile
+from typing import Dict, Optional, Iterable, AsyncIterable, Union
+
+from config.api_config import MEDIA_CHUNK_SIZE, MEDIA_SPOOL_SIZE
+
+# 文件头魔数 -> 文件扩展名
+_MAGIC_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    # 以下格式不能直接作为特色图片使用，由图片编码进程转换
+    (b'BM', 'bmp'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'\x00\x00\x01\x00', 'ico'),
+)
+
+# 识别文件头需要的最少字节数
+_MAGIC_LENGTH = 12
+
+# 文件扩展名 -> 上传时的Content-Type（与WordPress允许的MIME类型一致，mimetypes在部分系统上缺少webp、avif）
+_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'bmp': 'image/bmp',
+    'tif': 'image/tiff',
+    'tiff': 'image/tiff',
+    'ico': 'image/x-icon',
+}
+
+
+def detect_image_extension(head: bytes) -> Optional[str]:
+    """根据文件头魔数识别图片格式
+
+    Args:
+        head: 文件开头的字节（至少12字节）
+
+    Returns:
+        文件扩展名，无法识别时返回None
+    """
+    for signature, extension in _MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'avif'
+    return None
+
+
+def image_content_type(extension: str) -> str:
+    """根据文件扩展名确定上传时的Content-Type
+
+    Args:
+        extension: 文件扩展名（不含点）
+
+    Returns:
+        MIME类型，不是已知的图片扩展名时返回application/octet-stream
+    """
+    extension = (extension or '').lower()
+    if extension in _CONTENT_TYPES:
+        return _CONTENT_TYPES[extension]
+    guessed = mimetypes.guess_type(f"file.{extension}")[0]
+    return guessed if guessed and guessed.startswith('image/') else 'application/octet-stream'
+
+
+def check_image_headers(headers: Dict[str, str], max_bytes: int) -> None:
+    """在读取响应体之前检查响应头
+
+    Args:
+        headers: 响应头
+        max_bytes: 允许的最大字节数，0表示不限制
+
+    Raises:
+        ValueError: 响应不是图片或声明的大小超过上限
+    """
+    content_type = (headers.get('Content-Type') or '').split(';')[0].strip().lower()
+    if content_type and not content_type.startswith('image/') and content_type != 'application/octet-stream':
+        raise ValueError(f"图片URL返回的不是图片: {content_type}")
+
+    content_length = headers.get('Content-Length')
+    if max_bytes and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ValueError(f"图片大小 {content_length} 字节超过上限 {max_bytes} 字节")
+
+
+class SpooledImage:
+    """下载到内存（较大时转存到临时文件）中的图片，可直接作为上传请求体
+
+    同时提供同步读取接口（requests）和可重复迭代的异步接口（httpx），
+    实现__len__以便两者都发送Content-Length而不是分块编码。
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        """初始化空缓冲区
+
+        Args:
+            max_bytes: 允许的最大字节数，0表示不限制
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.extension = None
+        # 转存到临时文件后的文件路径，仍在内存中时为None
+        self.path = None
+        self._file = io.BytesIO()
+        self._sha256 = hashlib.sha256()
+        self._head = b''
+
+    def write(self, chunk: bytes) -> None:
+        """写入一块下载内容，检查大小上限和文件头
+
+        Raises:
+            ValueError: 超过大小上限或文件头不是可识别的图片格式
+        """
+        if not chunk:
+            return
+
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise ValueError(f"图片大小超过上限 {self.max_bytes} 字节")
+
+        if len(self._head) < _MAGIC_LENGTH:
+            self._head += chunk[:_MAGIC_LENGTH - len(self._head)]
+            if len(self._head) >= _MAGIC_LENGTH:
+                self._check_magic()
+
+        self._sha256.update(chunk)
+        if self.path is None and self.size > MEDIA_SPOOL_SIZE:
+            self._rollover()
+        self._file.write(chunk)
+
+    def _rollover(self) -> None:
+        """将内存中的内容转存到命名临时文件，编码进程可以按路径读取"""
+        fd, path = tempfile.mkstemp(prefix='featured-image-', suffix='.tmp')
+        spooled = os.fdopen(fd, 'w+b')
+        spooled.write(self._file.getvalue())
+        self._file.close()
+        self._file = spooled
+        self.path = path
+
+    def finish(self) -> 'SpooledImage':
+        """下载完成后调用，校验文件头并回到开头"""
+        if self.extension is None:
+            self._check_magic()
+        self._file.seek(0)
+        return self
+
+    def _check_magic(self) -> None:
+        self.extension = detect_image_extension(self._head)
+        if self.extension is None:
+            raise ValueError("下载内容不是可识别的图片格式")
+
+    @property
+    def sha256(self) -> str:
+        """图片内容的SHA-256十六进制摘要"""
+        return self._sha256.hexdigest()
+
+    def source(self) -> Union[bytes, str]:
+        """交给图片编码的内容：已转存到临时文件时返回文件路径，否则返回内存中的数据（不超过MEDIA_SPOOL_SIZE）"""
+        if self.path is not None:
+            self._file.flush()
+            return self.path
+        return self._file.getvalue()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def __len__(self) -> int:
+        return self.size
+
+    async def __aiter__(self):
+        # 每次迭代都从头开始，重试时可以重新发送
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(MEDIA_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self) -> None:
+        self._file.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> 'SpooledImage':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def spool_image(chunks: Iterable[bytes], max_bytes: int = 0) -> SpooledImage:
+    """将分块下载的内容写入SpooledImage
+
+    Args:
+        chunks: 响应体分块迭代器
+        max_bytes: 允许的最大字节数，0表示不限制
+
+    Returns:
+        已回到开头的SpooledImage
+
+    Raises:
+        ValueError: 超过大小上限或不是图片
+    """
+    image = SpooledImage(max_bytes)
+    try:
+        for chunk in chunks:
+            image.write(chunk)
+        return image.finish()
+    except Exception:
+        image.close()
+        raise
+
+
+async def spool_image_async(chunks: AsyncIterable[bytes], max_bytes: int = 0) -> SpooledImage:
+    """spool_image的异步版本"""
+    image = SpooledImage(max_bytes)
+    try:
+        async for chunk in chunks:
+            image.write(chunk)
+        return image.finish()
+    except Exception:
+        image.close()
+        raise
@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""出站请求的容错层
+
+为所有对外请求提供按主机划分的：
+- 指数退避+随机抖动重试
+- 429/503响应的Retry-After处理
+- 熔断器：连续失败达到阈值后快速失败，冷却后放行一个探测请求
+- 重试次数、失败次数、熔断状态等计数
+"""
+
+import time
+import random
+import asyncio
+import itertools
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Iterable
+from urllib.parse import urlparse
+
+import requests
+
+from config.api_config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT
+)
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 幂等方法在连接错误、超时和以下状态码时重试
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# 非幂等方法（POST）只在服务端明确未处理请求时重试，避免重复发布
+NON_IDEMPOTENT_RETRYABLE_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# Retry-After的最大等待时间（秒），超过时按该值等待
+RETRY_AFTER_MAX = 120
+
+
+class CircuitOpenError(Exception):
+    """目标主机的熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, host: str, retry_in: float):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"上游服务 {host} 熔断中，{retry_in:.0f} 秒后重试")
+
+
+class CircuitBreaker:
+    """单个主机的熔断器（closed → open → half_open → closed）"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> float:
+        """判断是否放行请求
+
+        Returns:
+            0表示放行，否则为距离下次探测的剩余秒数
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                # 冷却结束，进入半开状态，只放行一个探测请求
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return 0.0
+
+            return max(remaining, 1.0)
+
+    def is_open(self) -> bool:
+        """熔断器是否处于打开状态且仍在冷却期内"""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() < self.opened_at + self.recovery_timeout
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败
+
+        Returns:
+            本次失败是否导致熔断器打开
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+                return True
+            return False
+
+
+class ResiliencePolicy:
+    """按主机维护熔断器与计数的容错策略"""
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, backoff_base: float = RETRY_BACKOFF_BASE,
+                 backoff_max: float = RETRY_BACKOFF_MAX, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, host: str, key: str) -> None:
+        with self._lock:
+            self._stats[host][key] += 1
+
+    def _host_state(self, host: str):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+                self._stats[host] = {'requests': 0, 'retries': 0, 'failures': 0, 'short_circuited': 0}
+            return self._breakers[host], self._stats[host]
+
+    def before_request(self, host: str) -> None:
+        """请求发出前检查熔断器，打开时抛出CircuitOpenError"""
+        breaker, _ = self._host_state(host)
+        retry_in = breaker.allow_request()
+        if retry_in:
+            self._count(host, 'short_circuited')
+            raise CircuitOpenError(host, retry_in)
+        self._count(host, 'requests')
+
+    def record_success(self, host: str) -> None:
+        breaker, _ = self._host_state(host)
+        breaker.record_success()
+
+    def record_failure(self, host: str) -> None:
+        breaker, _ = self._host_state(host)
+        self._count(host, 'failures')
+        if breaker.record_failure():
+            logger.warning(f"上游服务 {host} 连续失败 {breaker.consecutive_failures} 次，"
+                           f"熔断 {self.recovery_timeout:.0f} 秒")
+
+    def record_retry(self, host: str) -> None:
+        self._host_state(host)
+        self._count(host, 'retries')
+
+    def is_open(self, host: str) -> bool:
+        breaker, _ = self._host_state(host)
+        return breaker.is_open()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """计算第attempt次重试前的等待时间（指数退避+完全抖动，优先使用Retry-After）"""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), RETRY_AFTER_MAX)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def response_retry_delay(self, host: str, method: str, response, attempt: int,
+                             retry_non_idempotent: bool) -> Optional[float]:
+        """记录一次响应结果，并判断是否需要重试
+
+        Returns:
+            重试前需要等待的秒数，不需要重试时返回None
+        """
+        status = response.status_code
+        if status < 500 and status != 429:
+            self.record_success(host)
+            return None
+
+        self.record_failure(host)
+        if attempt + 1 >= self.max_attempts or not _retryable_status(method, status, retry_non_idempotent):
+            return None
+
+        delay = self.backoff_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+        logger.warning(f"请求 {host} 返回 {status}，{delay:.1f} 秒后第 {attempt + 1} 次重试")
+        self.record_retry(host)
+        return delay
+
+    def exception_retry_delay(self, host: str, exc: Exception, attempt: int, retryable: bool) -> Optional[float]:
+        """记录一次请求异常，并判断是否需要重试
+
+        Returns:
+            重试前需要等待的秒数，不需要重试时返回None
+        """
+        self.record_failure(host)
+        if attempt + 1 >= self.max_attempts or not retryable:
+            return None
+
+        delay = self.backoff_delay(attempt)
+        logger.warning(f"请求 {host} 出错: {str(exc)}，{delay:.1f} 秒后第 {attempt + 1} 次重试")
+        self.record_retry(host)
+        return delay
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机的请求、重试、失败、熔断计数和熔断器状态"""
+        with self._lock:
+            return {
+                host: dict(stats, state=self._breakers[host].state)
+                for host, stats in self._stats.items()
+            }
+
+
+# 进程内共享的容错策略，由configure_resilience()根据配置文件更新
+_policy = ResiliencePolicy()
+
+
+def configure_resilience(config: Dict[str, Any]) -> ResiliencePolicy:
+    """根据配置文件创建容错策略，需在创建任何API客户端之前调用
+
+    Args:
+        config: 配置字典，读取retry_max_attempts、retry_backoff_base、retry_backoff_max、
+                circuit_failure_threshold、circuit_recovery_timeout等字段
+
+    Returns:
+        新的容错策略
+    """
+    global _policy
+    _policy = ResiliencePolicy(
+        max_attempts=int(config.get('retry_max_attempts', RETRY_MAX_ATTEMPTS)),
+        backoff_base=float(config.get('retry_backoff_base', RETRY_BACKOFF_BASE)),
+        backoff_max=float(config.get('retry_backoff_max', RETRY_BACKOFF_MAX)),
+        failure_threshold=int(config.get('circuit_failure_threshold', CIRCUIT_FAILURE_THRESHOLD)),
+        recovery_timeout=float(config.get('circuit_recovery_timeout', CIRCUIT_RECOVERY_TIMEOUT))
+    )
+    return _policy
+
+
+def get_policy() -> ResiliencePolicy:
+    """获取当前生效的容错策略"""
+    return _policy
+
+
+def get_resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """获取各主机的重试与熔断计数"""
+    return _policy.get_stats()
+
+
+def is_circuit_open(url: str) -> bool:
+    """判断URL所在主机的熔断器是否打开，用于在流水线入口快速丢弃任务"""
+    return _policy.is_open(urlparse(url).netloc)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期）
+
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable_status(method: str, status: int, retry_non_idempotent: bool) -> bool:
+    if method.upper() in IDEMPOTENT_METHODS or retry_non_idempotent:
+        return status in RETRYABLE_STATUSES
+    return status in NON_IDEMPOTENT_RETRYABLE_STATUSES
+
+
+def _rewind_body(body) -> None:
+    """重试前将文件类请求体重置到开头"""
+    if hasattr(body, 'seek'):
+        body.seek(0)
+
+
+class ResilientSession(requests.Session):
+    """带重试与熔断的requests会话"""
+
+    def __init__(self, retry_post_hosts: Iterable[str] = ()):
+        """初始化会话
+
+        Args:
+            retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机（请求可安全重复）
+        """
+        super().__init__()
+        self.retry_post_hosts = set(retry_post_hosts)
+
+    def _retryable_exception(self, method: str, exc: Exception, retry_non_idempotent: bool) -> bool:
+        if not isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return False
+        if method.upper() in IDEMPOTENT_METHODS or retry_non_idempotent:
+            return True
+        # 非幂等请求只在确定请求未发出（建立连接失败）时重试，避免重复发布
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return type(reason).__name__ in ('NewConnectionError', 'NameResolutionError')
+
+    def request(self, method, url, **kwargs):
+        policy = _policy
+        host = urlparse(url).netloc
+        retry_non_idempotent = host in self.retry_post_hosts
+
+        for attempt in itertools.count():
+            policy.before_request(host)
+            try:
+                response = super().request(method, url, **kwargs)
+            except Exception as e:
+                delay = policy.exception_retry_delay(
+                    host, e, attempt, self._retryable_exception(method, e, retry_non_idempotent))
+                if delay is None:
+                    raise
+            else:
+                delay = policy.response_retry_delay(host, method, response, attempt, retry_non_idempotent)
+                if delay is None:
+                    return response
+                response.close()
+
+            _rewind_body(kwargs.get('data'))
+            time.sleep(delay)
+
+
+def _httpx_retryable_exception(method: str, exc: Exception, retry_non_idempotent: bool) -> bool:
+    import httpx
+
+    if method.upper() in IDEMPOTENT_METHODS or retry_non_idempotent:
+        return isinstance(exc, httpx.TransportError)
+    # 非幂等请求只在确定请求未发出（建立连接失败）时重试，避免重复发布
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+def create_resilient_httpx_client(retry_post_hosts: Iterable[str] = (), **kwargs):
+    """创建带重试与熔断的同步httpx客户端
+
+    Args:
+        retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机
+        **kwargs: 传给httpx.Client的参数
+    """
+    import httpx
+
+    retry_post_hosts = set(retry_post_hosts)
+
+    class ResilientHTTPXClient(httpx.Client):
+        def send(self, request, **send_kwargs):
+            policy = _policy
+            host = request.url.netloc.decode()
+            retry_non_idempotent = host in retry_post_hosts
+
+            for attempt in itertools.count():
+                policy.before_request(host)
+                try:
+                    response = super().send(request, **send_kwargs)
+                except Exception as e:
+                    delay = policy.exception_retry_delay(
+                        host, e, attempt, _httpx_retryable_exception(request.method, e, retry_non_idempotent))
+                    if delay is None:
+                        raise
+                else:
+                    delay = policy.response_retry_delay(host, request.method, response, attempt,
+                                                        retry_non_idempotent)
+                    if delay is None:
+                        return response
+                    response.close()
+
+                time.sleep(delay)
+
+    return ResilientHTTPXClient(**kwargs)
+
+
+def create_resilient_async_client(retry_post_hosts: Iterable[str] = (), **kwargs):
+    """创建带重试与熔断的异步httpx客户端
+
+    Args:
+        retry_post_hosts: 允许POST请求在5xx和读取错误时也重试的主机
+        **kwargs: 传给httpx.AsyncClient的参数
+    """
+    import httpx
+
+    retry_post_hosts = set(retry_post_hosts)
+
+    class ResilientAsyncClient(httpx.AsyncClient):
+        async def send(self, request, **send_kwargs):
+            policy = _policy
+            host = request.url.netloc.decode()
+            retry_non_idempotent = host in retry_post_hosts
+
+            for attempt in itertools.count():
+                policy.before_request(host)
+                try:
+                    response = await super().send(request, **send_kwargs)
+                except Exception as e:
+                    delay = policy.exception_retry_delay(
+                        host, e, attempt, _httpx_retryable_exception(request.method, e, retry_non_idempotent))
+                    if delay is None:
+                        raise
+                else:
+                    delay = policy.response_retry_delay(host, request.method, response, attempt,
+                                                        retry_non_idempotent)
+                    if delay is None:
+                        return response
+                    await response.aclose()
+
+                await asyncio.sleep(delay)
+
+    return ResilientAsyncClient(**kwargs)
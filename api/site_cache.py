@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""站点元数据本地缓存
+
+将每个WordPress站点的分类/标签名称→ID映射及批量接口上限等元数据持久化到SQLite，
+下次启动时在有效期内直接加载，跳过连接验证和分类标签解析的数十个HTTP请求，
+一致性校验改为在后台进行。
+
+同时记录已上传特色图片的来源URL、内容SHA-256与媒体ID，相同图片直接复用已有媒体，
+避免媒体库中出现重复文件。媒体记录按内容寻址，不受有效期限制；复用前由API客户端确认媒体仍存在于站点上，
+已被删除的媒体从缓存中移除。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+from config.api_config import SITE_CACHE_PATH, SITE_CACHE_TTL
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class SiteCache:
+    """基于SQLite的站点元数据缓存，线程安全"""
+
+    def __init__(self, path: str, ttl: float = SITE_CACHE_TTL):
+        """打开（必要时创建）缓存数据库
+
+        Args:
+            path: 数据库文件路径
+            ttl: 缓存有效期（秒），超过有效期的数据视为未命中
+        """
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS taxonomy_snapshots (
+                    site TEXT NOT NULL,
+                    taxonomy TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (site, taxonomy)
+                );
+                CREATE TABLE IF NOT EXISTS terms (
+                    site TEXT NOT NULL,
+                    taxonomy TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    name TEXT,
+                    slug TEXT,
+                    PRIMARY KEY (site, taxonomy, id)
+                );
+                CREATE TABLE IF NOT EXISTS media (
+                    site TEXT NOT NULL,
+                    source_url TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    media_id INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (site, source_url)
+                );
+                CREATE INDEX IF NOT EXISTS media_sha256 ON media (site, sha256);
+                CREATE TABLE IF NOT EXISTS site_meta (
+                    site TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (site, key)
+                );
+            """)
+
+    @staticmethod
+    def site_key(wp_url: str) -> str:
+        """生成站点的缓存键"""
+        return (wp_url or '').rstrip('/').lower()
+
+    def _is_fresh(self, updated_at: float) -> bool:
+        return self.ttl <= 0 or time.time() - updated_at <= self.ttl
+
+    def load_terms(self, site: str, taxonomy: str) -> Optional[List[Dict[str, Any]]]:
+        """加载某个站点分类法的条目快照
+
+        Args:
+            site: 站点缓存键
+            taxonomy: categories 或 tags
+
+        Returns:
+            条目列表，没有快照或已过期时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM taxonomy_snapshots WHERE site = ? AND taxonomy = ?",
+                (site, taxonomy)
+            ).fetchone()
+            if not row or not self._is_fresh(row[0]):
+                return None
+            terms = [
+                {'id': term_id, 'name': name, 'slug': slug}
+                for term_id, name, slug in self._conn.execute(
+                    "SELECT id, name, slug FROM terms WHERE site = ? AND taxonomy = ?", (site, taxonomy)
+                )
+            ]
+        return terms
+
+    def save_terms(self, site: str, taxonomy: str, terms: List[Dict[str, Any]]) -> None:
+        """保存某个站点分类法的完整条目快照
+
+        Args:
+            site: 站点缓存键
+            taxonomy: categories 或 tags
+            terms: 条目列表
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM terms WHERE site = ? AND taxonomy = ?", (site, taxonomy))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO terms (site, taxonomy, id, name, slug) VALUES (?, ?, ?, ?, ?)",
+                [(site, taxonomy, term.get('id'), term.get('name'), term.get('slug'))
+                 for term in terms if term.get('id')]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO taxonomy_snapshots (site, taxonomy, updated_at) VALUES (?, ?, ?)",
+                (site, taxonomy, time.time())
+            )
+
+    def get_meta(self, site: str, key: str) -> Optional[str]:
+        """读取站点元数据，过期时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, updated_at FROM site_meta WHERE site = ? AND key = ?", (site, key)
+            ).fetchone()
+        if not row or not self._is_fresh(row[1]):
+            return None
+        return row[0]
+
+    def set_meta(self, site: str, key: str, value: Any) -> None:
+        """写入站点元数据"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO site_meta (site, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (site, key, str(value), time.time())
+            )
+
+    def get_media_by_url(self, site: str, source_url: str) -> Optional[int]:
+        """按图片来源URL查找已上传的媒体ID"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id FROM media WHERE site = ? AND source_url = ?", (site, source_url)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_media_by_hash(self, site: str, sha256: str) -> Optional[int]:
+        """按图片内容的SHA-256查找已上传的媒体ID"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id FROM media WHERE site = ? AND sha256 = ? "
+                "ORDER BY updated_at DESC LIMIT 1", (site, sha256)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_media(self, site: str, source_url: str, sha256: str, media_id: int) -> None:
+        """记录图片来源URL、内容SHA-256与媒体ID的对应关系
+
+        Args:
+            site: 站点缓存键
+            source_url: 图片来源URL
+            sha256: 原始图片内容的SHA-256十六进制摘要
+            media_id: WordPress媒体ID
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (site, source_url, sha256, media_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (site, source_url, sha256, media_id, time.time())
+            )
+
+    def forget_media(self, site: str, media_id: int) -> None:
+        """删除某个媒体ID的全部记录（媒体已被删除或在站点上不存在时）"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM media WHERE site = ? AND media_id = ?", (site, media_id))
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def open_site_cache(config: Dict[str, Any]) -> Optional[SiteCache]:
+    """根据配置打开站点缓存
+
+    Args:
+        config: 配置字典，读取site_cache_path和site_cache_ttl字段
+
+    Returns:
+        SiteCache实例，site_cache_ttl为0或打开失败时返回None
+    """
+    ttl = float(config.get('site_cache_ttl', SITE_CACHE_TTL))
+    if ttl <= 0:
+        return None
+
+    path = config.get('site_cache_path') or SITE_CACHE_PATH
+    if not os.path.isabs(path):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, path)
+
+    try:
+        return SiteCache(path, ttl)
+    except Exception as e:
+        logger.warning(f"无法打开站点缓存 {path}: {str(e)}，将不使用本地缓存")
+        return None
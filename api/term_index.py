@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import html
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+
+def normalize_term_name(name: str) -> str:
+    """规范化分类/标签名称用于查找：反转义HTML实体、去除首尾空白并做大小写折叠"""
+    return html.unescape(name or '').strip().casefold()
+
+
+class TermIndex:
+    """分类/标签的哈希索引，支持按名称（大小写不敏感）和别名(slug)O(1)查找"""
+
+    def __init__(self, terms: Iterable[Dict[str, Any]] = ()):
+        """初始化索引
+
+        Args:
+            terms: WordPress返回的条目列表，每项至少包含id和name
+        """
+        self._by_id = {}
+        self._by_name = {}
+        self._by_slug = {}
+        self._lock = threading.Lock()
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: Dict[str, Any]) -> None:
+        """添加或更新一个条目
+
+        Args:
+            term: 包含id、name、slug的条目
+        """
+        term_id = term.get('id')
+        if not term_id:
+            return
+
+        with self._lock:
+            # 更新已有条目时先移除旧的名称和别名
+            old = self._by_id.get(term_id)
+            if old:
+                self._by_name.pop(normalize_term_name(old.get('name')), None)
+                if old.get('slug'):
+                    self._by_slug.pop(old.get('slug'), None)
+
+            self._by_id[term_id] = term
+            self._by_name[normalize_term_name(term.get('name'))] = term_id
+            if term.get('slug'):
+                self._by_slug[term.get('slug')] = term_id
+
+    def get_id(self, name: str) -> Optional[int]:
+        """按名称查找ID（大小写不敏感）"""
+        return self._by_name.get(normalize_term_name(name))
+
+    def get_id_by_slug(self, slug: str) -> Optional[int]:
+        """按别名(slug)查找ID"""
+        return self._by_slug.get(slug)
+
+    def terms(self) -> List[Dict[str, Any]]:
+        """返回所有条目"""
+        with self._lock:
+            return list(self._by_id.values())
+
+    def max_id(self) -> int:
+        """返回最大的条目ID（WordPress按创建顺序分配ID，即最新的条目），没有条目时返回0"""
+        with self._lock:
+            return max(self._by_id, default=0)
+
+    def __contains__(self, term_id: int) -> bool:
+        return term_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
@@ -1,19 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import requests
-import time
 import logging
-import io
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Union
 
-from config.api_config import WP_API_BASE_PATH
+from config.api_config import WP_TERMS_PER_PAGE, WP_TERMS_FETCH_WORKERS, MEDIA_CHUNK_SIZE
+from api.http_session import create_session, get_shared_session
+from api.term_index import TermIndex
+from api.media_stream import SpooledImage, check_image_headers, spool_image
+from api.wordpress_base import WordPressAPIBase
+from utils.image_encoder import get_max_image_bytes
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
 
 
-class WordPressAPI:
+class WordPressAPI(WordPressAPIBase):
     """WordPress API交互类"""
 
     def __init__(self, wp_url: str, wp_username: str, wp_password: str):
@@ -24,16 +28,17 @@ class WordPressAPI:
             wp_username: WordPress用户名
             wp_password: WordPress密码
         """
-        self.wp_url = wp_url
-        self.wp_username = wp_username
-        self.wp_password = wp_password
-        self.wp_api_url = f"{self.wp_url}{WP_API_BASE_PATH}"
-        self.session = requests.Session()
+        super().__init__(wp_url, wp_username, wp_password)
+        # WordPress会话单独携带认证信息，图片下载使用不带认证的共享会话
+        self.session = create_session()
         self.session.auth = (self.wp_username, self.wp_password)
+        self.download_session = get_shared_session()
         
-        # 缓存分类和标签数据
-        self._categories_cache = None
-        self._tags_cache = None
+        # 后台增量刷新线程
+        self._refresh_thread = None
+        self._refresh_stop = threading.Event()
+
+        self._media_capabilities_lock = threading.Lock()
 
     def validate_connection(self) -> bool:
         """验证WordPress API连接
@@ -57,118 +62,221 @@ class WordPressAPI:
             image_url: 图片URL
             
         Returns:
-            包含媒体ID的字典
+            包含媒体ID的字典，复用已上传的媒体时reused为True；新上传的媒体附带source_url和sha256，
+            文章创建成功后需交给remember_media()登记，之后才会被其他文章复用
         """
+        # 同一来源URL已上传过时直接复用，无需下载
+        media_id = self._find_cached_media(source_url=image_url)
+        if media_id and self._media_exists(media_id):
+            logger.info(f"复用已上传的特色图片，媒体ID: {media_id}")
+            return {'success': True, 'media_id': media_id, 'reused': True}
+
         try:
-            # 下载图片
-            image_response = requests.get(image_url)
-            image_response.raise_for_status()
-            
-            # 尝试将图片转换为WebP格式
-            webp_image, webp_success = self._convert_to_webp(image_response.content)
-            
-            if webp_success:
-                # 尝试上传WebP格式
-                result = self._perform_upload(webp_image, 'webp')
+            # 流式下载图片，超过大小上限或不是图片时提前中止
+            with self._download_image(image_url) as image:
+                # 内容相同的图片（不同URL）已上传过时直接复用，无需转换和上传
+                media_id = self._find_cached_media(sha256=image.sha256)
+                if media_id and self._media_exists(media_id):
+                    logger.info(f"复用内容相同的已上传图片，媒体ID: {media_id}")
+                    self._remember_media(image_url, image.sha256, media_id)
+                    return {'success': True, 'media_id': media_id, 'reused': True}
+
+                result = self._upload_image(image_url, image)
                 if result.get('success'):
-                    return result
-                else:
-                    logger.warning("WebP格式上传失败，尝试使用原始格式")
-            
-            # 如果WebP转换失败或上传失败，使用原始格式
-            # 从URL推断原始格式
-            original_extension = image_url.split('.')[-1].lower()
-            if original_extension not in ['jpg', 'jpeg', 'png', 'gif']:
-                original_extension = 'jpg'  # 默认假设为jpg
-                
-            return self._perform_upload(image_response.content, original_extension)
+                    result.update(source_url=image_url, sha256=image.sha256)
+                return result
 
         except Exception as e:
             logger.error(f"上传特色图片时出错: {str(e)}")
             return {'success': False, 'error': str(e)}
-    
-    def _convert_to_webp(self, image_data: bytes) -> Tuple[bytes, bool]:
-        """将图片转换为WebP格式
+
+    def _download_image(self, image_url: str) -> SpooledImage:
+        """分块下载图片到缓冲区，先检查响应头，读取过程中检查大小上限和文件头
+        
+        Args:
+            image_url: 图片URL
+            
+        Returns:
+            SpooledImage，使用完毕后需关闭
+        """
+        max_bytes = get_max_image_bytes()
+        with self.download_session.get(image_url, stream=True) as response:
+            response.raise_for_status()
+            check_image_headers(response.headers, max_bytes)
+            return spool_image(response.iter_content(MEDIA_CHUNK_SIZE), max_bytes)
+
+    def _upload_image(self, image_url: str, image: SpooledImage) -> Dict[str, Any]:
+        """缩小并重新编码图片后上传体积最小的版本，失败时回退到原始格式
         
         Args:
-            image_data: 原始图片数据
+            image_url: 图片URL（用于推断原始格式）
+            image: 已下载的图片
             
         Returns:
-            元组(WebP图片数据, 是否成功)
+            包含媒体ID的字典
         """
         try:
-            # 需要安装Pillow库: pip install Pillow
-            from PIL import Image
-            
-            # 从二进制数据创建图像对象
-            img = Image.open(io.BytesIO(image_data))
-            
-            # 转换为RGB模式（去除透明通道，如果有）
-            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                img = img.convert('RGBA')
-                background = Image.new('RGBA', img.size, (255, 255, 255))
-                img = Image.alpha_composite(background, img).convert('RGB')
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 保存为WebP格式
-            output = io.BytesIO()
-            img.save(output, format='WEBP', quality=85)
-            webp_data = output.getvalue()
+            # 按站点允许的格式和大小缩小并编码图片，选出体积最小的结果
+            capabilities = self.get_media_capabilities()
+            # 较大的图片已落盘，只把文件路径交给编码进程
+            source = image.source()
+            optimized_image, extension = self._optimize_image(
+                source, capabilities['extensions'], capabilities['max_upload_bytes'])
+            # 选中的就是原图时直接从缓冲区上传
+            keep_original = optimized_image is source
+            del source
             
-            logger.info("成功将图片转换为WebP格式")
-            return webp_data, True
+            result = None
+            if extension:
+                result = self._perform_upload(image if keep_original else optimized_image, extension)
+                if result.get('success') or keep_original:
+                    return result
+                if self._is_upload_type_rejected(result):
+                    self._reject_media_extension(extension)
             
+            # 如果图片处理失败或上传失败，使用原始格式（优先使用文件头识别的格式）；
+            # 站点不接受原始格式或大小时不再重复上传
+            original_extension = self._fallback_extension(image_url, image)
+            if original_extension is None:
+                return result or {'success': False, 'error': f"站点不接受该图片（{len(image)} 字节）"}
+
+            if result:
+                logger.warning(f"{extension}格式上传失败，尝试使用原始格式")
+            return self._perform_upload(image, original_extension)
+
+        except Exception as e:
+            logger.error(f"上传特色图片时出错: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def _media_exists(self, media_id: int) -> bool:
+        """确认缓存中的媒体仍存在于站点上（每个媒体ID每次运行只确认一次），已被删除时移除缓存记录
+
+        Args:
+            media_id: 缓存中的媒体ID
+
+        Returns:
+            媒体是否可以复用，无法确认时返回False（重新上传）
+        """
+        if media_id in self._verified_media:
+            return True
+        try:
+            response = self.session.get(f"{self.wp_api_url}/media/{media_id}", params={'_fields': 'id'})
+            return self._media_probe_result(media_id, response)
+        except Exception as e:
+            logger.warning(f"无法确认缓存的媒体 {media_id} 是否存在: {str(e)}，将重新上传")
+            return False
+
+    def delete_media(self, media_id: int) -> Dict[str, Any]:
+        """永久删除媒体文件（例如文章被放弃时刚上传的特色图片），同时删除本地缓存中的记录
+
+        Args:
+            media_id: 媒体ID
+
+        Returns:
+            包含success的结果字典
+        """
+        self._forget_media(media_id)
+        try:
+            response = self.session.delete(f"{self.wp_api_url}/media/{media_id}", params={'force': 'true'})
+            response.raise_for_status()
+            logger.info(f"已删除未使用的特色图片，媒体ID: {media_id}")
+            return {'success': True}
         except Exception as e:
-            logger.warning(f"转换图片为WebP格式失败: {str(e)}")
-            return image_data, False
+            logger.warning(f"删除媒体 {media_id} 失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
     
-    def _perform_upload(self, image_data: bytes, extension: str) -> Dict[str, Any]:
+    def get_media_capabilities(self) -> Dict[str, Any]:
+        """探测站点允许上传的图片扩展名和单个文件大小上限，结果在本进程和站点缓存中复用
+        
+        读取编辑器设置接口的allowedMimeTypes和maxUploadFileSize；站点不支持该接口时
+        不限制格式，之后根据上传被拒绝的结果逐步排除不支持的格式。
+        
+        Returns:
+            包含extensions（允许的扩展名列表，None表示未知）和max_upload_bytes（0表示未知）的字典
+        """
+        if self._media_capabilities is not None:
+            return self._media_capabilities
+
+        with self._media_capabilities_lock:
+            if self._media_capabilities is not None:
+                return self._media_capabilities
+
+            capabilities = self._cached_media_capabilities()
+            if capabilities is None:
+                try:
+                    response = self.session.get(self.wp_editor_settings_url,
+                                                params={'_fields': 'allowedMimeTypes,maxUploadFileSize'})
+                    response.raise_for_status()
+                    capabilities = self._parse_media_capabilities(response.json())
+                    logger.info(f"站点允许上传的图片格式: {capabilities['extensions']}，"
+                                f"单个文件上限: {capabilities['max_upload_bytes'] or '未知'} 字节")
+                except Exception as e:
+                    logger.info(f"无法获取站点媒体上传设置: {str(e)}，将根据上传结果自动判断")
+                    capabilities = {'extensions': None, 'max_upload_bytes': 0}
+                self._save_media_capabilities(capabilities)
+
+            self._media_capabilities = capabilities
+            return capabilities
+
+    def _perform_upload(self, image_data: Union[bytes, SpooledImage], extension: str) -> Dict[str, Any]:
         """执行媒体上传
         
         Args:
-            image_data: 图片二进制数据
+            image_data: 图片二进制数据，或从缓冲区分块发送的SpooledImage
             extension: 文件扩展名（不含点）
             
         Returns:
             包含上传结果的字典
         """
         try:
-            # 生成文件名
-            file_name = f"featured-image-{int(time.time())}.{extension}"
-            
-            # 设置Content-Type
-            content_type = f'image/{extension}'
-            if extension == 'jpg':
-                content_type = 'image/jpeg'
-                
-            # 上传到WordPress
-            headers = {
-                'Content-Disposition': f'attachment; filename="{file_name}"',
-                'Content-Type': content_type,
-            }
-
             upload_response = self.session.post(
                 f"{self.wp_api_url}/media",
                 data=image_data,
-                headers=headers
+                headers=self._upload_headers(extension)
             )
             upload_response.raise_for_status()
 
-            media_data = upload_response.json()
-            media_id = media_data.get('id')
+            return self._parse_upload_response(upload_response.json(), extension)
 
-            if media_id:
-                logger.info(f"成功上传特色图片（{extension}格式），媒体ID: {media_id}")
-                return {'success': True, 'media_id': media_id}
-            else:
-                logger.warning(f"上传特色图片（{extension}格式）失败，未获取到媒体ID")
-                return {'success': False, 'error': '未获取到媒体ID'}
-                
         except Exception as e:
             logger.error(f"上传媒体（{extension}格式）时出错: {str(e)}")
+            return self._upload_error(e)
+
+    def ensure_stylesheet(self, css: str, version: str) -> Dict[str, Any]:
+        """将共享样式表写入站点全局样式的自定义CSS，同一版本在站点缓存有效期内只注册一次
+        
+        需要WordPress 6.2+的区块主题和管理员权限；样式表位于起止标记之间，
+        再次注册时只替换这一段，不影响站点已有的自定义CSS。
+        
+        Args:
+            css: 共享样式表内容
+            version: 样式表版本号
+            
+        Returns:
+            结果字典，registered表示本次是否实际写入
+        """
+        if self._stylesheet_registered(version):
+            return {'success': True, 'registered': False}
+
+        try:
+            response = self.session.get(f"{self.wp_api_url}/themes", params={'status': 'active'})
+            response.raise_for_status()
+            styles_url = self._global_styles_url(response.json())
+            if not styles_url:
+                return {'success': False, 'error': "当前主题不支持全局样式（需要WordPress 6.2+的区块主题）"}
+
+            response = self.session.get(styles_url, params={'context': 'edit'})
+            response.raise_for_status()
+            styles = self._styles_with_stylesheet(response.json(), css, version)
+
+            response = self.session.post(styles_url, json={'styles': styles})
+            response.raise_for_status()
+        except Exception as e:
             return {'success': False, 'error': str(e)}
 
+        self._mark_stylesheet_registered(version)
+        return {'success': True, 'registered': True}
+
     def publish_post(self, title: str, content: str, categories: list = None, 
                      tags: list = None, featured_media_id: Optional[int] = None) -> Dict[str, Any]:
         """发布文章到WordPress
@@ -184,77 +292,170 @@ class WordPressAPI:
             包含发布状态的字典
         """
         try:
-            post_data = {
-                'title': title,
-                'content': content,
-                'status': 'publish',
-            }
-
-            # 添加特色图片
-            if featured_media_id:
-                post_data['featured_media'] = featured_media_id
-
-            # 添加分类和标签
-            if categories:
-                post_data['categories'] = categories
-            if tags:
-                post_data['tags'] = tags
+            post_data = self._build_post_data(title, content, categories, tags, featured_media_id)
 
             response = self.session.post(f"{self.wp_api_url}/posts", json=post_data)
             response.raise_for_status()
 
-            post_data = response.json()
-            post_id = post_data.get('id')
-            post_link = post_data.get('link')
-
-            if post_id:
-                logger.info(f"成功发布文章，ID: {post_id}, 链接: {post_link}")
-                return {'success': True, 'post_id': post_id, 'post_link': post_link}
-            else:
-                logger.warning("发布文章失败，未获取到文章ID")
-                return {'success': False, 'error': '未获取到文章ID'}
+            return self._parse_post_response(response.json())
 
         except Exception as e:
             logger.error(f"发布文章时出错: {str(e)}")
             return {'success': False, 'error': str(e)}
 
-    def get_categories(self) -> List[Dict[str, Any]]:
-        """获取所有分类
+    def publish_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量发布多篇文章，站点支持时通过批量接口分组提交
+        
+        Args:
+            posts: 文章列表，每项包含title, content, categories, tags, featured_media_id
+            
+        Returns:
+            与输入顺序一致的发布结果列表
+        """
+        if not posts:
+            return []
+
+        responses = self.batch_request(self._post_create_requests(posts))
+
+        # 站点不支持批量接口时，逐篇发布
+        if responses is None:
+            return [self.publish_post(**post) for post in posts]
+
+        return self._parse_post_responses(responses)
+
+    def get_batch_limit(self) -> int:
+        """探测站点批量接口支持情况及单次最大请求数
         
         Returns:
-            分类列表，每个分类包含id, name等信息
+            单次批量请求的最大子请求数，不支持批量接口时返回0
         """
-        if self._categories_cache is not None:
-            return self._categories_cache
-            
+        if self._batch_limit is not None:
+            return self._batch_limit
+
+        cached_limit = self._cached_batch_limit()
+        if cached_limit is not None:
+            self._batch_limit = cached_limit
+            return self._batch_limit
+
         try:
-            response = self.session.get(f"{self.wp_api_url}/categories", params={"per_page": 100})
+            response = self.session.options(self.wp_batch_url)
             response.raise_for_status()
-            self._categories_cache = response.json()
-            logger.info(f"成功获取分类列表，共 {len(self._categories_cache)} 个")
-            return self._categories_cache
+            self._batch_limit = self._parse_batch_limit(response.json())
+            logger.info(f"站点支持批量接口，单次最多 {self._batch_limit} 个请求")
         except Exception as e:
-            logger.error(f"获取分类列表失败: {str(e)}")
-            return []
+            logger.info(f"站点不支持批量接口，将逐个发送请求: {str(e)}")
+            self._batch_limit = 0
+
+        self._save_meta('batch_limit', self._batch_limit)
+        return self._batch_limit
+
+    def batch_request(self, sub_requests: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """通过 /wp-json/batch/v1 批量发送请求，超出站点上限时自动分组
+        
+        Args:
+            sub_requests: 子请求列表，每项包含method, path(如 /wp/v2/posts), body
+            
+        Returns:
+            与输入顺序一致的响应列表（每项包含status, body），站点不支持批量接口时返回None
+        """
+        limit = self.get_batch_limit()
+        if not limit:
+            return None
+
+        responses = []
+        for start in range(0, len(sub_requests), limit):
+            group = sub_requests[start:start + limit]
+            try:
+                response = self.session.post(
+                    self.wp_batch_url,
+                    json={'validation': 'normal', 'requests': group}
+                )
+                if response.status_code == 404 and not responses:
+                    # 旧版本WordPress没有批量接口
+                    logger.info("站点不支持批量接口，将逐个发送请求")
+                    self._batch_limit = 0
+                    return None
+                response.raise_for_status()
+                group_responses = response.json().get('responses', [])
+            except Exception as e:
+                logger.error(f"批量请求失败: {str(e)}")
+                group_responses = []
+
+            responses.extend(self._batch_group_responses(group, group_responses))
+
+        return responses
+
+    def get_categories(self) -> List[Dict[str, Any]]:
+        """获取所有分类
+        
+        Returns:
+            分类列表，每个分类包含id, name, slug信息
+        """
+        return self._get_category_index().terms()
     
     def get_tags(self) -> List[Dict[str, Any]]:
         """获取所有标签
         
         Returns:
-            标签列表，每个标签包含id, name等信息
+            标签列表，每个标签包含id, name, slug信息
         """
+        return self._get_tag_index().terms()
+
+    def _get_category_index(self) -> TermIndex:
+        """获取分类索引，首次调用时分页拉取全部分类"""
+        if self._categories_cache is not None:
+            return self._categories_cache
+
+        try:
+            self._categories_cache = TermIndex(self._fetch_all_terms('categories'))
+            logger.info(f"成功获取分类列表，共 {len(self._categories_cache)} 个")
+            return self._categories_cache
+        except Exception as e:
+            logger.error(f"获取分类列表失败: {str(e)}")
+            return TermIndex()
+
+    def _get_tag_index(self) -> TermIndex:
+        """获取标签索引，首次调用时分页拉取全部标签"""
         if self._tags_cache is not None:
             return self._tags_cache
-            
+
         try:
-            response = self.session.get(f"{self.wp_api_url}/tags", params={"per_page": 100})
-            response.raise_for_status()
-            self._tags_cache = response.json()
+            self._tags_cache = TermIndex(self._fetch_all_terms('tags'))
             logger.info(f"成功获取标签列表，共 {len(self._tags_cache)} 个")
             return self._tags_cache
         except Exception as e:
             logger.error(f"获取标签列表失败: {str(e)}")
-            return []
+            return TermIndex()
+
+    def _fetch_all_terms(self, taxonomy: str) -> List[Dict[str, Any]]:
+        """分页拉取某个分类法的全部条目
+        
+        先请求第一页以获取 X-WP-TotalPages，其余页面并发请求。
+        
+        Args:
+            taxonomy: categories 或 tags
+            
+        Returns:
+            全部条目列表（只包含id, name, slug字段）
+        """
+        url = f"{self.wp_api_url}/{taxonomy}"
+
+        def fetch_page(page: int):
+            response = self.session.get(url, params=self._terms_page_params(page))
+            response.raise_for_status()
+            return response
+
+        first_page = fetch_page(1)
+        terms = first_page.json()
+        total_pages = int(first_page.headers.get('X-WP-TotalPages', 1) or 1)
+
+        if total_pages > 1:
+            workers = min(WP_TERMS_FETCH_WORKERS, total_pages - 1)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fetch-{taxonomy}") as executor:
+                for response in executor.map(fetch_page, range(2, total_pages + 1)):
+                    terms.extend(response.json())
+
+        return terms
     
     def get_category_id_by_name(self, name: str) -> Optional[int]:
         """根据分类名称获取ID
@@ -265,11 +466,7 @@ class WordPressAPI:
         Returns:
             分类ID，如果未找到返回None
         """
-        categories = self.get_categories()
-        for category in categories:
-            if category.get('name').lower() == name.lower():
-                return category.get('id')
-        return None
+        return self._get_category_index().get_id(name)
     
     def get_tag_id_by_name(self, name: str) -> Optional[int]:
         """根据标签名称获取ID
@@ -280,11 +477,7 @@ class WordPressAPI:
         Returns:
             标签ID，如果未找到返回None
         """
-        tags = self.get_tags()
-        for tag in tags:
-            if tag.get('name').lower() == name.lower():
-                return tag.get('id')
-        return None
+        return self._get_tag_index().get_id(name)
     
     def create_category_if_not_exists(self, name: str) -> int:
         """创建分类，如果不存在
@@ -310,8 +503,8 @@ class WordPressAPI:
             new_category = response.json()
             logger.info(f"成功创建分类 '{name}'，ID: {new_category.get('id')}")
             
-            # 刷新缓存
-            self._categories_cache = None
+            # 将新分类直接写入缓存索引，无需重新拉取
+            self._cache_term('categories', new_category)
             
             return new_category.get('id')
         except Exception as e:
@@ -342,10 +535,145 @@ class WordPressAPI:
             new_tag = response.json()
             logger.info(f"成功创建标签 '{name}'，ID: {new_tag.get('id')}")
             
-            # 刷新缓存
-            self._tags_cache = None
+            # 将新标签直接写入缓存索引，无需重新拉取
+            self._cache_term('tags', new_tag)
             
             return new_tag.get('id')
         except Exception as e:
             logger.error(f"创建标签 '{name}' 失败: {str(e)}")
             return None
+
+    def create_categories(self, names: List[str]) -> Dict[str, int]:
+        """批量创建不存在的分类
+        
+        Args:
+            names: 分类名称列表
+            
+        Returns:
+            分类名称到ID的映射
+        """
+        return self._create_terms('categories', names, self.get_category_id_by_name,
+                                  self.create_category_if_not_exists)
+
+    def create_tags(self, names: List[str]) -> Dict[str, int]:
+        """批量创建不存在的标签
+        
+        Args:
+            names: 标签名称列表
+            
+        Returns:
+            标签名称到ID的映射
+        """
+        return self._create_terms('tags', names, self.get_tag_id_by_name,
+                                  self.create_tag_if_not_exists)
+
+    def _create_terms(self, taxonomy: str, names: List[str], get_id_by_name, create_one) -> Dict[str, int]:
+        """批量创建分类法条目，站点不支持批量接口时逐个创建
+        
+        Args:
+            taxonomy: categories 或 tags
+            names: 名称列表
+            get_id_by_name: 按名称查询ID的方法
+            create_one: 逐个创建的方法
+            
+        Returns:
+            名称到ID的映射，创建失败的名称不在结果中
+        """
+        term_ids, missing = self._split_known_terms(names, get_id_by_name)
+        if not missing:
+            return term_ids
+
+        responses = self.batch_request(self._term_create_requests(taxonomy, missing))
+
+        if responses is None:
+            for name in missing:
+                term_id = create_one(name)
+                if term_id:
+                    term_ids[name] = term_id
+            return term_ids
+
+        return self._apply_term_responses(taxonomy, missing, responses, term_ids)
+
+    def refresh_term_caches(self) -> None:
+        """增量刷新已加载的分类和标签缓存
+        
+        WordPress的分类法接口不支持modified_after，这里先按ID倒序只请求一条做廉价探测，
+        比较最新条目的ID和X-WP-Total：都未变化时直接返回；有新条目时按ID倒序只拉取新条目；
+        拉取后总数仍不一致（有删除）时才完整重新拉取。全部刷新成功后才写回本地站点缓存。
+        """
+        refreshed = True
+        for taxonomy in ('categories', 'tags'):
+            index = self._term_index(taxonomy)
+            if index is None:
+                continue
+            try:
+                self._refresh_term_index(taxonomy, index)
+            except Exception as e:
+                refreshed = False
+                logger.warning(f"刷新{self._taxonomy_label(taxonomy)}缓存失败: {str(e)}")
+
+        # 只有确认与站点一致后才写回快照（同时刷新有效期），刷新失败时保留原快照按期过期
+        if refreshed:
+            self.save_site_cache()
+
+    def _refresh_term_index(self, taxonomy: str, index: TermIndex) -> None:
+        """增量刷新单个分类法的缓存索引"""
+        url = f"{self.wp_api_url}/{taxonomy}"
+        label = self._taxonomy_label(taxonomy)
+
+        # 按ID倒序探测：只比较总数会漏掉两次刷新之间"删除一个、新增一个"的情况，
+        # 按名称排序的第一条也不能反映新增，因此同时比较最新条目的ID
+        probe = self.session.get(url, params=self._term_probe_params())
+        probe.raise_for_status()
+        newest_id, total = self._parse_term_probe(probe.json(), probe.headers, index)
+        known_newest_id = index.max_id()
+        if total == len(index) and newest_id == known_newest_id:
+            return
+
+        # 新条目的ID最大，按ID倒序拉取直到遇到已缓存的最新条目
+        added = 0
+        page = 1
+        while newest_id > known_newest_id:
+            response = self.session.get(url, params=self._terms_page_params(page, newest_first=True))
+            response.raise_for_status()
+            terms = response.json()
+            page_added, known_reached = self._absorb_new_terms(index, terms, known_newest_id)
+            added += page_added
+            if known_reached or len(terms) < WP_TERMS_PER_PAGE:
+                break
+            page += 1
+
+        if len(index) != total:
+            # 有条目被删除，完整重新拉取
+            new_index = TermIndex(self._fetch_all_terms(taxonomy))
+            self._set_term_index(taxonomy, new_index)
+            logger.info(f"{label}缓存已完整刷新，共 {len(new_index)} 个")
+            return
+
+        logger.info(f"{label}缓存增量更新 {added} 个，共 {len(index)} 个")
+
+    def start_background_refresh(self, interval_seconds: float) -> None:
+        """启动后台线程，定期增量刷新分类和标签缓存
+        
+        Args:
+            interval_seconds: 刷新间隔（秒）
+        """
+        if self._refresh_thread is not None or interval_seconds <= 0:
+            return
+
+        def refresh_loop():
+            while not self._refresh_stop.wait(interval_seconds):
+                self.refresh_term_caches()
+
+        self._refresh_thread = threading.Thread(target=refresh_loop, name="term-cache-refresh", daemon=True)
+        self._refresh_thread.start()
+        logger.info(f"已启动分类标签缓存后台刷新，间隔 {interval_seconds} 秒")
+
+    def stop_background_refresh(self) -> None:
+        """停止后台刷新线程"""
+        if self._refresh_thread is None:
+            return
+        self._refresh_stop.set()
+        self._refresh_thread.join()
+        self._refresh_thread = None
+        self._refresh_stop.clear()
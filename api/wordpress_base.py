@@ -0,0 +1,532 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import time
+import json
+import logging
+from typing import Dict, Any, Optional, Tuple, List, Union
+
+from config.api_config import (
+    WP_API_BASE_PATH, WP_BATCH_PATH, WP_BATCH_DEFAULT_LIMIT, WP_TERMS_PER_PAGE, WP_EDITOR_SETTINGS_PATH,
+    WP_UPLOAD_EXTENSIONS, WP_UPLOAD_REJECTED_CODES, WP_STYLESHEET_MARKER
+)
+from api.term_index import TermIndex
+from api.media_stream import SpooledImage, image_content_type
+from utils.image_encoder import optimize_image
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class WordPressAPIBase:
+    """WordPressAPI与AsyncWordPressAPI共用的状态和逻辑
+
+    这里只放不涉及网络请求的部分：站点缓存读写、媒体去重记录、分类标签索引维护、
+    请求体构建和响应解析。子类只负责以同步或异步方式发送请求，修复在两条路径上同时生效。
+    """
+
+    def __init__(self, wp_url: str, wp_username: str, wp_password: str):
+        """初始化共用状态
+
+        Args:
+            wp_url: WordPress站点URL
+            wp_username: WordPress用户名
+            wp_password: WordPress密码
+        """
+        self.wp_url = wp_url
+        self.wp_username = wp_username
+        self.wp_password = wp_password
+        self.wp_api_url = f"{self.wp_url}{WP_API_BASE_PATH}"
+        # 批量接口地址，以及子请求使用的路由前缀（去掉 /wp-json）
+        self.wp_batch_url = f"{self.wp_url}{WP_BATCH_PATH}"
+        self.wp_route_prefix = WP_API_BASE_PATH.replace('/wp-json', '', 1)
+        self.wp_editor_settings_url = f"{self.wp_url}{WP_EDITOR_SETTINGS_PATH}"
+
+        # 缓存分类和标签数据（TermIndex，按名称和别名建立哈希索引）
+        self._categories_cache = None
+        self._tags_cache = None
+
+        # 批量接口单次最大请求数，None表示尚未探测，0表示不支持
+        self._batch_limit = None
+
+        # 站点允许上传的图片扩展名和大小上限，None表示尚未探测
+        self._media_capabilities = None
+
+        # 本地站点缓存（SiteCache），由attach_site_cache()设置
+        self._site_cache = None
+        self._site_key = None
+        # 本次运行中已确认仍存在于站点上的缓存媒体ID
+        self._verified_media = set()
+
+    # ---- 分类标签索引 ----
+
+    def _term_index(self, taxonomy: str) -> Optional[TermIndex]:
+        """返回已加载的分类或标签索引，尚未加载时返回None"""
+        return self._categories_cache if taxonomy == 'categories' else self._tags_cache
+
+    def _set_term_index(self, taxonomy: str, index: TermIndex) -> None:
+        """替换分类或标签索引"""
+        if taxonomy == 'categories':
+            self._categories_cache = index
+        else:
+            self._tags_cache = index
+
+    @staticmethod
+    def _taxonomy_label(taxonomy: str) -> str:
+        """分类法的中文名称，用于日志"""
+        return '分类' if taxonomy == 'categories' else '标签'
+
+    def _cache_term(self, taxonomy: str, term: Dict[str, Any]) -> None:
+        """将新建的条目增量写入已加载的缓存索引
+
+        Args:
+            taxonomy: categories 或 tags
+            term: 包含id、name、slug的条目
+        """
+        index = self._term_index(taxonomy)
+        if index is not None:
+            index.add({'id': term.get('id'), 'name': term.get('name'), 'slug': term.get('slug')})
+
+    @staticmethod
+    def _split_known_terms(names: List[str], get_id_by_name) -> Tuple[Dict[str, int], List[str]]:
+        """将名称分为已存在的条目和需要创建的条目
+
+        Args:
+            names: 名称列表
+            get_id_by_name: 按名称查询ID的方法
+
+        Returns:
+            (名称到ID的映射, 去重后待创建的名称列表)
+        """
+        term_ids = {}
+        missing = []
+        for name in names:
+            term_id = get_id_by_name(name)
+            if term_id:
+                term_ids[name] = term_id
+            elif name not in missing:
+                missing.append(name)
+        return term_ids, missing
+
+    def _term_create_requests(self, taxonomy: str, names: List[str]) -> List[Dict[str, Any]]:
+        """构建批量创建条目的子请求"""
+        return [{'method': 'POST', 'path': f"{self.wp_route_prefix}/{taxonomy}", 'body': {'name': name}}
+                for name in names]
+
+    def _apply_term_responses(self, taxonomy: str, names: List[str], responses: List[Dict[str, Any]],
+                              term_ids: Dict[str, int]) -> Dict[str, int]:
+        """将批量创建条目的子响应写入索引和名称映射
+
+        Args:
+            taxonomy: categories 或 tags
+            names: 待创建的名称列表，与responses一一对应
+            responses: batch_request返回的子响应
+            term_ids: 名称到ID的映射，原地更新
+
+        Returns:
+            更新后的名称到ID映射，创建失败的名称不在结果中
+        """
+        label = self._taxonomy_label(taxonomy)
+        for name, response in zip(names, responses):
+            body = response.get('body') or {}
+            if 200 <= response.get('status', 0) < 300 and body.get('id'):
+                term_ids[name] = body.get('id')
+                self._cache_term(taxonomy, body)
+                logger.info(f"成功创建{label} '{name}'，ID: {body.get('id')}")
+            elif body.get('code') == 'term_exists' and (body.get('data') or {}).get('term_id'):
+                # 并发创建或缓存未覆盖到的已有条目
+                term_ids[name] = body['data']['term_id']
+                self._cache_term(taxonomy, {'id': term_ids[name], 'name': name})
+            else:
+                logger.error(f"创建{label} '{name}' 失败: {body.get('message', response.get('status'))}")
+        return term_ids
+
+    @staticmethod
+    def _terms_page_params(page: int, newest_first: bool = False) -> Dict[str, Any]:
+        """分页拉取条目的查询参数，增量刷新时按ID倒序"""
+        params = {'per_page': WP_TERMS_PER_PAGE, 'page': page, 'orderby': 'id', '_fields': 'id,name,slug'}
+        if newest_first:
+            params['order'] = 'desc'
+        return params
+
+    @staticmethod
+    def _term_probe_params() -> Dict[str, Any]:
+        """增量刷新前的廉价探测：按ID倒序只请求一条"""
+        return {'per_page': 1, 'orderby': 'id', 'order': 'desc', '_fields': 'id'}
+
+    @staticmethod
+    def _parse_term_probe(newest: List[Dict[str, Any]], headers, index: TermIndex) -> Tuple[int, int]:
+        """解析探测结果
+
+        Returns:
+            (站点上最新条目的ID, 站点上的条目总数)
+        """
+        newest_id = newest[0].get('id', 0) if newest else 0
+        total = int(headers.get('X-WP-Total', len(index)) or 0)
+        return newest_id, total
+
+    @staticmethod
+    def _absorb_new_terms(index: TermIndex, terms: List[Dict[str, Any]], known_newest_id: int) -> Tuple[int, bool]:
+        """将按ID倒序拉取的一页条目中比已缓存最新条目更新的部分写入索引
+
+        Returns:
+            (新增条目数, 是否已遇到已缓存的条目)
+        """
+        added = 0
+        for term in terms:
+            if term.get('id', 0) <= known_newest_id:
+                return added, True
+            index.add(term)
+            added += 1
+        return added, False
+
+    # ---- 本地站点缓存 ----
+
+    def attach_site_cache(self, site_cache) -> bool:
+        """使用本地站点缓存，有效期内的分类标签快照直接载入内存索引
+
+        Args:
+            site_cache: SiteCache实例
+
+        Returns:
+            分类和标签快照是否都已从缓存载入（热启动）
+        """
+        self._site_cache = site_cache
+        self._site_key = site_cache.site_key(self.wp_url)
+
+        warm = True
+        for taxonomy in ('categories', 'tags'):
+            terms = site_cache.load_terms(self._site_key, taxonomy)
+            if terms is None:
+                warm = False
+                continue
+            index = TermIndex(terms)
+            self._set_term_index(taxonomy, index)
+            logger.info(f"从本地缓存载入{self._taxonomy_label(taxonomy)} {len(index)} 个")
+
+        return warm
+
+    def save_site_cache(self) -> None:
+        """将已加载的分类标签索引写入本地站点缓存"""
+        if self._site_cache is None:
+            return
+
+        for taxonomy in ('categories', 'tags'):
+            index = self._term_index(taxonomy)
+            if index is None:
+                continue
+            try:
+                self._site_cache.save_terms(self._site_key, taxonomy, index.terms())
+            except Exception as e:
+                logger.warning(f"写入站点缓存失败: {str(e)}")
+
+    def _cached_meta(self, key: str) -> Optional[str]:
+        """读取站点缓存中的元数据，未启用缓存时返回None"""
+        if self._site_cache is None:
+            return None
+        return self._site_cache.get_meta(self._site_key, key)
+
+    def _save_meta(self, key: str, value: Any) -> None:
+        """将元数据写入站点缓存"""
+        if self._site_cache is None:
+            return
+        try:
+            self._site_cache.set_meta(self._site_key, key, value)
+        except Exception as e:
+            logger.warning(f"写入站点缓存失败: {str(e)}")
+
+    # ---- 媒体去重记录 ----
+
+    def _find_cached_media(self, source_url: Optional[str] = None, sha256: Optional[str] = None) -> Optional[int]:
+        """在本地站点缓存中按来源URL或内容摘要查找已上传的媒体ID"""
+        if self._site_cache is None:
+            return None
+        try:
+            if source_url:
+                return self._site_cache.get_media_by_url(self._site_key, source_url)
+            return self._site_cache.get_media_by_hash(self._site_key, sha256)
+        except Exception as e:
+            logger.warning(f"查询媒体缓存失败: {str(e)}")
+            return None
+
+    def remember_media(self, media: Optional[Dict[str, Any]]) -> None:
+        """文章创建成功后登记本次新上传的特色图片，之后其他文章才能复用
+
+        新上传的媒体在文章创建前不进入去重缓存：否则并发处理的另一篇文章可能复用它，
+        而第一篇文章被放弃时会删除该媒体，另一篇文章就会引用无效的featured_media。
+
+        Args:
+            media: upload_media()的结果，复用已有媒体或上传失败时不做任何处理
+        """
+        if not media or not media.get('success') or media.get('reused') or not media.get('source_url'):
+            return
+        self._remember_media(media['source_url'], media['sha256'], media['media_id'])
+
+    def _remember_media(self, source_url: str, sha256: str, media_id: int) -> None:
+        """将来源URL、内容摘要与媒体ID写入本地站点缓存"""
+        self._verified_media.add(media_id)
+        if self._site_cache is None:
+            return
+        try:
+            self._site_cache.save_media(self._site_key, source_url, sha256, media_id)
+        except Exception as e:
+            logger.warning(f"写入媒体缓存失败: {str(e)}")
+
+    def _media_probe_result(self, media_id: int, response) -> bool:
+        """根据 GET /media/{id} 的响应判断缓存的媒体能否复用，已被删除时移除缓存记录
+
+        Args:
+            media_id: 缓存中的媒体ID
+            response: requests或httpx的响应
+
+        Returns:
+            媒体是否仍存在，其他错误状态抛出异常
+        """
+        if response.status_code in (404, 410):
+            logger.info(f"缓存的媒体 {media_id} 已从站点删除，将重新上传")
+            self._forget_media(media_id)
+            return False
+        response.raise_for_status()
+        self._verified_media.add(media_id)
+        return True
+
+    def _forget_media(self, media_id: int) -> None:
+        """从本地站点缓存中删除媒体ID的记录"""
+        self._verified_media.discard(media_id)
+        if self._site_cache is None:
+            return
+        try:
+            self._site_cache.forget_media(self._site_key, media_id)
+        except Exception as e:
+            logger.warning(f"删除媒体缓存记录失败: {str(e)}")
+
+    # ---- 媒体上传能力 ----
+
+    def _cached_media_capabilities(self) -> Optional[Dict[str, Any]]:
+        """从站点缓存读取媒体上传能力，没有记录时返回None"""
+        cached = self._cached_meta('media_capabilities')
+        return json.loads(cached) if cached else None
+
+    @staticmethod
+    def _parse_media_capabilities(settings: Dict[str, Any]) -> Dict[str, Any]:
+        """从编辑器设置中解析允许的图片扩展名和上传大小上限
+
+        Args:
+            settings: 编辑器设置接口返回的数据
+
+        Returns:
+            包含extensions和max_upload_bytes的字典
+        """
+        mime_types = settings.get('allowedMimeTypes')
+        extensions = None
+        if isinstance(mime_types, dict):
+            # 键为以|分隔的扩展名，例如 "jpg|jpeg|jpe": "image/jpeg"
+            allowed = {extension for pattern in mime_types for extension in pattern.lower().split('|')}
+            extensions = [extension for extension in WP_UPLOAD_EXTENSIONS if extension in allowed]
+        return {'extensions': extensions, 'max_upload_bytes': int(settings.get('maxUploadFileSize') or 0)}
+
+    @staticmethod
+    def _is_upload_type_rejected(result: Dict[str, Any]) -> bool:
+        """判断上传失败是否因为站点不接受该文件类型"""
+        return result.get('status') == 415 or result.get('code') in WP_UPLOAD_REJECTED_CODES
+
+    def _reject_media_extension(self, extension: str) -> None:
+        """记录站点不接受的图片格式，之后不再尝试上传该格式"""
+        capabilities = dict(self._media_capabilities or {'extensions': None, 'max_upload_bytes': 0})
+        extensions = capabilities['extensions'] if capabilities['extensions'] is not None else WP_UPLOAD_EXTENSIONS
+        capabilities['extensions'] = [allowed for allowed in extensions if allowed != extension]
+        self._media_capabilities = capabilities
+        self._save_media_capabilities(capabilities)
+        logger.warning(f"站点不接受{extension}格式的图片，之后将不再使用该格式")
+
+    def _save_media_capabilities(self, capabilities: Dict[str, Any]) -> None:
+        """将媒体上传能力写入本地站点缓存"""
+        self._save_meta('media_capabilities', json.dumps(capabilities))
+
+    def _fallback_extension(self, image_url: str, image: SpooledImage) -> Optional[str]:
+        """转换后的图片上传失败时使用的原始格式，站点不接受原图的格式或大小时返回None
+
+        Args:
+            image_url: 图片URL（用于推断原始格式）
+            image: 已下载的图片
+
+        Returns:
+            原始格式的扩展名（优先使用文件头识别的格式）
+        """
+        original_extension = image.extension or image_url.split('.')[-1].lower()
+        if original_extension not in WP_UPLOAD_EXTENSIONS:
+            original_extension = 'jpg'  # 默认假设为jpg
+
+        capabilities = self._media_capabilities or {'extensions': None, 'max_upload_bytes': 0}
+        if (capabilities['extensions'] is not None and original_extension not in capabilities['extensions']) \
+                or (capabilities['max_upload_bytes'] and len(image) > capabilities['max_upload_bytes']):
+            return None
+        return original_extension
+
+    @staticmethod
+    def _optimize_image(source: Union[bytes, str], allowed_extensions: Optional[List[str]] = None,
+                        max_upload_bytes: int = 0) -> Tuple[Union[bytes, str], Optional[str]]:
+        """缩小并重新编码图片，编码在图片编码进程池中执行
+
+        Args:
+            source: 原始图片数据，或已落盘图片的文件路径
+            allowed_extensions: 站点允许上传的扩展名，None表示不限制
+            max_upload_bytes: 站点单个文件上传上限，0表示不限制
+
+        Returns:
+            元组(图片数据, 文件扩展名)，处理失败时扩展名为None
+        """
+        return optimize_image(source, allowed_extensions, max_upload_bytes)
+
+    @staticmethod
+    def _upload_headers(extension: str) -> Dict[str, str]:
+        """生成上传媒体的请求头（文件名和Content-Type）"""
+        file_name = f"featured-image-{int(time.time())}.{extension}"
+        return {
+            'Content-Disposition': f'attachment; filename="{file_name}"',
+            'Content-Type': image_content_type(extension),
+        }
+
+    @staticmethod
+    def _parse_upload_response(media_data: Dict[str, Any], extension: str) -> Dict[str, Any]:
+        """解析上传媒体的响应"""
+        media_id = media_data.get('id')
+        if media_id:
+            logger.info(f"成功上传特色图片（{extension}格式），媒体ID: {media_id}")
+            return {'success': True, 'media_id': media_id}
+        logger.warning(f"上传特色图片（{extension}格式）失败，未获取到媒体ID")
+        return {'success': False, 'error': '未获取到媒体ID'}
+
+    @staticmethod
+    def _upload_error(error: Exception) -> Dict[str, Any]:
+        """生成上传失败结果，附带HTTP状态码和WordPress错误码（如果有）"""
+        result = {'success': False, 'error': str(error)}
+        response = getattr(error, 'response', None)
+        if response is not None:
+            result['status'] = response.status_code
+            try:
+                result['code'] = response.json().get('code')
+            except Exception:
+                pass
+        return result
+
+    # ---- 共享样式表 ----
+
+    def _stylesheet_registered(self, version: str) -> bool:
+        """同一版本的共享样式表是否已在站点缓存有效期内注册过"""
+        return self._cached_meta('stylesheet_version') == version
+
+    def _mark_stylesheet_registered(self, version: str) -> None:
+        """记录已注册的共享样式表版本"""
+        self._save_meta('stylesheet_version', version)
+        logger.info(f"已将共享样式表（版本 {version}）写入站点全局样式")
+
+    @staticmethod
+    def _global_styles_url(themes: List[Dict[str, Any]]) -> Optional[str]:
+        """从当前主题信息中取出用户全局样式的接口地址，主题不支持时返回None"""
+        if not themes:
+            return None
+        links = (themes[0].get('_links') or {}).get('wp:user-global-styles') or []
+        return links[0].get('href') if links else None
+
+    @classmethod
+    def _styles_with_stylesheet(cls, global_styles: Dict[str, Any], css: str, version: str) -> Dict[str, Any]:
+        """将共享样式表合并到全局样式的自定义CSS中，返回待写回的styles"""
+        styles = global_styles.get('styles')
+        styles = styles if isinstance(styles, dict) else {}
+        styles['css'] = cls._merge_stylesheet(styles.get('css') or '', css, version)
+        return styles
+
+    @staticmethod
+    def _merge_stylesheet(existing_css: str, css: str, version: str) -> str:
+        """将共享样式表放入站点自定义CSS的标记段中，替换旧版本"""
+        block = (f"/* {WP_STYLESHEET_MARKER} start {version} */\n{css.strip()}\n"
+                 f"/* {WP_STYLESHEET_MARKER} end */")
+        pattern = re.compile(re.escape(f"/* {WP_STYLESHEET_MARKER} start") + r'.*?' +
+                             re.escape(f"/* {WP_STYLESHEET_MARKER} end */"), re.DOTALL)
+        if pattern.search(existing_css):
+            return pattern.sub(lambda _: block, existing_css, count=1)
+        return f"{existing_css.rstrip()}\n\n{block}\n" if existing_css.strip() else block + "\n"
+
+    # ---- 批量接口与文章 ----
+
+    def _cached_batch_limit(self) -> Optional[int]:
+        """从站点缓存读取批量接口上限，没有记录时返回None"""
+        cached_limit = self._cached_meta('batch_limit')
+        return int(cached_limit) if cached_limit is not None else None
+
+    @staticmethod
+    def _parse_batch_limit(options: Dict[str, Any]) -> int:
+        """从批量接口的OPTIONS响应中解析单次最大请求数"""
+        endpoints = options.get('endpoints', [])
+        max_items = endpoints[0].get('args', {}).get('requests', {}).get('maxItems') if endpoints else None
+        return int(max_items or WP_BATCH_DEFAULT_LIMIT)
+
+    @staticmethod
+    def _batch_group_responses(group: List[Dict[str, Any]],
+                               group_responses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按位置将子响应对应回子请求，缺失的视为失败"""
+        responses = []
+        for i in range(len(group)):
+            if i < len(group_responses):
+                responses.append({
+                    'status': group_responses[i].get('status', 0),
+                    'body': group_responses[i].get('body')
+                })
+            else:
+                responses.append({'status': 0, 'body': {'message': '批量请求失败'}})
+        return responses
+
+    @staticmethod
+    def _build_post_data(title: str, content: str, categories: list = None,
+                         tags: list = None, featured_media_id: Optional[int] = None) -> Dict[str, Any]:
+        """构建文章请求体"""
+        post_data = {
+            'title': title,
+            'content': content,
+            'status': 'publish',
+        }
+
+        # 添加特色图片
+        if featured_media_id:
+            post_data['featured_media'] = featured_media_id
+
+        # 添加分类和标签
+        if categories:
+            post_data['categories'] = categories
+        if tags:
+            post_data['tags'] = tags
+
+        return post_data
+
+    def _post_create_requests(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """构建批量发布文章的子请求"""
+        return [{'method': 'POST', 'path': f"{self.wp_route_prefix}/posts", 'body': self._build_post_data(**post)}
+                for post in posts]
+
+    @staticmethod
+    def _parse_post_response(post_data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析创建文章的响应"""
+        post_id = post_data.get('id')
+        post_link = post_data.get('link')
+
+        if post_id:
+            logger.info(f"成功发布文章，ID: {post_id}, 链接: {post_link}")
+            return {'success': True, 'post_id': post_id, 'post_link': post_link}
+        else:
+            logger.warning("发布文章失败，未获取到文章ID")
+            return {'success': False, 'error': '未获取到文章ID'}
+
+    @classmethod
+    def _parse_post_responses(cls, responses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """解析批量发布文章的子响应"""
+        results = []
+        for response in responses:
+            if 200 <= response.get('status', 0) < 300:
+                results.append(cls._parse_post_response(response.get('body') or {}))
+            else:
+                error = (response.get('body') or {}).get('message', f"HTTP {response.get('status')}")
+                logger.error(f"发布文章时出错: {error}")
+                results.append({'success': False, 'error': error})
+        return results
@@ -1,42 +1,143 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import re
+import io
+import json
+import time
 import logging
-from typing import List
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from urllib.parse import urlparse
 from zhipuai import ZhipuAI as ZhipuSDK  # 导入SDK并重命名，避免冲突
 
-from config.api_config import ZHIPU_MODEL, CATEGORY_DETECTION_PROMPT, TAG_DETECTION_PROMPT
+from config.api_config import (ZHIPU_MODEL, ZHIPU_API_URL, CATEGORY_DETECTION_PROMPT, TAG_DETECTION_PROMPT,
+                               CLASSIFICATION_PROMPT, BATCH_CLASSIFICATION_PROMPT, ZHIPU_BATCH_SIZE,
+                               ZHIPU_BATCH_WAIT, ZHIPU_BATCH_POLL_INTERVAL, ZHIPU_BATCH_TIMEOUT,
+                               ZHIPU_BATCH_ENDPOINT, ZHIPU_STREAM)
+from api.http_session import create_httpx_client
+from api.classification_cache import ClassificationCache, classification_cache_key
+from utils.rate_limiter import TokenBucketLimiter, estimate_tokens
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
 
+# 从模型回复中提取JSON对象或数组（兼容```json代码块和前后多余文字）
+_JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+_JSON_PATTERN = re.compile(r'[\[{].*[\]}]', re.DOTALL)
+
+# 流式回复中标签之间的分隔符
+_TAG_SEPARATOR_PATTERN = re.compile(r'[,，、\n]')
+
+# 离线批处理任务的终止状态
+_BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
 
 class ZhipuAIClient:  # 修改类名避免冲突
     """智普AI API交互类"""
     
-    def __init__(self, api_key: str, model: str = None):
+    def __init__(self, api_key: str, model: str = None, cache: Optional[ClassificationCache] = None,
+                 limiter: Optional[TokenBucketLimiter] = None, stream: bool = ZHIPU_STREAM):
         """初始化智普AI API客户端
         
         Args:
             api_key: 智普API密钥
             model: 使用的模型，如未指定则使用配置中的默认模型
+            cache: 分类结果缓存，为None时每次都调用模型
+            limiter: 请求限流器（每分钟请求数、token数和并发数），为None时不限制
+            stream: 是否使用流式回复，解析出有效答案后立即停止接收
         """
         self.api_key = api_key
         self.model = model or ZHIPU_MODEL
-        self.client = ZhipuSDK(api_key=api_key)  # 使用重命名后的SDK类
+        self.cache = cache
+        self.limiter = limiter
+        self.stream = stream
+        # 使用共享连接池设置创建的httpx客户端，统一超时、连接复用和重试熔断
+        # 分类请求可安全重复，允许POST在5xx时重试；SDK自身的重试关闭，避免重复计数
+        http_client = create_httpx_client(retry_post_hosts=[urlparse(ZHIPU_API_URL).netloc])
+        self.client = ZhipuSDK(api_key=api_key, http_client=http_client, timeout=http_client.timeout,
+                               max_retries=0)
         logger.info(f"已初始化智普AI客户端，使用模型: {self.model}")
     
-    def detect_category(self, keyword: str, summary: str, categories: List[str]) -> str:
+    def _complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                  response_format: Optional[Dict[str, str]] = None,
+                  early_stop: Optional[Callable[[str], bool]] = None) -> str:
+        """经限流器排队后发送聊天完成请求，返回回复文本
+        
+        Args:
+            messages: 消息列表
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            response_format: 输出格式，例如 {"type": "json_object"}
+            early_stop: 启用流式回复时，对已收到的文本返回True即停止接收并关闭连接
+            
+        Returns:
+            模型回复的文本（提前停止时为已收到的部分）
+        """
+        reserved = estimate_tokens(messages, max_tokens)
+        if self.limiter:
+            self.limiter.acquire(reserved)
+        used = None
+        try:
+            extra = {'response_format': response_format} if response_format else {}
+            if self.stream and early_stop is not None:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    **extra
+                )
+                text = ''
+                try:
+                    for chunk in stream:
+                        usage = getattr(chunk, 'usage', None)
+                        if usage is not None:
+                            used = usage.total_tokens
+                        if chunk.choices:
+                            text += chunk.choices[0].delta.content or ''
+                            if early_stop(text):
+                                break
+                finally:
+                    # 提前停止时关闭连接，不再接收剩余的回复
+                    stream.response.close()
+                return text.strip()
+
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            )
+            used = getattr(getattr(response, 'usage', None), 'total_tokens', None)
+            return response.choices[0].message.content.strip()
+        finally:
+            if self.limiter:
+                self.limiter.release(reserved, used)
+
+    def detect_category(self, keyword: str, summary: str, categories: List[str], with_source: bool = False):
         """检测文章应该属于哪个分类
         
         Args:
             keyword: 文章关键词
             summary: 文章摘要
             categories: 可选分类列表
+            with_source: 为True时同时返回结果是否由模型本次成功给出
             
         Returns:
-            最匹配的分类名称
+            最匹配的分类名称；with_source为True时返回(分类名称, 是否来自模型)，
+            请求失败、回复无法匹配或命中缓存时后者为False
         """
+        cache_key = classification_cache_key('category', self.model, CATEGORY_DETECTION_PROMPT,
+                                             categories, keyword, summary)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章分类(缓存): '{cached}'")
+            return (cached, False) if with_source else cached
+
         try:
             # 准备分类判断的prompt
             prompt = CATEGORY_DETECTION_PROMPT.format(
@@ -46,48 +147,48 @@ class ZhipuAIClient:  # 修改类名避免冲突
             )
             
             # 使用SDK创建聊天完成请求
-            response = self.client.chat.completions.create(
-                model=self.model,
+            category_name = self._complete(
                 messages=[
                     {"role": "system", "content": "你是一个帮助内容创作者对文章进行分类的助手。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.01,  # 使用低温度提高确定性
-                max_tokens=50  # 只需要简短回复
+                max_tokens=50,  # 只需要简短回复
+                early_stop=lambda text: self._category_complete(text, categories)
             )
             
-            # 解析响应
-            category_name = response.choices[0].message.content.strip()
-            
-            # 确保返回的分类在列表中
-            if category_name and category_name in categories:
-                logger.info(f"AI检测文章分类: '{category_name}'")
-                return category_name
-            else:
-                # 如果返回的分类不在列表中，尝试找到最相似的
-                for cat in categories:
-                    if cat.lower() in category_name.lower():
-                        logger.info(f"AI检测文章分类(近似匹配): '{cat}'")
-                        return cat
-                        
-                logger.warning(f"AI返回的分类 '{category_name}' 不在可选列表中，将使用默认分类")
-                return categories[0] if categories else ""
+            # 解析响应，只缓存与可选列表匹配的结果
+            matched = self._match_category(category_name, categories)
+            category = matched or self._parse_category(category_name, categories)
+            if matched:
+                self._cache_put(cache_key, category)
+            return (category, matched is not None) if with_source else category
                 
         except Exception as e:
             logger.error(f"使用智普AI检测分类时出错: {str(e)}")
-            return categories[0] if categories else ""
+            category = categories[0] if categories else ""
+            return (category, False) if with_source else category
     
-    def detect_tags(self, keyword: str, summary: str, available_tags: List[str]) -> List[str]:
+    def detect_tags(self, keyword: str, summary: str, available_tags: List[str], with_source: bool = False):
         """检测文章应该使用哪些标签
         
         Args:
             keyword: 文章关键词
             summary: 文章摘要
             available_tags: 可用标签列表
+            with_source: 为True时同时返回结果是否由模型本次成功给出
             
         Returns:
-            最适合的标签列表（1-3个）
+            最适合的标签列表（1-3个）；with_source为True时返回(标签列表, 是否来自模型)，
+            请求失败、回复中没有可用标签或命中缓存时后者为False
         """
+        cache_key = classification_cache_key('tags', self.model, TAG_DETECTION_PROMPT,
+                                             available_tags, keyword, summary)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章标签(缓存): {', '.join(cached)}")
+            return (cached, False) if with_source else cached
+
         try:
             # 准备标签检测的prompt
             prompt = TAG_DETECTION_PROMPT.format(
@@ -96,36 +197,610 @@ class ZhipuAIClient:  # 修改类名避免冲突
                 summary=summary
             )
             
-            # 使用SDK创建聊天完成请求
-            response = self.client.chat.completions.create(
-                model=self.model,
+            # 使用SDK创建聊天完成请求，应该返回格式如 "标签1, 标签2, 标签3"
+            tag_text = self._complete(
                 messages=[
                     {"role": "system", "content": "你是一个帮助内容创作者为文章添加标签的助手。"},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,  # 使用低温度提高确定性
-                max_tokens=50  # 只需要简短回复
+                max_tokens=50,  # 只需要简短回复
+                early_stop=lambda text: self._tags_complete(text, available_tags)
             )
             
-            # 解析响应，应该返回格式如 "标签1, 标签2, 标签3"
-            tag_text = response.choices[0].message.content.strip()
-            
-            # 解析返回的标签
-            suggested_tags = [tag.strip() for tag in tag_text.split(',') if tag.strip()]
-            
-            # 过滤出可用的标签
-            valid_tags = [tag for tag in suggested_tags if tag in available_tags]
-            
-            if valid_tags:
-                logger.info(f"AI检测文章标签: {', '.join(valid_tags)}")
-                return valid_tags
-            else:
-                # 如果没有有效标签，返回前三个可用标签
-                default_tags = available_tags[:min(3, len(available_tags))]
-                logger.warning(f"AI返回的标签无效，将使用默认标签: {', '.join(default_tags)}")
-                return default_tags
+            # 解析响应，只缓存与可用列表匹配的结果
+            matched = self._match_tags(tag_text, available_tags)
+            tags = self._parse_tags(tag_text, available_tags)
+            if matched:
+                self._cache_put(cache_key, tags)
+            return (tags, bool(matched)) if with_source else tags
                 
         except Exception as e:
             logger.error(f"使用智普AI检测标签时出错: {str(e)}")
             # 出错时返回前三个可用标签
-            return available_tags[:min(3, len(available_tags))]
+            tags = available_tags[:min(3, len(available_tags))]
+            return (tags, False) if with_source else tags
+
+    def classify(self, keyword: str, summary: str, categories: List[str],
+                 available_tags: List[str]) -> Dict[str, Any]:
+        """一次请求同时检测文章的分类和标签
+
+        Args:
+            keyword: 文章关键词
+            summary: 文章摘要
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            包含category（分类名称）、tags（1-3个标签）和from_model的字典；
+            from_model表示结果由模型本次成功给出，请求失败、回复无法匹配可选列表或命中缓存时为False
+        """
+        cache_key = self._classify_cache_key(self.model, keyword, summary, categories, available_tags)
+        cached = self._cached_classification(cache_key)
+        if cached is not None:
+            logger.info(f"AI检测文章分类和标签(缓存): '{cached['category']}'，{', '.join(cached['tags'])}")
+            return cached
+        return self._classify_uncached(keyword, summary, categories, available_tags, cache_key)
+
+    def _classify_uncached(self, keyword: str, summary: str, categories: List[str],
+                           available_tags: List[str], cache_key: str) -> Dict[str, Any]:
+        """不查缓存，直接请求模型检测单篇文章的分类和标签"""
+        try:
+            prompt = CLASSIFICATION_PROMPT.format(
+                categories=", ".join(categories),
+                tags=", ".join(available_tags),
+                keyword=keyword,
+                summary=summary
+            )
+
+            # 使用JSON输出格式，分类名和最多3个标签用不了太多token
+            text = self._complete(
+                messages=[
+                    {"role": "system", "content": "你是一个帮助内容创作者对文章进行分类并添加标签的助手。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.01,
+                max_tokens=100,
+                response_format={"type": "json_object"},
+                early_stop=self._json_complete
+            )
+
+            result = self._parse_classification(text, categories, available_tags)
+            self._cache_classification(cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"使用智普AI检测分类和标签时出错: {str(e)}")
+            return self._default_classification(categories, available_tags)
+
+    def classify_many(self, items: List[Tuple[str, str]], categories: List[str], available_tags: List[str],
+                      batch_size: int = ZHIPU_BATCH_SIZE, check_cache: bool = True) -> List[Dict[str, Any]]:
+        """在一个Prompt中同时检测多篇文章的分类和标签
+
+        Args:
+            items: (关键词, 摘要) 列表
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+            batch_size: 每次请求最多包含的文章数
+            check_cache: 是否先查询分类结果缓存
+            
+        Returns:
+            与items顺序一致的结果列表，每项包含category、tags和from_model
+        """
+        batch_size = max(1, int(batch_size))
+        keys = [self._classify_cache_key(self.model, keyword, summary, categories, available_tags)
+                for keyword, summary in items]
+        results = [None] * len(items)
+        pending = []
+        for index, key in enumerate(keys):
+            cached = self._cached_classification(key) if check_cache else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            if len(chunk) == 1:
+                index = chunk[0]
+                results[index] = self._classify_uncached(*items[index], categories, available_tags, keys[index])
+                continue
+
+            try:
+                text = self._complete(
+                    messages=self._batch_messages([items[index] for index in chunk], categories, available_tags),
+                    temperature=0.01,
+                    max_tokens=self._batch_max_tokens(len(chunk)),
+                    response_format={"type": "json_object"},
+                    early_stop=self._json_complete
+                )
+                parsed = self._parse_batch_classification(text, len(chunk), categories, available_tags)
+            except Exception as e:
+                logger.error(f"使用智普AI批量检测 {len(chunk)} 篇文章的分类和标签时出错: {str(e)}")
+                for index in chunk:
+                    results[index] = self._default_classification(categories, available_tags)
+                continue
+
+            logger.info(f"AI批量检测文章分类和标签: 1次请求完成 {sum(1 for r in parsed if r)}/{len(chunk)} 篇")
+            for index, result in zip(chunk, parsed):
+                if result is None:
+                    # 模型遗漏的文章单独再请求一次
+                    result = self._classify_uncached(*items[index], categories, available_tags, keys[index])
+                else:
+                    self._cache_classification(keys[index], result)
+                results[index] = result
+
+        return results
+
+    def submit_batch_job(self, items: List[Tuple[str, str]], categories: List[str], available_tags: List[str],
+                         batch_size: int = ZHIPU_BATCH_SIZE) -> Dict[str, Any]:
+        """上传JSONL文件并创建离线批处理任务，适合不要求即时结果的大量关键词
+
+        每行请求包含最多batch_size篇文章，请求数和token消耗与classify_many相同，
+        但不占用在线接口的速率限制。
+        
+        Args:
+            items: (关键词, 摘要) 列表
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+            batch_size: 每行请求包含的文章数
+            
+        Returns:
+            包含batch_id的结果字典，使用collect_batch_job获取结果时需传入相同的items和batch_size
+        """
+        batch_size = max(1, int(batch_size))
+        lines = []
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            lines.append(json.dumps({
+                "custom_id": f"chunk-{start}-{len(chunk)}",
+                "method": "POST",
+                "url": ZHIPU_BATCH_ENDPOINT,
+                "body": {
+                    "model": self.model,
+                    "messages": self._batch_messages(chunk, categories, available_tags),
+                    "temperature": 0.01,
+                    "max_tokens": self._batch_max_tokens(len(chunk)),
+                    "response_format": {"type": "json_object"}
+                }
+            }, ensure_ascii=False))
+
+        try:
+            upload = self.client.files.create(
+                file=('classification.jsonl', io.BytesIO('\n'.join(lines).encode('utf-8'))),
+                purpose='batch'
+            )
+            batch = self.client.batches.create(
+                input_file_id=upload.id,
+                endpoint=ZHIPU_BATCH_ENDPOINT,
+                completion_window='24h',
+                metadata={'description': f"classification of {len(items)} articles"}
+            )
+            logger.info(f"已创建智普AI批处理任务 {batch.id}：{len(items)} 篇文章，{len(lines)} 个请求")
+            return {'success': True, 'batch_id': batch.id}
+        except Exception as e:
+            logger.error(f"创建智普AI批处理任务失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def collect_batch_job(self, batch_id: str, items: List[Tuple[str, str]], categories: List[str],
+                          available_tags: List[str], poll_interval: float = ZHIPU_BATCH_POLL_INTERVAL,
+                          timeout: float = ZHIPU_BATCH_TIMEOUT) -> Dict[str, Any]:
+        """等待离线批处理任务完成并下载结果，结果同时写入分类结果缓存
+        
+        Args:
+            batch_id: submit_batch_job返回的任务ID
+            items: 提交任务时使用的 (关键词, 摘要) 列表
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+            poll_interval: 状态轮询间隔（秒）
+            timeout: 最长等待时间（秒），0表示只查询一次
+            
+        Returns:
+            包含results的结果字典，results与items顺序一致，未返回结果的文章对应None
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                batch = self.client.batches.retrieve(batch_id)
+                if batch.status in _BATCH_FINAL_STATUSES:
+                    break
+                if time.monotonic() + poll_interval > deadline:
+                    return {'success': False, 'error': f"批处理任务 {batch_id} 尚未完成，当前状态: {batch.status}"}
+                time.sleep(poll_interval)
+
+            if batch.status != 'completed' or not batch.output_file_id:
+                return {'success': False, 'error': f"批处理任务 {batch_id} 未成功完成，状态: {batch.status}"}
+
+            output = self.client.files.content(batch.output_file_id).content.decode('utf-8')
+        except Exception as e:
+            logger.error(f"获取智普AI批处理任务结果失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+        results = [None] * len(items)
+        for line in output.splitlines():
+            try:
+                record = json.loads(line)
+                _, start, count = record['custom_id'].split('-')
+                start, count = int(start), int(count)
+                response = record['response']
+                if response.get('status_code') != 200:
+                    continue
+                text = response['body']['choices'][0]['message']['content'].strip()
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                continue
+
+            parsed = self._parse_batch_classification(text, count, categories, available_tags)
+            for offset, result in enumerate(parsed):
+                index = start + offset
+                if result is not None and index < len(items):
+                    keyword, summary = items[index]
+                    self._cache_classification(self._classify_cache_key(self.model, keyword, summary, categories,
+                                                                        available_tags), result)
+                    results[index] = result
+
+        logger.info(f"智普AI批处理任务 {batch_id} 完成：{sum(1 for r in results if r)}/{len(items)} 篇文章得到结果")
+        return {'success': True, 'results': results}
+
+    @staticmethod
+    def _classify_cache_key(model: str, keyword: str, summary: str, categories: List[str],
+                            available_tags: List[str]) -> str:
+        """分类和标签合并检测结果的缓存键，单篇和批量检测共用"""
+        return classification_cache_key('classify', model, CLASSIFICATION_PROMPT,
+                                        categories + ['\x1e'] + available_tags, keyword, summary)
+
+    @staticmethod
+    def _default_classification(categories: List[str], available_tags: List[str]) -> Dict[str, Any]:
+        """请求失败时使用的默认分类和标签"""
+        return {
+            'category': categories[0] if categories else "",
+            'tags': available_tags[:min(3, len(available_tags))],
+            'from_model': False
+        }
+
+    def _cached_classification(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的合并检测结果，缓存结果不是本次模型给出的，from_model为False"""
+        cached = self._cache_get(key)
+        if cached is None:
+            return None
+        return {'category': cached.get('category', ''), 'tags': cached.get('tags', []), 'from_model': False}
+
+    def _cache_classification(self, key: str, result: Dict[str, Any]) -> None:
+        """缓存合并检测结果，只缓存模型成功给出的结果"""
+        if result.get('from_model'):
+            self._cache_put(key, {'category': result['category'], 'tags': result['tags']})
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        """读取分类结果缓存，未启用缓存或出错时返回None"""
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"读取分类结果缓存失败: {str(e)}")
+            return None
+
+    def _cache_put(self, key: str, value: Any) -> None:
+        """写入分类结果缓存，只缓存模型成功返回的结果"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(key, value)
+        except Exception as e:
+            logger.warning(f"写入分类结果缓存失败: {str(e)}")
+
+    @staticmethod
+    def _category_complete(text: str, categories: List[str]) -> bool:
+        """流式回复是否已包含完整的分类名称
+
+        回复以某个可选分类开头，且不可能再延长成另一个更长的分类名时即可停止。
+        """
+        text = text.strip()
+        if not text or not any(text.startswith(category) for category in categories):
+            return False
+        return not any(len(category) > len(text) and category.startswith(text) for category in categories)
+
+    @staticmethod
+    def _tags_complete(text: str, available_tags: List[str]) -> bool:
+        """流式回复是否已包含3个完整的有效标签"""
+        parts = [part.strip() for part in _TAG_SEPARATOR_PATTERN.split(text)]
+        # 最后一段后面还没有分隔符，只有不可能再延长成其他标签时才算完整
+        last = parts.pop()
+        complete = [part for part in parts if part in available_tags]
+        if last in available_tags and not any(len(tag) > len(last) and tag.startswith(last)
+                                              for tag in available_tags):
+            complete.append(last)
+        return len(set(complete)) >= 3
+
+    @staticmethod
+    def _json_complete(text: str) -> bool:
+        """流式回复中第一个JSON对象是否已经闭合"""
+        start = text.find('{')
+        if start < 0:
+            return False
+        depth = 0
+        in_string = escaped = False
+        for char in text[start:]:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    return True
+        return False
+
+    @staticmethod
+    def _match_category(category_name: str, categories: List[str]) -> Optional[str]:
+        """在可选列表中查找模型回复的分类名称，找不到时返回None"""
+        # 确保返回的分类在列表中
+        if category_name and category_name in categories:
+            logger.info(f"AI检测文章分类: '{category_name}'")
+            return category_name
+
+        # 如果返回的分类不在列表中，尝试找到最相似的
+        for cat in categories:
+            if cat and cat.lower() in (category_name or '').lower():
+                logger.info(f"AI检测文章分类(近似匹配): '{cat}'")
+                return cat
+        return None
+
+    @staticmethod
+    def _parse_category(category_name: str, categories: List[str]) -> str:
+        """从模型回复中解析分类名称
+        
+        Args:
+            category_name: 模型返回的文本
+            categories: 可选分类列表
+            
+        Returns:
+            最匹配的分类名称，无法匹配时返回默认分类
+        """
+        matched = ZhipuAIClient._match_category(category_name, categories)
+        if matched is not None:
+            return matched
+
+        logger.warning(f"AI返回的分类 '{category_name}' 不在可选列表中，将使用默认分类")
+        return categories[0] if categories else ""
+
+    @staticmethod
+    def _parse_classification(text: str, categories: List[str], available_tags: List[str]) -> Dict[str, Any]:
+        """从模型的JSON回复中解析分类和标签，并按可选列表校验
+
+        Args:
+            text: 模型返回的文本，格式如 {"category": "分类", "tags": ["标签1", "标签2"]}
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            包含category和tags的字典；JSON无法解析时退回在原文中查找可选的分类和标签
+        """
+        data = None
+        match = _JSON_OBJECT_PATTERN.search(text)
+        if match:
+            try:
+                data = json.loads(match.group(0))
+            except ValueError:
+                data = None
+
+        if not isinstance(data, dict):
+            logger.warning(f"AI返回的分类结果不是有效的JSON，将从原文中查找: {text[:100]}")
+            found_tags = [tag for tag in available_tags if tag and tag in text]
+            category = ZhipuAIClient._parse_category(text, categories)
+            tags = ZhipuAIClient._parse_tags(', '.join(found_tags), available_tags)[:3]
+            # 从非JSON原文中猜测的结果不视为模型的决定
+            return {'category': category, 'tags': tags, 'from_model': False}
+
+        return ZhipuAIClient._validate_classification(data, categories, available_tags)
+
+    @staticmethod
+    def _validate_classification(data: Dict[str, Any], categories: List[str],
+                                 available_tags: List[str]) -> Dict[str, Any]:
+        """按可选列表校验一条JSON分类结果
+
+        Args:
+            data: 包含category和tags字段的字典
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            包含category、tags（最多3个）和from_model的字典，分类或标签需要退回默认值时from_model为False
+        """
+        category_text = str(data.get('category') or '').strip()
+        tags = data.get('tags') or []
+        if isinstance(tags, str):
+            tags = re.split(r'[,，、]', tags)
+        tag_text = ', '.join(str(tag) for tag in tags)
+
+        category = ZhipuAIClient._parse_category(category_text, categories)
+        tags = ZhipuAIClient._parse_tags(tag_text, available_tags)[:3]
+        from_model = (ZhipuAIClient._match_category(category_text, categories) is not None
+                      and bool(ZhipuAIClient._match_tags(tag_text, available_tags)))
+        return {'category': category, 'tags': tags, 'from_model': from_model}
+
+    @staticmethod
+    def _parse_batch_classification(text: str, count: int, categories: List[str],
+                                    available_tags: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """从模型的JSON回复中解析多篇文章的分类结果
+
+        Args:
+            text: 模型返回的文本，格式如 {"results": [{"id": 1, "category": "分类", "tags": ["标签"]}]}
+            count: 本次请求的文章数
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            与文章顺序一致的结果列表，模型遗漏或无法解析的文章对应None
+        """
+        results = [None] * count
+        match = _JSON_PATTERN.search(text)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            data = data.get('results')
+        if not isinstance(data, list):
+            logger.warning(f"AI返回的批量分类结果不是有效的JSON数组: {text[:100]}")
+            return results
+
+        for position, entry in enumerate(data):
+            if not isinstance(entry, dict):
+                continue
+            # 优先按id对应文章，缺少id时按返回顺序对应
+            try:
+                index = int(entry.get('id', position + 1)) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < count and results[index] is None:
+                results[index] = ZhipuAIClient._validate_classification(entry, categories, available_tags)
+        return results
+
+    @staticmethod
+    def _batch_messages(items: List[Tuple[str, str]], categories: List[str],
+                        available_tags: List[str]) -> List[Dict[str, str]]:
+        """生成多篇文章合并分类请求的消息列表
+
+        Args:
+            items: (关键词, 摘要) 列表
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+
+        Returns:
+            聊天消息列表
+        """
+        numbered = "\n\n".join(
+            f"[{index}] 文章主题：{keyword}\n文章摘要：{summary}"
+            for index, (keyword, summary) in enumerate(items, 1)
+        )
+        prompt = BATCH_CLASSIFICATION_PROMPT.format(
+            categories=", ".join(categories),
+            tags=", ".join(available_tags),
+            items=numbered
+        )
+        return [
+            {"role": "system", "content": "你是一个帮助内容创作者对文章进行分类并添加标签的助手。"},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _batch_max_tokens(count: int) -> int:
+        """多篇文章合并分类时回复所需的最大token数"""
+        return 50 + 60 * count
+
+    @staticmethod
+    def _match_tags(tag_text: str, available_tags: List[str]) -> List[str]:
+        """从模型回复中找出在可用列表中的标签，没有时返回空列表"""
+        suggested_tags = [tag.strip() for tag in (tag_text or '').split(',') if tag.strip()]
+        return [tag for tag in suggested_tags if tag in available_tags]
+
+    @staticmethod
+    def _parse_tags(tag_text: str, available_tags: List[str]) -> List[str]:
+        """从模型回复中解析标签列表
+        
+        Args:
+            tag_text: 模型返回的文本，格式如 "标签1, 标签2"
+            available_tags: 可用标签列表
+            
+        Returns:
+            有效的标签列表，无有效标签时返回前三个可用标签
+        """
+        # 解析返回的标签，过滤出可用的标签
+        valid_tags = ZhipuAIClient._match_tags(tag_text, available_tags)
+
+        if valid_tags:
+            logger.info(f"AI检测文章标签: {', '.join(valid_tags)}")
+            return valid_tags
+
+        # 如果没有有效标签，返回前三个可用标签
+        default_tags = available_tags[:min(3, len(available_tags))]
+        logger.warning(f"AI返回的标签无效，将使用默认标签: {', '.join(default_tags)}")
+        return default_tags
+
+
+class ClassificationBatcher:
+    """将多个线程同时发起的分类请求合并为一次多篇文章的请求
+
+    第一个请求到达后最多等待max_wait秒，期间到达的请求凑成一批（达到batch_size时立即发送），
+    由ZhipuAIClient.classify_many一次完成，接口与ZhipuAIClient.classify一致。
+    """
+
+    def __init__(self, client: ZhipuAIClient, batch_size: int = ZHIPU_BATCH_SIZE,
+                 max_wait: float = ZHIPU_BATCH_WAIT):
+        """初始化请求合并器
+
+        Args:
+            client: 智普AI客户端
+            batch_size: 每批最多文章数
+            max_wait: 等待凑满一批的最长时间（秒）
+        """
+        self.client = client
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        # (分类列表, 标签列表) -> [((关键词, 摘要), Future)]
+        self._pending = {}
+        # (分类列表, 标签列表) -> 当前批次的等待计时器
+        self._timers = {}
+
+    def classify(self, keyword: str, summary: str, categories: List[str],
+                 available_tags: List[str]) -> Dict[str, Any]:
+        """检测文章的分类和标签，与其他线程的请求合并发送
+
+        Returns:
+            包含category、tags和from_model的字典
+        """
+        # 缓存命中时无需排队等待
+        cached = self.client._cached_classification(
+            self.client._classify_cache_key(self.client.model, keyword, summary, categories, available_tags))
+        if cached is not None:
+            return cached
+
+        group = (tuple(categories), tuple(available_tags))
+        future = Future()
+        with self._lock:
+            queue = self._pending.setdefault(group, [])
+            queue.append(((keyword, summary), future))
+            batch = None
+            if len(queue) >= self.batch_size:
+                # 凑满后立即发送，取消本批的计时器，避免它提前发送下一批
+                batch = self._pending.pop(group)
+                timer = self._timers.pop(group, None)
+                if timer is not None:
+                    timer.cancel()
+            elif len(queue) == 1:
+                timer = threading.Timer(self.max_wait, self._flush, args=(group, queue))
+                timer.daemon = True
+                self._timers[group] = timer
+                timer.start()
+
+        if batch:
+            self._run(group, batch)
+        return future.result()
+
+    def _flush(self, group: Tuple[tuple, tuple], queue: List[Tuple[Tuple[str, str], Future]]) -> None:
+        """等待超时后发送启动计时器的那一批；该批已因凑满而发送时不做任何处理"""
+        with self._lock:
+            if self._pending.get(group) is not queue:
+                return
+            batch = self._pending.pop(group)
+            self._timers.pop(group, None)
+        self._run(group, batch)
+
+    def _run(self, group: Tuple[tuple, tuple], batch: List[Tuple[Tuple[str, str], Future]]) -> None:
+        categories, available_tags = list(group[0]), list(group[1])
+        try:
+            results = self.client.classify_many([item for item, _ in batch], categories, available_tags,
+                                                self.batch_size, check_cache=False)
+        except Exception as e:
+            logger.error(f"批量检测文章分类和标签出错: {str(e)}")
+            results = [ZhipuAIClient._default_classification(categories, available_tags)] * len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
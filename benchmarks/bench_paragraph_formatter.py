@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""正文段落格式化的微基准测试
+
+生成约100 KB的Markdown文章（标题、列表、加粗、引用标记和段落交替出现），
+以及列表项与段落大量交替的极端输入，输出format_paragraphs的耗时和吞吐量。
+
+用法：
+    python benchmarks/bench_paragraph_formatter.py [--size-kb 100] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.formatters.paragraph_formatter import format_paragraphs
+
+CONTENT_DATA = {'sources': [{'link': f'https://example.com/source/{i}'} for i in range(1, 11)]}
+
+
+def build_article(size_kb: int) -> str:
+    """生成约size_kb KB（UTF-8）的典型文章"""
+    block = (
+        "## 行业概况\n"
+        "近年来旅游业持续复苏，**国内游**与**出境游**均保持增长[1]，多地推出消费券刺激需求[2]。\n"
+        "\n"
+        "### 主要趋势\n"
+        "- 自驾游成为**热门**选择[3]\n"
+        "- 短途周边游需求上升[4]\n"
+        "– 亲子游与研学游快速发展\n"
+        "\n"
+        "业内人士认为，随着基础设施完善和服务质量提升，旅游市场有望迎来新一轮增长[5]。\n"
+    )
+    target = size_kb * 1024
+    repeats = max(1, target // len(block.encode('utf-8')) + 1)
+    return block * repeats
+
+
+def build_alternating(size_kb: int) -> str:
+    """生成列表项与段落交替出现的极端输入"""
+    block = "- 列表项**加粗**[1]\n普通段落文字\n"
+    repeats = max(1, size_kb * 1024 // len(block.encode('utf-8')) + 1)
+    return block * repeats
+
+
+def run(name: str, text: str, repeat: int) -> None:
+    format_paragraphs(text, CONTENT_DATA)  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        format_paragraphs(text, CONTENT_DATA)
+    elapsed = (time.perf_counter() - start) / repeat
+    size = len(text.encode('utf-8'))
+    print(f"{name:<12} {size / 1024:8.1f} KB  {elapsed * 1000:8.2f} ms/篇  {size / elapsed / 1024 / 1024:8.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="format_paragraphs 微基准测试")
+    parser.add_argument('--size-kb', type=int, default=100, help="文章大小（KB）")
+    parser.add_argument('--repeat', type=int, default=20, help="重复次数")
+    args = parser.parse_args()
+
+    run("典型文章", build_article(args.size_kb), args.repeat)
+    run("列表交替", build_alternating(args.size_kb), args.repeat)
+    # 输入放大10倍，耗时应同样约放大10倍（线性）
+    run("典型文章x10", build_article(args.size_kb * 10), max(1, args.repeat // 10))
+
+
+if __name__ == '__main__':
+    main()
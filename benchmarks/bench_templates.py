@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文章布局模板渲染的微基准测试
+
+渲染数千篇文章的外层布局、相关问题和信息来源，对比预编译模板与原先f-string加 html += 拼接的实现
+（正文段落使用预先生成的固定HTML，只测量布局部分）。
+
+用法：
+    python benchmarks/bench_templates.py [--articles 5000] [--sources 10] [--questions 5] [--rounds 5] [--style-mode inline]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.formatters.article_formatter import format_article_content, ARTICLE_STYLE
+from utils.formatters.question_formatter import format_related_questions, QUESTION_STYLE
+from utils.formatters.source_formatter import format_sources, SOURCE_STYLE
+from utils.formatters.stylesheet import set_style_mode, style_block, STYLE_MODES
+
+PARAGRAPHS = '<p class="article-paragraph">正文段落</p>\n' * 20
+
+
+def legacy_questions(questions):
+    """原先的相关问题拼接实现"""
+    if not questions:
+        return ''
+    html = style_block(QUESTION_STYLE)
+    html += '<div class="related-questions">\n'
+    html += '<h3>相关问题</h3>\n'
+    html += '<ul class="questions-list">\n'
+    for question in questions:
+        html += f'<li class="question-item">{question}</li>\n'
+    html += '</ul>\n'
+    html += '</div>\n'
+    return html
+
+
+def legacy_sources(sources):
+    """原先的信息来源拼接实现"""
+    if not sources:
+        return ''
+    html = style_block(SOURCE_STYLE)
+    html += '<div class="article-sources">\n'
+    html += '<h3>信息来源</h3>\n'
+    for i, source in enumerate(sources):
+        title = source.get('title', '')
+        link = source.get('link', '')
+        snippet = source.get('snippet', '')
+        if title and link:
+            html += f'<div class="accordion" id="source-{i+1}">\n'
+            html += f'  <input type="checkbox" class="accordion-checkbox" id="accordion-{i+1}">\n'
+            html += f'  <label class="accordion-header" for="accordion-{i+1}">\n'
+            html += f'    <span class="accordion-title">{title}</span>\n'
+            html += '    <span class="accordion-icon"></span>\n'
+            html += '  </label>\n'
+            html += '  <div class="accordion-content">\n'
+            html += '    <div class="accordion-inner">\n'
+            if snippet:
+                html += f'      <div class="accordion-snippet">{snippet}</div>\n'
+            html += f'      <a href="{link}" target="_blank" class="source-link-btn">查看原文</a>\n'
+            html += '    </div>\n'
+            html += '  </div>\n'
+            html += '</div>\n'
+    html += '</div>\n'
+    return html
+
+
+def legacy_article(content_data, format_paragraphs, format_related_questions, format_sources):
+    """原先的外层布局f-string实现"""
+    keyword = content_data.get('keyword', '')
+    title = f"{keyword} - 最新详细信息"
+    html_content = f'''{style_block(ARTICLE_STYLE)}<div class="article-container">
+        <div class="article-main-content">
+            {format_paragraphs(content_data.get('text', ''), content_data)}
+        </div>
+
+        <div class="article-divider"></div>
+
+        {format_related_questions(content_data.get('related_questions', []))}
+
+        <div class="article-divider"></div>
+
+        {format_sources(content_data.get('sources', []))}
+
+        <div class="article-footer">
+            <p>本文由AI自动生成，内容仅供参考。</p>
+            <p class="timestamp">发布时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        </div>
+    </div>
+    '''
+    return {'title': title, 'content': html_content}
+
+
+def build_articles(count: int, sources: int, questions: int):
+    """生成count篇测试文章数据"""
+    return [{
+        'success': True,
+        'keyword': f'关键词{n}',
+        'text': '',
+        'related_questions': [f'相关问题{n}-{i}？' for i in range(questions)],
+        'sources': [{'title': f'来源标题{n}-{i}', 'link': f'https://example.com/{n}/{i}',
+                     'snippet': f'来源摘要{n}-{i}' * 5 if i % 3 else ''} for i in range(sources)],
+    } for n in range(count)]
+
+
+def measure(render, articles) -> float:
+    """渲染全部文章一次，返回耗时（秒）"""
+    start = time.perf_counter()
+    for content_data in articles:
+        render(content_data)
+    return time.perf_counter() - start
+
+
+def report(name: str, elapsed: float, count: int) -> None:
+    print(f"{name:<10} {count:6d} 篇  {elapsed * 1000:8.1f} ms  {elapsed / count * 1e6:8.1f} µs/篇")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文章布局模板渲染微基准测试")
+    parser.add_argument('--articles', type=int, default=5000, help="文章数")
+    parser.add_argument('--sources', type=int, default=10, help="每篇文章的信息来源数")
+    parser.add_argument('--questions', type=int, default=5, help="每篇文章的相关问题数")
+    parser.add_argument('--rounds', type=int, default=5, help="轮数（取最快的一轮）")
+    parser.add_argument('--style-mode', choices=STYLE_MODES, default='inline', help="样式输出方式")
+    args = parser.parse_args()
+
+    set_style_mode(args.style_mode)
+    articles = build_articles(args.articles, args.sources, args.questions)
+    paragraphs = lambda text, content_data: PARAGRAPHS
+
+    legacy_render = lambda data: legacy_article(data, paragraphs, legacy_questions, legacy_sources)
+    compiled_render = lambda data: format_article_content(data, paragraphs, format_related_questions, format_sources)
+
+    # 两种实现交替运行，各取最快的一轮，减少机器抖动的影响
+    legacy_best = compiled_best = float('inf')
+    for _ in range(args.rounds):
+        legacy_best = min(legacy_best, measure(legacy_render, articles))
+        compiled_best = min(compiled_best, measure(compiled_render, articles))
+
+    report("原实现", legacy_best, len(articles))
+    report("预编译模板", compiled_best, len(articles))
+    print(f"渲染耗时降低 {(1 - compiled_best / legacy_best) * 100:.1f}%")
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,69 @@
 
 # WordPress API配置
 WP_API_BASE_PATH = "/wp-json/wp/v2"
+WP_BATCH_PATH = "/wp-json/batch/v1"  # 批量接口（WordPress 5.6+）
+WP_EDITOR_SETTINGS_PATH = "/wp-json/wp-block-editor/v1/settings"  # 编辑器设置，含允许上传的类型和大小（WordPress 5.8+）
+WP_UPLOAD_EXTENSIONS = ['jpg', 'png', 'gif', 'webp', 'avif', 'bmp', 'tiff', 'ico']  # 特色图片可能使用的扩展名（后三种仅在无法转换时按原格式上传）
+WP_UPLOAD_REJECTED_CODES = ['rest_upload_sideload_error']          # 上传因文件类型被拒绝时返回的错误码
+WP_BATCH_DEFAULT_LIMIT = 25          # 批量接口默认单次最大请求数
+WP_TERMS_PER_PAGE = 100              # 分类/标签分页大小（REST API上限为100）
+WP_TERMS_FETCH_WORKERS = 8           # 并发拉取分类/标签分页的线程数
+WP_STYLESHEET_MARKER = "wp-auto-publisher styles"  # 共享样式表在站点自定义CSS中的起止标记
+
+# HTTP连接池默认配置（可在config.json中覆盖）
+HTTP_POOL_SIZE = 20          # 每个主机的最大连接数
+HTTP_CONNECT_TIMEOUT = 5     # 连接超时（秒）
+HTTP_READ_TIMEOUT = 30       # 读取超时（秒）
+HTTP_KEEP_ALIVE = True       # 是否复用连接
+HTTP2_ENABLED = False        # 是否启用HTTP/2（需要安装h2）
+
+# 重试与熔断默认配置（可在config.json中覆盖）
+RETRY_MAX_ATTEMPTS = 3           # 每个请求的最大尝试次数（含首次）
+RETRY_BACKOFF_BASE = 0.5         # 指数退避基数（秒）
+RETRY_BACKOFF_MAX = 30           # 单次退避的最大等待时间（秒）
+CIRCUIT_FAILURE_THRESHOLD = 5    # 同一主机连续失败多少次后熔断
+CIRCUIT_RECOVERY_TIMEOUT = 30    # 熔断后多久放行探测请求（秒）
+
+# 图片编码进程池默认配置（可在config.json中覆盖）
+IMAGE_WORKERS = None         # 编码进程数，None表示按CPU核数自动设置，0表示在当前线程中编码
+IMAGE_QUEUE_SIZE = None      # 等待编码的最大图片数，None表示进程数的2倍
+IMAGE_ENCODE_TIMEOUT = 30    # 单张图片的编码超时（秒），从开始编码时计时，不含排队时间
+
+# 图片处理默认配置（可在config.json中覆盖）
+IMAGE_WIDTH = 960                # 特色图片目标宽度，超出时等比缩小
+IMAGE_HEIGHT = 540               # 特色图片目标高度，超出时等比缩小
+IMAGE_FORMATS = ['webp']         # 候选输出格式，可选webp、avif、jpeg，与原图比较后取体积最小者
+IMAGE_QUALITIES = [85, 75, 60]   # 编码质量阶梯，从高到低尝试
+IMAGE_TARGET_KB = 0              # 目标体积（KB），0表示只使用最高一档质量
+
+# 图片下载与上传配置
+IMAGE_MAX_MB = 10                    # 允许下载的最大图片体积（MB），0表示不限制（可在config.json中覆盖）
+MEDIA_CHUNK_SIZE = 64 * 1024         # 流式下载/上传的分块大小（字节）
+MEDIA_SPOOL_SIZE = 1024 * 1024       # 图片缓冲区超过该大小后写入临时文件（字节）
+
+# 文章样式输出方式（可在config.json中覆盖）：inline 每篇文章内联样式；shared 注册一次共享样式表；external 样式由主题引入
+STYLE_MODE = "inline"
+STYLE_ASSET_DIR = "cache/styles"     # 带版本号的共享样式表文件输出目录（相对项目根目录）
+TEMPLATE_DIR = ""                    # 文章布局主题模板目录（相对项目根目录），为空时使用内置模板
+
+# 批量格式化默认配置（可在config.json中覆盖）
+FORMAT_WORKERS = 0           # 格式化进程数，0表示在当前进程中格式化，None表示按CPU核数自动设置
+FORMAT_CHUNK_SIZE = 50       # 每次提交给格式化进程的文章数
+FORMAT_POOL_MIN = 200        # 文章数达到该值时才启动进程池，批量较小时进程启动开销大于收益
+
+# 发布速率默认配置（可在config.json中覆盖）
+PUBLISH_INTERVAL = 10        # 发布间隔（秒），未配置posts_per_minute时按该间隔换算发布速率
+
+# 发布任务队列默认配置（可在config.json中覆盖）
+JOB_STORE_PATH = "cache/jobs.db"  # SQLite任务数据库路径（相对项目根目录）
+JOB_LEASE_SECONDS = 600      # 领取任务的租约时长（秒），工作进程中断后超时的任务可被重新领取
+JOB_MAX_ATTEMPTS = 3         # 同一阶段的最大尝试次数，达到后需通过retry命令重置
+JOB_RETRY_DELAY = 60         # 失败的任务至少间隔多少秒后才会被再次领取
+JOB_CLAIM_BATCH = 50         # 渲染阶段每次领取的任务数
+
+# 站点元数据本地缓存默认配置（可在config.json中覆盖）
+SITE_CACHE_PATH = "cache/site_cache.db"  # SQLite缓存文件路径（相对项目根目录）
+SITE_CACHE_TTL = 86400                   # 缓存有效期（秒），0表示不使用缓存
 
 # 外部API配置
 EXTERNAL_IMAGE_API = "https://api.pearktrue.cn/api/thumbnail/"
@@ -12,6 +75,34 @@ EXTERNAL_AI_SEARCH_API = "https://api.pearktrue.cn/api/aisearch/"
 
 # 智普AI模型配置
 ZHIPU_MODEL = "glm-4-flash"  # 默认使用的模型
+ZHIPU_API_URL = "https://open.bigmodel.cn/api/paas/v4/chat/completions"  # 异步客户端直接调用的HTTP接口
+
+# 智普AI分类结果缓存默认配置（可在config.json中覆盖）
+ZHIPU_CACHE_PATH = "cache/classification_cache.db"  # SQLite缓存文件路径（相对项目根目录）
+ZHIPU_CACHE_TTL = 7 * 86400                         # 缓存有效期（秒），0表示不使用缓存
+ZHIPU_CACHE_SIZE = 10000                            # 最大缓存条目数，超过时淘汰最久未使用的条目
+
+# 智普AI分类方式：combined 一次请求同时返回分类和标签；separate 分类与标签分别请求
+ZHIPU_CLASSIFICATION_MODE = "combined"
+
+# 智普AI客户端限流默认配置（可在config.json中覆盖），0表示不限制
+ZHIPU_REQUESTS_PER_MINUTE = 0      # 每分钟最多请求数
+ZHIPU_TOKENS_PER_MINUTE = 0        # 每分钟最多token数（按提示词长度和max_tokens预估，响应后按实际用量修正）
+ZHIPU_MAX_IN_FLIGHT = 5            # 同时进行的最多请求数
+
+# 分类请求使用流式回复，解析出有效答案后立即停止接收
+ZHIPU_STREAM = True
+
+# 智普AI多篇文章合并分类默认配置（可在config.json中覆盖）
+ZHIPU_BATCH_SIZE = 20              # 每次请求最多分类的文章数，1表示不合并
+ZHIPU_BATCH_WAIT = 0.5             # 并发发布时等待凑满一批的最长时间（秒）
+ZHIPU_BATCH_POLL_INTERVAL = 30     # 离线批处理任务的状态轮询间隔（秒）
+ZHIPU_BATCH_TIMEOUT = 24 * 3600    # 离线批处理任务的最长等待时间（秒）
+ZHIPU_BATCH_ENDPOINT = "/v4/chat/completions"  # 离线批处理任务调用的接口
+
+# 本地预分类器默认配置（可在config.json中覆盖）
+LOCAL_CLASSIFIER_THRESHOLD = 0     # 置信度阈值（0-1），达到阈值时不再调用AI，0表示不使用本地预分类（默认关闭，建议0.5）
+LOCAL_CLASSIFIER_HISTORY = 5000    # 启动时加载的历史分类决定条数
 
 # 分类判断Prompt模板
 CATEGORY_DETECTION_PROMPT = """
@@ -37,6 +128,33 @@ TAG_DETECTION_PROMPT = """
 请直接返回标签名称，用逗号分隔，不要添加任何解释或额外文字。例如：标签1, 标签2
 """
 
+# 分类与标签合并检测Prompt模板（要求模型返回JSON）
+CLASSIFICATION_PROMPT = """
+你是一个专业的内容分类与标记专家，请根据以下文章主题和摘要，从可选分类中选择一个最合适的分类，并从可选标签中选择1到3个最合适的标签。
+
+可选分类：{categories}
+可选标签：{tags}
+
+文章主题：{keyword}
+文章摘要：{summary}
+
+请只返回一个JSON对象，不要添加任何解释或额外文字，格式如下：
+{{"category": "分类名称", "tags": ["标签1", "标签2"]}}
+"""
+
+# 多篇文章合并分类Prompt模板，{items}为带编号的文章主题和摘要列表（要求模型返回JSON）
+BATCH_CLASSIFICATION_PROMPT = """
+你是一个专业的内容分类与标记专家，请根据以下每篇文章的主题和摘要，分别从可选分类中选择一个最合适的分类，并从可选标签中选择1到3个最合适的标签。
+
+可选分类：{categories}
+可选标签：{tags}
+
+{items}
+
+请只返回一个JSON对象，不要添加任何解释或额外文字，results中每篇文章一项，id为文章编号，格式如下：
+{{"results": [{{"id": 1, "category": "分类名称", "tags": ["标签1", "标签2"]}}]}}
+"""
+
 # 注意：由于使用官方SDK，不再需要自己生成JWT token
 # 这个函数已不再使用，但保留为向后兼容
 def get_headers(api_key):
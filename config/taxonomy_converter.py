@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
@@ -10,36 +10,46 @@ logger = logging.getLogger("WordPressPublisher")
 
 def convert_taxonomy_names_to_ids(config: Dict[str, Any], wp_api) -> Dict[str, Any]:
     """将分类和标签名称转换为ID
-    
+
     Args:
         config: 配置字典
         wp_api: WordPress API客户端实例
-        
+
+    Returns:
+        更新后的配置字典
+    """
+    # 缺失的分类和标签通过批量接口一次性创建
+    category_map = wp_api.create_categories(config['category_names']) if 'category_names' in config else None
+    tag_map = wp_api.create_tags(config['tag_names']) if 'tag_names' in config else None
+    return _apply_taxonomy_maps(config, category_map, tag_map)
+
+
+async def async_convert_taxonomy_names_to_ids(config: Dict[str, Any], wp_api) -> Dict[str, Any]:
+    """convert_taxonomy_names_to_ids的异步版本，配合AsyncWordPressAPI使用
+
+    Args:
+        config: 配置字典
+        wp_api: AsyncWordPressAPI实例
+
     Returns:
         更新后的配置字典
     """
+    category_map = await wp_api.create_categories(config['category_names']) if 'category_names' in config else None
+    tag_map = await wp_api.create_tags(config['tag_names']) if 'tag_names' in config else None
+    return _apply_taxonomy_maps(config, category_map, tag_map)
+
+
+def _apply_taxonomy_maps(config: Dict[str, Any], category_map: Optional[Dict[str, int]],
+                         tag_map: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    """按配置中的名称顺序将名称到ID的映射写入配置副本"""
     updated_config = config.copy()
-    
-    # 处理分类
-    if 'category_names' in config:
-        category_ids = []
-        for category_name in config['category_names']:
-            # 自动创建不存在的分类
-            category_id = wp_api.create_category_if_not_exists(category_name)
-            if category_id:
-                category_ids.append(category_id)
-        
-        updated_config['categories'] = category_ids
-    
-    # 处理标签
-    if 'tag_names' in config:
-        tag_ids = []
-        for tag_name in config['tag_names']:
-            # 自动创建不存在的标签
-            tag_id = wp_api.create_tag_if_not_exists(tag_name)
-            if tag_id:
-                tag_ids.append(tag_id)
-        
-        updated_config['tags'] = tag_ids
-    
+
+    if category_map is not None:
+        # 创建失败时使用默认分类
+        updated_config['categories'] = [category_map.get(category_name, 1)
+                                        for category_name in config['category_names']]
+
+    if tag_map is not None:
+        updated_config['tags'] = [tag_map[tag_name] for tag_name in config['tag_names'] if tag_map.get(tag_name)]
+
     return updated_config
@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import sys
+import os
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.async_wordpress_api import AsyncWordPressAPI
+from api.async_external_api import AsyncExternalAPI
+from api.async_zhipu_ai import AsyncZhipuAIClient, AsyncClassificationBatcher
+from utils.content_formatter import ContentFormatter
+from utils.rate_limiter import AsyncRateLimiter, AsyncTokenBucketLimiter, publish_rate_per_minute
+from api.http_session import configure_http, create_async_client
+from api.resilience import configure_resilience, is_circuit_open
+from api.site_cache import open_site_cache
+from api.classification_cache import open_classification_cache
+from utils.image_encoder import configure_images
+from utils.formatters.stylesheet import configure_styles, get_stylesheet, stylesheet_version
+from utils.formatters.templates import configure_templates
+from config.taxonomy_converter import async_convert_taxonomy_names_to_ids
+from core.publisher_base import PublisherBase
+from config.api_config import (ZHIPU_API_URL, IMAGE_WIDTH, IMAGE_HEIGHT, ZHIPU_CLASSIFICATION_MODE,
+                               ZHIPU_BATCH_SIZE, ZHIPU_BATCH_WAIT, ZHIPU_REQUESTS_PER_MINUTE,
+                               ZHIPU_TOKENS_PER_MINUTE, ZHIPU_MAX_IN_FLIGHT, ZHIPU_STREAM)
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class AsyncWordPressPublisher(PublisherBase):
+    """基于asyncio的WordPress自动发布类，单进程内可同时处理大量文章"""
+
+    def __init__(self, config: Dict[str, Any], client: httpx.AsyncClient):
+        """初始化异步发布器，需再调用setup()完成连接验证和分类标签转换
+
+        Args:
+            config: 配置字典，包含WordPress站点信息和API密钥
+            client: 共享的异步HTTP连接池
+        """
+        self.config = config
+        self.wp_url = config.get('wp_url')
+        self.wp_username = config.get('wp_username')
+        self.wp_password = config.get('wp_password')
+
+        # 初始化异步API客户端，共用同一个连接池
+        self.wp_api = AsyncWordPressAPI(self.wp_url, self.wp_username, self.wp_password, client)
+        self.external_api = AsyncExternalAPI(client)
+
+        # 分类和标签
+        self.categories = []
+        self.tags = []
+        self.category_names = config.get('category_names', [])
+        self.tag_names = config.get('tag_names', [])
+
+        # 特色图片尺寸
+        self.image_width = config.get('image_width', IMAGE_WIDTH)
+        self.image_height = config.get('image_height', IMAGE_HEIGHT)
+
+        # 如果启用了智普AI
+        self.use_zhipu_ai = config.get('use_zhipu_ai', False)
+        if self.use_zhipu_ai:
+            limiter = AsyncTokenBucketLimiter(
+                config.get('zhipu_requests_per_minute', ZHIPU_REQUESTS_PER_MINUTE),
+                config.get('zhipu_tokens_per_minute', ZHIPU_TOKENS_PER_MINUTE),
+                config.get('zhipu_max_in_flight', ZHIPU_MAX_IN_FLIGHT)
+            )
+            self.zhipu_api = AsyncZhipuAIClient(config.get('zhipu_api_key', ''), client,
+                                                cache=open_classification_cache(config), limiter=limiter,
+                                                stream=config.get('zhipu_stream', ZHIPU_STREAM))
+            logger.info("已启用智普AI自动分类功能")
+            # combined：一次请求同时返回分类和标签；separate：分类与标签分别请求
+            self.classification_mode = config.get('zhipu_classification_mode', ZHIPU_CLASSIFICATION_MODE)
+        else:
+            self.zhipu_api = None
+
+        # 本地预分类器：置信度足够高的文章直接在本地判断，不调用AI
+        self._init_local_classifier(config)
+
+        # 合并模式下，将同时处理的多篇文章的分类请求合并为一次请求
+        self.classifier = self.zhipu_api
+        zhipu_batch_size = int(config.get('zhipu_batch_size', ZHIPU_BATCH_SIZE))
+        if self.zhipu_api and self.classification_mode == 'combined' and zhipu_batch_size > 1:
+            self.classifier = AsyncClassificationBatcher(self.zhipu_api, zhipu_batch_size,
+                                                         config.get('zhipu_batch_wait', ZHIPU_BATCH_WAIT))
+
+        self.posts_per_minute = config.get('posts_per_minute', 0)
+        # 每次通过批量接口提交的文章数，大于1时分组发布
+        self.publish_batch_size = max(1, int(config.get('publish_batch_size', 1)))
+
+        # 有效期内的本地站点缓存可直接提供分类标签映射（热启动）
+        self.site_cache = open_site_cache(config)
+        self.warm_start = self.site_cache is not None and self.wp_api.attach_site_cache(self.site_cache)
+        self._verify_task = None
+
+    async def setup(self) -> None:
+        """验证WordPress连接，探测站点允许上传的图片格式，将分类和标签名称转换为ID，并准备共享样式表"""
+        if self.warm_start:
+            # 热启动：跳过启动时的连接验证，改为在后台校验
+            logger.info("使用本地站点缓存热启动，连接验证与缓存一致性校验将在后台进行")
+        else:
+            await self.wp_api.validate_connection()
+            await self.wp_api.get_media_capabilities()
+
+        # 转换分类和标签名称为ID，缺失的通过批量接口一次性创建（热启动时均从缓存索引中查找）
+        updated_config = await async_convert_taxonomy_names_to_ids(self.config, self.wp_api)
+        self.categories = updated_config.get('categories', [])
+        self.tags = updated_config.get('tags', [])
+        if not self.warm_start:
+            # 热启动时不写回未经校验的快照，避免刷新有效期，改为在后台校验成功后保存
+            self.wp_api.save_site_cache()
+
+        await self._prepare_styles()
+
+        if self.warm_start:
+            self._verify_task = asyncio.ensure_future(self._verify_site_cache())
+
+    async def close(self) -> None:
+        """结束仍在进行的后台缓存校验，应在关闭共享连接池之前调用"""
+        if self._verify_task is not None and not self._verify_task.done():
+            self._verify_task.cancel()
+            try:
+                await self._verify_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _prepare_styles(self) -> None:
+        """写出带版本号的共享样式表文件，shared模式下在站点注册；注册失败时本次运行退回内联样式"""
+        path = self._stylesheet_to_register()
+        if path:
+            result = await self.wp_api.ensure_stylesheet(get_stylesheet(), stylesheet_version())
+            self._handle_stylesheet_result(result, path)
+
+    async def _verify_site_cache(self) -> None:
+        """后台校验热启动使用的本地缓存：验证连接，增量刷新分类标签并更新ID，校验成功后写回缓存"""
+        try:
+            await self.wp_api.validate_connection()
+            await self.wp_api.get_media_capabilities()
+            await self.wp_api.refresh_term_caches()
+
+            updated_config = await async_convert_taxonomy_names_to_ids(self.config, self.wp_api)
+            categories = updated_config.get('categories', [])
+            tags = updated_config.get('tags', [])
+            if categories != self.categories or tags != self.tags:
+                logger.info("站点分类标签已变化，已根据最新数据更新")
+                self.categories = categories
+                self.tags = tags
+                self.wp_api.save_site_cache()
+        except Exception as e:
+            logger.error(f"后台校验站点缓存失败: {str(e)}")
+
+    async def auto_publish_article(self, keyword: str,
+                                   rate_limiter: Optional[AsyncRateLimiter] = None) -> Dict[str, Any]:
+        """自动发布文章的完整流程
+
+        Args:
+            keyword: 文章关键词
+            rate_limiter: 发布速率限制器，仅在创建文章前获取许可
+
+        Returns:
+            包含发布结果的字典
+        """
+        prepared = await self.prepare_article(keyword)
+        if not prepared.get('success'):
+            return prepared
+
+        # 发布文章
+        if rate_limiter:
+            await rate_limiter.acquire()
+        result = await self.wp_api.publish_post(**prepared['post'])
+        if result.get('success'):
+            self.wp_api.remember_media(prepared.get('media'))
+        return result
+
+    async def prepare_article(self, keyword: str) -> Dict[str, Any]:
+        """准备待发布的文章：获取内容、格式化、分配分类标签、上传特色图片
+
+        Args:
+            keyword: 文章关键词
+
+        Returns:
+            成功时包含post（publish_post所需参数）和media（本次新上传的特色图片，文章创建成功后
+            交给wp_api.remember_media()登记）的字典，失败时包含error
+        """
+        # 上游服务已熔断时快速失败，避免整批任务消耗在超时上
+        for url in (self.external_api.ai_search_api_url, self.wp_api.wp_api_url):
+            if is_circuit_open(url):
+                return {'success': False, 'error': f"上游服务 {urlparse(url).netloc} 熔断中，跳过本篇文章"}
+
+        # 特色图片分支不依赖文章内容，与内容获取、AI分类并行执行；
+        # 文章被放弃时删除本次新上传的图片，避免媒体库中留下孤立的附件
+        image_task = asyncio.ensure_future(self._acquire_featured_media())
+
+        # 1. 获取文章内容
+        content_data = await self.external_api.get_article_content(keyword)
+        if not content_data.get('success'):
+            await self._discard_featured_media(image_task)
+            return {'success': False, 'error': f"获取文章内容失败: {content_data.get('error')}"}
+
+        # 2. 使用智普AI自动判断分类和标签（如果启用）
+        # 合并模式下一次请求同时得到分类和标签，否则分类与标签检测并行
+        if self.use_zhipu_ai and self.zhipu_api:
+            if self.classification_mode == 'combined':
+                classify_task = asyncio.ensure_future(self._assign_taxonomies_by_ai(keyword, content_data))
+            else:
+                classify_task = asyncio.ensure_future(asyncio.gather(
+                    self._assign_categories_by_ai(keyword, content_data),
+                    self._assign_tags_by_ai(keyword, content_data)
+                ))
+        else:
+            classify_task = None
+
+        # 3. 格式化文章内容
+        formatted_article = ContentFormatter.format_article_content(content_data)
+        if not formatted_article.get('title') or not formatted_article.get('content'):
+            if classify_task:
+                classify_task.cancel()
+            await self._discard_featured_media(image_task)
+            return {'success': False, 'error': "格式化文章内容失败"}
+
+        try:
+            if classify_task:
+                article_categories, article_tags = await classify_task
+            else:
+                # 如果未启用AI，则使用配置中的所有分类和标签
+                article_categories = self.categories.copy()
+                article_tags = self.tags.copy()
+        except Exception:
+            await self._discard_featured_media(image_task)
+            raise
+
+        # 4. 等待特色图片获取与上传完成
+        featured_media_id, new_media = await image_task
+
+        return {
+            'success': True,
+            'media': new_media,
+            'post': {
+                'title': formatted_article.get('title'),
+                'content': formatted_article.get('content'),
+                'categories': article_categories,
+                'tags': article_tags,
+                'featured_media_id': featured_media_id
+            }
+        }
+
+    async def _acquire_featured_media(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """获取并上传特色图片
+
+        Returns:
+            元组(媒体ID, 本次新上传的媒体)，失败时媒体ID为None；复用已有媒体时后者为None。
+            新上传的媒体在文章创建成功后交给wp_api.remember_media()，放弃文章时删除
+        """
+        image_data = await self.external_api.get_featured_image(self.image_width, self.image_height)
+        if not image_data.get('success'):
+            logger.warning(f"获取特色图片失败: {image_data.get('error')}，将继续发布文章但没有特色图片")
+            return None, None
+
+        media_data = await self.wp_api.upload_media(image_data.get('url'))
+        if not media_data.get('success'):
+            logger.warning(f"上传特色图片失败: {media_data.get('error')}，将继续发布文章但没有特色图片")
+            return None, None
+
+        return media_data.get('media_id'), None if media_data.get('reused') else media_data
+
+    async def _discard_featured_media(self, image_task: asyncio.Future) -> None:
+        """放弃文章时处理特色图片任务
+
+        上传请求发出后取消任务无法阻止站点创建附件，因此等待任务完成，再删除本次新上传的媒体。
+
+        Args:
+            image_task: _acquire_featured_media的任务
+        """
+        try:
+            media_id, new_media = await image_task
+        except Exception:
+            return
+        if media_id and new_media:
+            await self.wp_api.delete_media(media_id)
+
+    async def _assign_categories_by_ai(self, keyword: str, content_data: Dict[str, Any]) -> List[int]:
+        """使用AI为文章分配分类
+
+        Args:
+            keyword: 文章关键词
+            content_data: 文章内容数据
+
+        Returns:
+            分类ID列表
+        """
+        if not self.category_names:
+            return self.categories.copy()
+
+        summary = content_data.get('text', '')[:200]
+        category_name = self._local_category(keyword)
+        if category_name is None:
+            category_name, from_model = await self.zhipu_api.detect_category(keyword, summary, self.category_names,
+                                                                             with_source=True)
+            if from_model:
+                self._learn_decision(keyword, category_name, [])
+        return await self._category_ids_for(category_name)
+
+    async def _category_ids_for(self, category_name: str) -> List[int]:
+        """将AI检测到的分类名称转换为分类ID列表
+
+        Args:
+            category_name: 分类名称
+
+        Returns:
+            分类ID列表，无法确定时返回默认分类
+        """
+        category_id = await self.wp_api.get_category_id_by_name(category_name) if category_name else None
+        return self._category_ids_from(category_name, category_id)
+
+    async def _assign_tags_by_ai(self, keyword: str, content_data: Dict[str, Any]) -> List[int]:
+        """使用AI为文章分配标签
+
+        Args:
+            keyword: 文章关键词
+            content_data: 文章内容数据
+
+        Returns:
+            标签ID列表
+        """
+        if not self.tag_names:
+            return self.tags.copy()
+
+        try:
+            summary = content_data.get('text', '')[:300]
+            tag_names = self._local_tags(keyword)
+            if tag_names is None:
+                tag_names, from_model = await self.zhipu_api.detect_tags(keyword, summary, self.tag_names,
+                                                                         with_source=True)
+                if from_model:
+                    self._learn_decision(keyword, None, tag_names)
+            return await self._tag_ids_for(tag_names)
+        except Exception as e:
+            logger.error(f"AI分配标签出错: {str(e)}")
+            return self.tags.copy()
+
+    async def _tag_ids_for(self, tag_names: List[str]) -> List[int]:
+        """将AI检测到的标签名称转换为标签ID列表
+
+        Args:
+            tag_names: 标签名称列表
+
+        Returns:
+            标签ID列表，没有有效标签时返回配置中的所有标签
+        """
+        try:
+            return self._tag_ids_from([(tag_name, await self.wp_api.get_tag_id_by_name(tag_name))
+                                       for tag_name in tag_names])
+        except Exception as e:
+            logger.error(f"AI分配标签出错: {str(e)}")
+            return self.tags.copy()
+
+    async def _assign_taxonomies_by_ai(self, keyword: str,
+                                       content_data: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+        """使用AI一次请求同时为文章分配分类和标签
+
+        Args:
+            keyword: 文章关键词
+            content_data: 文章内容数据
+
+        Returns:
+            (分类ID列表, 标签ID列表)
+        """
+        # 只有一侧设置了名称时，合并请求没有意义，按单独检测处理
+        if not self.category_names or not self.tag_names:
+            return tuple(await asyncio.gather(
+                self._assign_categories_by_ai(keyword, content_data),
+                self._assign_tags_by_ai(keyword, content_data)
+            ))
+
+        summary = content_data.get('text', '')[:300]
+        # 本地预分类器足够确定时不再调用AI
+        result = self._local_taxonomies(keyword)
+        if result is None:
+            result = await self.classifier.classify(keyword, summary, self.category_names, self.tag_names)
+            if result.get('from_model'):
+                self._learn_decision(keyword, result.get('category'), result.get('tags', []))
+        return (await self._category_ids_for(result.get('category')),
+                await self._tag_ids_for(result.get('tags', [])))
+
+    async def batch_publish_articles(self, keywords: List[str], delay_seconds: int = 300,
+                                     max_concurrency: int = 100) -> List[Dict[str, Any]]:
+        """并发批量发布多篇文章
+
+        Args:
+            keywords: 关键词列表
+            delay_seconds: 未配置posts_per_minute时，用于推算发布速率的间隔时间（秒）
+            max_concurrency: 同时处理的最大文章数
+
+        Returns:
+            包含所有发布结果的列表，顺序与关键词列表一致
+        """
+        rate_per_minute = publish_rate_per_minute(self.posts_per_minute, delay_seconds)
+        rate_limiter = AsyncRateLimiter(rate_per_minute)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        if self.publish_batch_size > 1:
+            return await self._grouped_batch_publish(keywords, semaphore, rate_limiter)
+
+        async def publish_one(index: int, keyword: str) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"开始处理第 {index + 1}/{len(keywords)} 篇文章，关键词: {keyword}")
+                try:
+                    result = await self.auto_publish_article(keyword, rate_limiter=rate_limiter)
+                except Exception as e:
+                    logger.error(f"发布文章 '{keyword}' 时出错: {str(e)}")
+                    result = {'success': False, 'error': str(e)}
+                return {'keyword': keyword, 'result': result}
+
+        # gather按传入顺序返回结果
+        return await asyncio.gather(*(publish_one(i, keyword) for i, keyword in enumerate(keywords)))
+
+    async def _grouped_batch_publish(self, keywords: List[str], semaphore: asyncio.Semaphore,
+                                     rate_limiter: AsyncRateLimiter) -> List[Dict[str, Any]]:
+        """并发准备文章，并按publish_batch_size分组通过批量接口发布
+
+        Args:
+            keywords: 关键词列表
+            semaphore: 限制同时准备的文章数
+            rate_limiter: 发布速率限制器，每篇文章获取一次许可
+
+        Returns:
+            包含所有发布结果的列表，顺序与关键词列表一致
+        """
+        results = [None] * len(keywords)
+        pending = []  # 已准备好待发布的(序号, prepare_article的结果)
+
+        async def prepare_one(index: int, keyword: str) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"开始处理第 {index + 1}/{len(keywords)} 篇文章，关键词: {keyword}")
+                try:
+                    return await self.prepare_article(keyword)
+                except Exception as e:
+                    logger.error(f"准备文章 '{keyword}' 时出错: {str(e)}")
+                    return {'success': False, 'error': str(e)}
+
+        async def flush() -> None:
+            for _ in pending:
+                await rate_limiter.acquire()
+            logger.info(f"批量发布 {len(pending)} 篇文章")
+            publish_results = await self.wp_api.publish_posts([prepared['post'] for _, prepared in pending])
+            # 将每个子请求的结果对应回关键词，文章创建成功后登记其新上传的特色图片
+            for (index, prepared), result in zip(pending, publish_results):
+                results[index] = result
+                if result.get('success'):
+                    self.wp_api.remember_media(prepared.get('media'))
+            pending.clear()
+
+        tasks = [asyncio.ensure_future(prepare_one(i, keyword)) for i, keyword in enumerate(keywords)]
+        for index, task in enumerate(tasks):
+            prepared = await task
+            if not prepared.get('success'):
+                results[index] = prepared
+                continue
+            pending.append((index, prepared))
+            if len(pending) >= self.publish_batch_size:
+                await flush()
+        if pending:
+            await flush()
+
+        return [{'keyword': keyword, 'result': result} for keyword, result in zip(keywords, results)]
+
+
+async def async_batch_publish_articles(config: Dict[str, Any], keywords: List[str],
+                                       delay_seconds: int = 300) -> List[Dict[str, Any]]:
+    """异步批量发布入口：创建共享连接池和异步发布器，并发发布所有文章
+
+    Args:
+        config: 配置字典
+        keywords: 关键词列表
+        delay_seconds: 未配置posts_per_minute时，用于推算发布速率的间隔时间（秒）
+
+    Returns:
+        包含所有发布结果的列表，顺序与关键词列表一致
+    """
+    configure_http(config)
+    configure_resilience(config)
+    configure_images(config)
+    configure_styles(config)
+    configure_templates(config)
+    max_concurrency = max(1, int(config.get('async_concurrency', 100)))
+
+    # 连接池大小与并发数一致，其他连接设置与同步客户端共用同一份配置
+    # 共享连接池中只有智普AI的分类请求可安全重复，允许其POST在5xx时重试
+    async with create_async_client(pool_size=max_concurrency,
+                                   retry_post_hosts=[urlparse(ZHIPU_API_URL).netloc]) as client:
+        publisher = AsyncWordPressPublisher(config, client)
+        await publisher.setup()
+        try:
+            return await publisher.batch_publish_articles(keywords, delay_seconds, max_concurrency)
+        finally:
+            await publisher.close()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""发布任务持久化队列
+
+每个关键词对应一条任务，记录当前阶段及各阶段产物（文章内容、格式化后的HTML及其样式输出方式、分类标签ID、
+特色图片ID及本任务新上传的媒体、文章链接），
+保存在WAL模式的SQLite中。获取、渲染、发布等工作进程各自领取所处阶段的任务并推进，
+进程中断后已完成阶段的产物不会丢失；被领取但未完成的任务在租约到期后可被重新领取。
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Dict, Any, List
+
+from config.api_config import JOB_STORE_PATH, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY
+
+# 任务阶段，按推进顺序排列
+STAGES = ('queued', 'fetched', 'formatted', 'classified', 'media_uploaded', 'published')
+
+# 以JSON保存的产物字段
+_JSON_FIELDS = ('content', 'categories', 'tags', 'uploaded_media')
+
+# 可由advance()写入的产物字段
+_ARTIFACT_FIELDS = ('content', 'title', 'html', 'style_mode', 'categories', 'tags', 'featured_media_id',
+                    'uploaded_media', 'post_id', 'post_link')
+
+
+class JobStore:
+    """基于SQLite（WAL模式）的任务队列，线程安全，也可被多个工作进程同时使用"""
+
+    def __init__(self, path: str, lease_seconds: float = JOB_LEASE_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, retry_delay: float = JOB_RETRY_DELAY):
+        """打开（必要时创建）任务数据库
+
+        Args:
+            path: 数据库文件路径
+            lease_seconds: 领取任务的租约时长（秒），超时未完成的任务可被重新领取
+            max_attempts: 同一阶段的最大尝试次数，达到后不再领取，需手动重试
+            retry_delay: 失败的任务至少间隔多少秒后才会被再次领取
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # 区分不同工作进程（线程）的租约，避免租约过期后旧的持有者覆盖新结果
+        self.owner = uuid.uuid4().hex
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        # 手动管理事务，领取任务时使用BEGIN IMMEDIATE在进程间互斥
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                keyword TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                content TEXT,
+                title TEXT,
+                html TEXT,
+                style_mode TEXT,
+                categories TEXT,
+                tags TEXT,
+                featured_media_id INTEGER,
+                uploaded_media TEXT,
+                post_id INTEGER,
+                post_link TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_stage ON jobs (stage, updated_at);
+        """)
+        # 旧版本创建的数据库缺少style_mode、uploaded_media列
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ('style_mode', 'uploaded_media'):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+
+    def enqueue(self, keywords: List[str]) -> int:
+        """添加关键词任务，已存在的关键词保持原状态
+
+        Args:
+            keywords: 关键词列表
+
+        Returns:
+            新添加的任务数
+        """
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (keyword, stage, created_at, updated_at) VALUES (?, 'queued', ?, ?)",
+                    [(keyword, now, now) for keyword in keywords]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def claim(self, stages: List[str], limit: int) -> List[Dict[str, Any]]:
+        """领取处于指定阶段、未被占用、未超过尝试次数且不在重试等待期内的任务
+
+        Args:
+            stages: 可领取的阶段列表
+            limit: 最多领取的任务数
+
+        Returns:
+            任务字典列表，按最后更新时间先后排列
+        """
+        now = time.time()
+        placeholders = ', '.join('?' for _ in stages)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE stage IN ({placeholders}) AND attempts < ? "
+                    f"AND (lease_until IS NULL OR lease_until < ?) AND (attempts = 0 OR updated_at < ?) "
+                    f"ORDER BY updated_at LIMIT ?",
+                    (*stages, self.max_attempts, now, now - self.retry_delay, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET lease_owner = ?, lease_until = ? WHERE keyword = ?",
+                    [(self.owner, now + self.lease_seconds, row['keyword']) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [self._to_job(row) for row in rows]
+
+    def advance(self, keyword: str, stage: str, release: bool = True, **artifacts) -> bool:
+        """将已领取的任务推进到新阶段并保存产物
+
+        Args:
+            keyword: 关键词
+            stage: 新阶段
+            release: 是否释放租约，同一工作进程继续推进后续阶段时为False（同时续约）
+            **artifacts: 本阶段的产物，例如content、title、html、categories、tags等
+
+        Returns:
+            是否更新成功（租约已被其他进程接管时返回False）
+        """
+        unknown = set(artifacts) - set(_ARTIFACT_FIELDS)
+        if stage not in STAGES or unknown:
+            raise ValueError(f"无效的任务阶段或产物: {stage} {', '.join(sorted(unknown))}")
+
+        values = {field: json.dumps(value, ensure_ascii=False) if field in _JSON_FIELDS else value
+                  for field, value in artifacts.items()}
+        now = time.time()
+        if release:
+            values.update(lease_owner=None, lease_until=None)
+        else:
+            # 继续持有时顺便续约
+            values['lease_until'] = now + self.lease_seconds
+        assignments = ''.join(f"{field} = ?, " for field in values)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}stage = ?, error = NULL, attempts = 0, updated_at = ? "
+                f"WHERE keyword = ? AND lease_owner = ?",
+                (*values.values(), stage, now, keyword, self.owner)
+            )
+        return cursor.rowcount > 0
+
+    def renew(self, keyword: str) -> bool:
+        """延长已领取任务的租约，在耗时较长的步骤（例如等待发布限速）之前调用
+
+        Args:
+            keyword: 关键词
+
+        Returns:
+            是否续约成功（租约已过期并被其他进程接管时返回False）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE keyword = ? AND lease_owner = ?",
+                (time.time() + self.lease_seconds, keyword, self.owner)
+            )
+        return cursor.rowcount > 0
+
+    def record_post(self, keyword: str, post_id: int, post_link: str) -> None:
+        """记录已创建的文章并将任务标记为published
+
+        文章已经存在于WordPress中，无论租约是否仍由本进程持有都会写入，
+        避免其他进程重新领取任务后重复发布。
+
+        Args:
+            keyword: 关键词
+            post_id: 文章ID
+            post_link: 文章链接
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET post_id = ?, post_link = ?, stage = 'published', error = NULL, attempts = 0, "
+                "lease_owner = NULL, lease_until = NULL, updated_at = ? WHERE keyword = ?",
+                (post_id, post_link, time.time(), keyword)
+            )
+
+    def fail(self, keyword: str, error: str) -> bool:
+        """记录任务在当前阶段失败，释放租约；达到最大尝试次数后不再被领取
+
+        Args:
+            keyword: 关键词
+            error: 错误信息
+
+        Returns:
+            任务是否已达到最大尝试次数（租约已被其他进程接管时返回False）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET error = ?, attempts = attempts + 1, lease_owner = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE keyword = ? AND lease_owner = ?",
+                (error, time.time(), keyword, self.owner)
+            )
+            if cursor.rowcount == 0:
+                return False
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE keyword = ?", (keyword,)).fetchone()
+        return row is not None and row['attempts'] >= self.max_attempts
+
+    def drop_media(self, keyword: str) -> bool:
+        """已达到最大尝试次数的任务删除新上传的特色图片后，退回classified阶段，重试时重新获取特色图片
+
+        Args:
+            keyword: 关键词
+
+        Returns:
+            是否更新成功（任务已被重置重试或已发布时返回False）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET stage = 'classified', featured_media_id = NULL, uploaded_media = NULL, "
+                "updated_at = ? WHERE keyword = ? AND stage = 'media_uploaded' AND attempts >= ?",
+                (time.time(), keyword, self.max_attempts)
+            )
+        return cursor.rowcount > 0
+
+    def release(self, keyword: str) -> None:
+        """释放任务的租约但不计入尝试次数（例如上游服务熔断时）"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_owner = NULL, lease_until = NULL WHERE keyword = ? AND lease_owner = ?",
+                (keyword, self.owner)
+            )
+
+    def retry_failed(self) -> int:
+        """重置已达到最大尝试次数的任务，使其可以再次被领取
+
+        Returns:
+            重置的任务数
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET attempts = 0, updated_at = ? WHERE attempts >= ? AND stage != 'published'",
+                (time.time(), self.max_attempts)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """统计各阶段的任务数
+
+        Returns:
+            阶段 → {'total': 任务数, 'failed': 已达到最大尝试次数的任务数}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*), SUM(attempts >= ?) FROM jobs GROUP BY stage", (self.max_attempts,)
+            ).fetchall()
+        counts = {stage: {'total': 0, 'failed': 0} for stage in STAGES}
+        for stage, total, failed in rows:
+            counts[stage] = {'total': total, 'failed': failed or 0}
+        return counts
+
+    def failures(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """列出最近失败的任务
+
+        Args:
+            limit: 最多列出的任务数
+
+        Returns:
+            包含keyword、stage、attempts和error的字典列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT keyword, stage, attempts, error FROM jobs WHERE error IS NOT NULL "
+                "ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for field in _JSON_FIELDS:
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+
+def open_job_store(config: Dict[str, Any]) -> JobStore:
+    """根据配置打开任务队列
+
+    Args:
+        config: 配置字典，读取job_store_path、job_lease_seconds、job_max_attempts和job_retry_delay字段
+
+    Returns:
+        JobStore实例
+    """
+    path = config.get('job_store_path') or JOB_STORE_PATH
+    if not os.path.isabs(path):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, path)
+    return JobStore(path, float(config.get('job_lease_seconds', JOB_LEASE_SECONDS)),
+                    int(config.get('job_max_attempts', JOB_MAX_ATTEMPTS)),
+                    float(config.get('job_retry_delay', JOB_RETRY_DELAY)))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""任务队列的阶段工作进程
+
+fetch：领取queued任务，获取文章内容 → fetched
+render：领取fetched任务，批量格式化文章（可使用进程池）→ formatted，同时记录渲染时的样式输出方式
+publish：领取formatted及之后阶段的任务，依次分配分类标签 → classified、上传特色图片 → media_uploaded、
+         创建文章 → published，每一步完成后立即保存，中断后从最后完成的阶段继续；
+         渲染时的样式输出方式与本次发布可用的方式不一致时（例如共享样式表注册失败），发布前按当前方式重新渲染
+
+各阶段相互独立，可在不同时间或不同进程中运行，例如低峰期预先获取和渲染，需要时再高速发布。
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+
+from api.external_api import ExternalAPI
+from api.http_session import configure_http
+from api.resilience import configure_resilience, is_circuit_open
+from core.job_store import JobStore
+from utils.content_formatter import ContentFormatter
+from utils.formatters.stylesheet import configure_styles, get_style_mode
+from utils.formatters.templates import configure_templates
+from utils.rate_limiter import RateLimiter, publish_rate_per_minute
+from config.api_config import JOB_CLAIM_BATCH, FORMAT_WORKERS, FORMAT_CHUNK_SIZE, FORMAT_POOL_MIN, PUBLISH_INTERVAL
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+def _drain(store: JobStore, stages: List[str], handler: Callable[[List[Dict[str, Any]]], bool],
+           batch_size: int, limit: Optional[int], poll: float) -> int:
+    """反复领取任务交给handler处理，直到没有可领取的任务或达到limit
+
+    Args:
+        store: 任务队列
+        stages: 可领取的阶段
+        handler: 处理一批任务，返回False时停止（例如上游服务熔断）
+        batch_size: 每次领取的任务数
+        limit: 最多处理的任务数，None表示不限制
+        poll: 大于0时，没有任务也不退出，每隔poll秒重新领取
+
+    Returns:
+        处理的任务数
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        jobs = store.claim(stages, batch_size if limit is None else min(batch_size, limit - processed))
+        if not jobs:
+            if poll > 0:
+                time.sleep(poll)
+                continue
+            break
+        processed += len(jobs)
+        if not handler(jobs):
+            break
+    return processed
+
+
+def run_fetch(config: Dict[str, Any], store: JobStore, limit: Optional[int] = None, poll: float = 0) -> int:
+    """获取阶段：为queued任务获取文章内容
+
+    Args:
+        config: 配置字典
+        store: 任务队列
+        limit: 最多处理的任务数
+        poll: 大于0时持续等待新任务的轮询间隔（秒）
+
+    Returns:
+        处理的任务数
+    """
+    configure_http(config)
+    configure_resilience(config)
+    external_api = ExternalAPI()
+    workers = max(1, int(config.get('max_workers', 1)))
+
+    def fetch_one(job: Dict[str, Any]) -> None:
+        keyword = job['keyword']
+        if is_circuit_open(external_api.ai_search_api_url):
+            store.release(keyword)
+            return
+        try:
+            content_data = external_api.get_article_content(keyword)
+        except Exception as e:
+            content_data = {'success': False, 'error': str(e)}
+        if content_data.get('success'):
+            if store.advance(keyword, 'fetched', content=content_data):
+                logger.info(f"任务 '{keyword}' 已获取文章内容")
+            else:
+                logger.warning(f"任务 '{keyword}' 的租约已被其他进程接管，丢弃本次获取的内容")
+        else:
+            store.fail(keyword, f"获取文章内容失败: {content_data.get('error')}")
+
+    def handle(jobs: List[Dict[str, Any]]) -> bool:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+            list(executor.map(fetch_one, jobs))
+        if is_circuit_open(external_api.ai_search_api_url):
+            logger.warning("内容接口熔断中，停止获取，剩余任务将在下次运行时继续")
+            return False
+        return True
+
+    # 每轮只领取工作线程能立即处理的任务数，避免排队中的任务超出租约
+    return _drain(store, ['queued'], handle, workers, limit, poll)
+
+
+def run_render(config: Dict[str, Any], store: JobStore, limit: Optional[int] = None, poll: float = 0) -> int:
+    """渲染阶段：批量格式化fetched任务，不需要连接WordPress
+
+    Args:
+        config: 配置字典，读取format_workers和format_chunk_size字段
+        store: 任务队列
+        limit: 最多处理的任务数
+        poll: 大于0时持续等待新任务的轮询间隔（秒）
+
+    Returns:
+        处理的任务数
+    """
+    configure_styles(config)
+    configure_templates(config)
+    workers = config.get('format_workers', FORMAT_WORKERS)
+    chunk_size = int(config.get('format_chunk_size', FORMAT_CHUNK_SIZE))
+
+    def handle(jobs: List[Dict[str, Any]]) -> bool:
+        style_mode = get_style_mode()
+        articles = ContentFormatter.format_many((job['content'] for job in jobs), workers, chunk_size)
+        for job, article in zip(jobs, articles):
+            if article.get('title') and article.get('content'):
+                if not store.advance(job['keyword'], 'formatted', title=article['title'], html=article['content'],
+                                     style_mode=style_mode):
+                    logger.warning(f"任务 '{job['keyword']}' 的租约已被其他进程接管，丢弃本次渲染结果")
+            else:
+                store.fail(job['keyword'], "格式化文章内容失败")
+        logger.info(f"已渲染 {len(jobs)} 篇文章")
+        return True
+
+    # 使用进程池时一次领取足够多的任务，达到启动进程池的门槛
+    batch_size = max(JOB_CLAIM_BATCH, FORMAT_POOL_MIN * 4) if workers != 0 else JOB_CLAIM_BATCH
+    return _drain(store, ['fetched'], handle, batch_size, limit, poll)
+
+
+def run_publish(config: Dict[str, Any], store: JobStore, limit: Optional[int] = None, poll: float = 0,
+                publisher=None) -> int:
+    """发布阶段：分配分类标签、上传特色图片并创建文章，每一步完成后保存
+
+    Args:
+        config: 配置字典
+        store: 任务队列
+        limit: 最多处理的任务数
+        poll: 大于0时持续等待新任务的轮询间隔（秒）
+        publisher: 已初始化的WordPressPublisher，为None时根据配置创建
+
+    Returns:
+        处理的任务数
+    """
+    if publisher is None:
+        # 在函数内导入，只运行获取或渲染阶段时不需要初始化发布器
+        from core.publisher import WordPressPublisher
+        publisher = WordPressPublisher(config)
+    # 与批量发布相同：未配置posts_per_minute时按publish_interval换算发布速率
+    rate_limiter = RateLimiter(publish_rate_per_minute(publisher.posts_per_minute,
+                                                       config.get('publish_interval', PUBLISH_INTERVAL)))
+    wp_url = publisher.wp_api.wp_api_url
+
+    def publish_one(job: Dict[str, Any]) -> None:
+        keyword = job['keyword']
+        if is_circuit_open(wp_url):
+            store.release(keyword)
+            return
+        # 本任务新上传、尚未登记到去重缓存的特色图片，重试时沿用
+        new_media = job['uploaded_media']
+        try:
+            if job['stage'] == 'formatted':
+                job['categories'], job['tags'] = publisher.classify_article(keyword, job['content'])
+                if not store.advance(keyword, 'classified', release=False,
+                                     categories=job['categories'], tags=job['tags']):
+                    logger.warning(f"任务 '{keyword}' 的租约已被其他进程接管，放弃处理")
+                    return
+                job['stage'] = 'classified'
+
+            if job['stage'] == 'classified':
+                job['featured_media_id'], new_media = publisher.acquire_featured_media()
+                if not store.advance(keyword, 'media_uploaded', release=False,
+                                     featured_media_id=job['featured_media_id'], uploaded_media=new_media):
+                    logger.warning(f"任务 '{keyword}' 的租约已被其他进程接管，放弃处理")
+                    # 接管的进程会重新获取特色图片，本次上传的媒体不会被引用
+                    if new_media:
+                        publisher.wp_api.delete_media(new_media['media_id'])
+                    return
+
+            # 渲染时省略了内联样式，但本次运行无法使用共享样式表（或反之）时，按当前方式重新渲染
+            if job['style_mode'] != get_style_mode():
+                logger.info(f"任务 '{keyword}' 渲染时的样式输出方式为 {job['style_mode']}，"
+                            f"本次发布使用 {get_style_mode()}，重新渲染文章")
+                article = ContentFormatter.format_article_content(job['content'])
+                if not article.get('content'):
+                    raise ValueError("重新渲染文章内容失败")
+                job['html'] = article['content']
+
+            # 等待限速后续约，确认租约仍由本进程持有再创建文章
+            rate_limiter.acquire()
+            if not store.renew(keyword):
+                logger.warning(f"任务 '{keyword}' 的租约已被其他进程接管，放弃发布")
+                return
+            result = publisher.wp_api.publish_post(title=job['title'], content=job['html'],
+                                                   categories=job['categories'], tags=job['tags'],
+                                                   featured_media_id=job['featured_media_id'])
+        except Exception as e:
+            logger.error(f"发布任务 '{keyword}' 时出错: {str(e)}")
+            result = {'success': False, 'error': str(e)}
+
+        if result.get('success'):
+            # 文章已创建，立即记录文章ID，之后任何步骤出错都不会导致重复发布
+            store.record_post(keyword, result.get('post_id'), result.get('post_link'))
+            publisher.wp_api.remember_media(new_media)
+        elif store.fail(keyword, f"发布失败: {result.get('error')}") and new_media:
+            # 达到最大尝试次数后删除本任务新上传的特色图片，避免媒体库中留下无人引用的文件；
+            # 删除失败时保留记录，重试时仍沿用该媒体
+            if publisher.wp_api.delete_media(new_media['media_id']).get('success'):
+                store.drop_media(keyword)
+
+    def handle(jobs: List[Dict[str, Any]]) -> bool:
+        with ThreadPoolExecutor(max_workers=publisher.max_workers, thread_name_prefix="publisher") as executor:
+            list(executor.map(publish_one, jobs))
+        if is_circuit_open(wp_url):
+            logger.warning("WordPress接口熔断中，停止发布，剩余任务将在下次运行时继续")
+            return False
+        return True
+
+    # 每轮只领取工作线程能立即处理的任务数，已领取的任务不会排队等待发布限速而超出租约
+    return _drain(store, ['formatted', 'classified', 'media_uploaded'], handle,
+                  publisher.max_workers, limit, poll)
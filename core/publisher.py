@@ -5,7 +5,10 @@ import time
 import logging
 import sys
 import os
-from typing import Dict, List, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlparse
 
 # 添加项目根目录到系统路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,15 +16,27 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 使用正确的导入路径
 from api.wordpress_api import WordPressAPI
 from api.external_api import ExternalAPI
-from api.zhipu_ai import ZhipuAIClient  # 使用更新后的类名
+from api.zhipu_ai import ZhipuAIClient, ClassificationBatcher  # 使用更新后的类名
 from utils.content_formatter import ContentFormatter  # 使用全路径导入
 from config.taxonomy_converter import convert_taxonomy_names_to_ids
+from utils.rate_limiter import RateLimiter, TokenBucketLimiter, publish_rate_per_minute
+from api.http_session import configure_http
+from api.resilience import configure_resilience, is_circuit_open
+from api.site_cache import open_site_cache
+from api.classification_cache import open_classification_cache
+from utils.image_encoder import configure_images
+from utils.formatters.stylesheet import configure_styles, get_stylesheet, stylesheet_version
+from utils.formatters.templates import configure_templates
+from core.publisher_base import PublisherBase
+from config.api_config import (IMAGE_WIDTH, IMAGE_HEIGHT, ZHIPU_CLASSIFICATION_MODE, ZHIPU_BATCH_SIZE,
+                               ZHIPU_BATCH_WAIT, ZHIPU_REQUESTS_PER_MINUTE, ZHIPU_TOKENS_PER_MINUTE,
+                               ZHIPU_MAX_IN_FLIGHT, ZHIPU_STREAM)
 
 # 获取logger
 logger = logging.getLogger("WordPressPublisher")
 
 
-class WordPressPublisher:
+class WordPressPublisher(PublisherBase):
     """WordPress自动发布文章类"""
 
     def __init__(self, config: Dict[str, Any]):
@@ -34,15 +49,41 @@ class WordPressPublisher:
         self.wp_username = config.get('wp_username')
         self.wp_password = config.get('wp_password')
         
+        # 根据配置设置共享HTTP连接池、重试熔断策略、图片编码进程池、文章样式输出方式与布局模板
+        configure_http(config)
+        configure_resilience(config)
+        configure_images(config)
+        configure_styles(config)
+        configure_templates(config)
+
         # 初始化API客户端
         self.wp_api = WordPressAPI(self.wp_url, self.wp_username, self.wp_password)
         self.external_api = ExternalAPI()
         
-        # 验证WordPress连接
-        self.wp_api.validate_connection()
+        # 有效期内的本地站点缓存可直接提供分类标签映射（热启动）
+        self.site_cache = open_site_cache(config)
+        warm_start = self.site_cache is not None and self.wp_api.attach_site_cache(self.site_cache)
+        
+        if warm_start:
+            # 热启动：跳过启动时的连接验证，改为在后台校验
+            logger.info("使用本地站点缓存热启动，连接验证与缓存一致性校验将在后台进行")
+        else:
+            # 验证WordPress连接，并探测站点允许上传的图片格式和大小
+            self.wp_api.validate_connection()
+            self.wp_api.get_media_capabilities()
         
-        # 转换分类和标签名称为ID
+        # 转换分类和标签名称为ID（热启动时均从缓存索引中查找）
         updated_config = convert_taxonomy_names_to_ids(config, self.wp_api)
+        if not warm_start:
+            # 只保存刚从站点拉取的数据；热启动时原样写回会刷新有效期，使快照永不过期，
+            # 改为在后台校验成功后再保存
+            self.wp_api.save_site_cache()
+
+        # 共享样式表模式下在站点注册一次样式表（同一版本命中站点缓存时不发请求）
+        self._prepare_styles()
+        
+        # 按需在后台增量刷新分类标签缓存
+        self.wp_api.start_background_refresh(config.get('taxonomy_refresh_interval', 0))
         
         # 分类和标签
         self.categories = updated_config.get('categories', [])
@@ -50,67 +91,236 @@ class WordPressPublisher:
         self.category_names = config.get('category_names', [])
         self.tag_names = config.get('tag_names', [])  # 添加标签名称属性
         
+        # 特色图片尺寸
+        self.image_width = config.get('image_width', IMAGE_WIDTH)
+        self.image_height = config.get('image_height', IMAGE_HEIGHT)
+        
         # 如果启用了智普AI
         self.use_zhipu_ai = config.get('use_zhipu_ai', False)
         if self.use_zhipu_ai:
-            self.zhipu_api = ZhipuAIClient(config.get('zhipu_api_key', ''))  # 使用更新后的类名
+            limiter = TokenBucketLimiter(
+                config.get('zhipu_requests_per_minute', ZHIPU_REQUESTS_PER_MINUTE),
+                config.get('zhipu_tokens_per_minute', ZHIPU_TOKENS_PER_MINUTE),
+                config.get('zhipu_max_in_flight', ZHIPU_MAX_IN_FLIGHT)
+            )
+            self.zhipu_api = ZhipuAIClient(config.get('zhipu_api_key', ''),  # 使用更新后的类名
+                                           cache=open_classification_cache(config), limiter=limiter,
+                                           stream=config.get('zhipu_stream', ZHIPU_STREAM))
             logger.info("已启用智普AI自动分类功能")
+            # combined：一次请求同时返回分类和标签；separate：分类与标签分别请求
+            self.classification_mode = config.get('zhipu_classification_mode', ZHIPU_CLASSIFICATION_MODE)
         else:
             self.zhipu_api = None
 
-    def auto_publish_article(self, keyword: str) -> Dict[str, Any]:
+        # 并发发布设置：工作线程数与全局发布速率（篇/分钟）
+        self.max_workers = max(1, int(config.get('max_workers', 1)))
+        self.posts_per_minute = config.get('posts_per_minute', 0)
+        # 每次通过批量接口提交的文章数，大于1时分组发布
+        self.publish_batch_size = max(1, int(config.get('publish_batch_size', 1)))
+
+        # 单篇文章内部的阶段并行线程池（图片、分类、标签等分支），与批量发布线程池相互独立
+        stage_workers = config.get('stage_workers') or max(4, self.max_workers * 3)
+        self._stage_executor = ThreadPoolExecutor(max_workers=stage_workers, thread_name_prefix="stage")
+
+        # 本地预分类器：置信度足够高的文章直接在本地判断，不调用AI
+        self._init_local_classifier(config)
+
+        # 合并模式下并发发布时，将各线程同时发起的分类请求合并为多篇文章的单次请求
+        self.classifier = self.zhipu_api
+        zhipu_batch_size = int(config.get('zhipu_batch_size', ZHIPU_BATCH_SIZE))
+        if (self.zhipu_api and self.classification_mode == 'combined'
+                and zhipu_batch_size > 1 and self.max_workers > 1):
+            self.classifier = ClassificationBatcher(self.zhipu_api, zhipu_batch_size,
+                                                    config.get('zhipu_batch_wait', ZHIPU_BATCH_WAIT))
+
+        if warm_start:
+            threading.Thread(target=self._verify_site_cache, args=(config,),
+                             name="site-cache-verify", daemon=True).start()
+
+    def _prepare_styles(self) -> None:
+        """写出带版本号的共享样式表文件，shared模式下在站点注册；注册失败时本次运行退回内联样式"""
+        path = self._stylesheet_to_register()
+        if path:
+            result = self.wp_api.ensure_stylesheet(get_stylesheet(), stylesheet_version())
+            self._handle_stylesheet_result(result, path)
+
+    def _verify_site_cache(self, config: Dict[str, Any]) -> None:
+        """后台校验热启动使用的本地缓存：验证连接，增量刷新分类标签并更新ID，校验成功后写回缓存
+        
+        Args:
+            config: 配置字典
+        """
+        try:
+            self.wp_api.validate_connection()
+            self.wp_api.get_media_capabilities()
+            self.wp_api.refresh_term_caches()
+
+            updated_config = convert_taxonomy_names_to_ids(config, self.wp_api)
+            categories = updated_config.get('categories', [])
+            tags = updated_config.get('tags', [])
+            if categories != self.categories or tags != self.tags:
+                logger.info("站点分类标签已变化，已根据最新数据更新")
+                self.categories = categories
+                self.tags = tags
+                self.wp_api.save_site_cache()
+        except Exception as e:
+            logger.error(f"后台校验站点缓存失败: {str(e)}")
+
+    def auto_publish_article(self, keyword: str, rate_limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
         """自动发布文章的完整流程
         
         Args:
             keyword: 文章关键词
+            rate_limiter: 发布速率限制器，仅在创建文章前获取许可
             
         Returns:
             包含发布结果的字典
         """
+        prepared = self.prepare_article(keyword)
+        if not prepared.get('success'):
+            return prepared
+
+        # 发布文章
+        if rate_limiter:
+            rate_limiter.acquire()
+        result = self.wp_api.publish_post(**prepared['post'])
+        if result.get('success'):
+            self.wp_api.remember_media(prepared.get('media'))
+        return result
+
+    def prepare_article(self, keyword: str) -> Dict[str, Any]:
+        """准备待发布的文章：获取内容、格式化、分配分类标签、上传特色图片
+        
+        Args:
+            keyword: 文章关键词
+            
+        Returns:
+            成功时包含post（publish_post所需参数）和media（本次新上传的特色图片，文章创建成功后
+            交给wp_api.remember_media()登记）的字典，失败时包含error
+        """
+        # 上游服务已熔断时快速失败，避免整批任务消耗在超时上
+        for url in (self.external_api.ai_search_api_url, self.wp_api.wp_api_url):
+            if is_circuit_open(url):
+                return {'success': False, 'error': f"上游服务 {urlparse(url).netloc} 熔断中，跳过本篇文章"}
+
+        # 特色图片分支不依赖文章内容，最先提交以与内容获取、AI分类并行执行；
+        # 文章被放弃时删除本次新上传的图片，避免媒体库中留下孤立的附件
+        image_future = self._stage_executor.submit(self._upload_featured_media)
+
         # 1. 获取文章内容
         content_data = self.external_api.get_article_content(keyword)
         if not content_data.get('success'):
+            self._discard_featured_media(image_future)
             return {'success': False, 'error': f"获取文章内容失败: {content_data.get('error')}"}
 
-        # 2. 格式化文章内容
+        # 2. 使用智普AI自动判断分类和标签（如果启用）
+        # 合并模式下一次请求同时得到分类和标签，否则分类与标签检测互相并行
+        classify_future = category_future = tag_future = None
+        if self.use_zhipu_ai and self.zhipu_api:
+            if self.classification_mode == 'combined':
+                classify_future = self._stage_executor.submit(self._assign_taxonomies_by_ai, keyword, content_data)
+            else:
+                category_future = self._stage_executor.submit(self._assign_categories_by_ai, keyword, content_data)
+                tag_future = self._stage_executor.submit(self._assign_tags_by_ai, keyword, content_data)
+
+        # 3. 格式化文章内容（在当前线程中执行，与上述分支重叠）
         formatted_article = ContentFormatter.format_article_content(content_data)
         if not formatted_article.get('title') or not formatted_article.get('content'):
+            self._discard_featured_media(image_future)
             return {'success': False, 'error': "格式化文章内容失败"}
+
+        try:
+            if classify_future:
+                article_categories, article_tags = classify_future.result()
+            elif category_future and tag_future:
+                article_categories = category_future.result()
+                article_tags = tag_future.result()
+            else:
+                # 如果未启用AI，则使用配置中的所有分类和标签
+                article_categories = self.categories.copy()
+                article_tags = self.tags.copy()
+        except Exception:
+            self._discard_featured_media(image_future)
+            raise
+
+        # 4. 等待特色图片获取与上传完成
+        featured_media_id, new_media = image_future.result()
+
+        return {
+            'success': True,
+            'media': new_media,
+            'post': {
+                'title': formatted_article.get('title'),
+                'content': formatted_article.get('content'),
+                'categories': article_categories,
+                'tags': article_tags,
+                'featured_media_id': featured_media_id
+            }
+        }
+    
+    def classify_article(self, keyword: str, content_data: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+        """为文章分配分类和标签（依次执行，供任务队列的分类阶段使用）
+        
+        Args:
+            keyword: 文章关键词
+            content_data: 文章内容数据
             
-        # 3. 使用智普AI自动判断分类和标签（如果启用）
-        if self.use_zhipu_ai and self.zhipu_api:
-            article_categories = self._assign_categories_by_ai(keyword, content_data)
-            article_tags = self._assign_tags_by_ai(keyword, content_data)
-        else:
-            # 如果未启用AI，则使用配置中的所有分类和标签
-            article_categories = self.categories.copy()
-            article_tags = self.tags.copy()
-
-        # 4. 获取特色图片
-        image_data = self.external_api.get_featured_image()
-        if not image_data.get('success'):
-            logger.warning(f"获取特色图片失败: {image_data.get('error')}，将继续发布文章但没有特色图片")
-            featured_media_id = None
-        else:
-            # 5. 上传特色图片
+        Returns:
+            (分类ID列表, 标签ID列表)
+        """
+        if not (self.use_zhipu_ai and self.zhipu_api):
+            # 未启用AI时使用配置中的所有分类和标签
+            return self.categories.copy(), self.tags.copy()
+        if self.classification_mode == 'combined':
+            return self._assign_taxonomies_by_ai(keyword, content_data)
+        return (self._assign_categories_by_ai(keyword, content_data),
+                self._assign_tags_by_ai(keyword, content_data))
+
+    def acquire_featured_media(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """获取并上传特色图片
+        
+        Returns:
+            元组(媒体ID, 本次新上传的媒体)，说明见_upload_featured_media
+        """
+        return self._upload_featured_media()
+
+    def _upload_featured_media(self) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """获取并上传特色图片
+        
+        Returns:
+            元组(媒体ID, 本次新上传的媒体)，失败时媒体ID为None；复用已有媒体时后者为None。
+            新上传的媒体在文章创建成功后交给wp_api.remember_media()，放弃文章时删除
+        """
+        try:
+            image_data = self.external_api.get_featured_image(self.image_width, self.image_height)
+            if not image_data.get('success'):
+                logger.warning(f"获取特色图片失败: {image_data.get('error')}，将继续发布文章但没有特色图片")
+                return None, None
+
             media_data = self.wp_api.upload_media(image_data.get('url'))
             if not media_data.get('success'):
                 logger.warning(f"上传特色图片失败: {media_data.get('error')}，将继续发布文章但没有特色图片")
-                featured_media_id = None
-            else:
-                featured_media_id = media_data.get('media_id')
-
-        # 6. 发布文章
-        publish_result = self.wp_api.publish_post(
-            title=formatted_article.get('title'),
-            content=formatted_article.get('content'),
-            categories=article_categories,
-            tags=article_tags,
-            featured_media_id=featured_media_id
-        )
-
-        return publish_result
-    
+                return None, None
+
+            return media_data.get('media_id'), None if media_data.get('reused') else media_data
+        except Exception as e:
+            logger.warning(f"处理特色图片时出错: {str(e)}，将继续发布文章但没有特色图片")
+            return None, None
+
+    def _discard_featured_media(self, image_future) -> None:
+        """放弃文章时取消特色图片任务；已开始的上传无法中止，等待其完成后删除新上传的媒体
+
+        新上传的媒体在文章创建前不会被其他文章复用，删除它不会影响并发处理的其他文章。
+
+        Args:
+            image_future: _upload_featured_media的Future
+        """
+        if image_future.cancel():
+            return
+        media_id, new_media = image_future.result()
+        if media_id and new_media:
+            self.wp_api.delete_media(media_id)
+
     def _assign_categories_by_ai(self, keyword: str, content_data: Dict[str, Any]) -> List[int]:
         """使用AI为文章分配分类
         
@@ -128,19 +338,26 @@ class WordPressPublisher:
         # 从文章内容中提取摘要（取前200个字符）
         summary = content_data.get('text', '')[:200]
         
-        # 使用AI判断分类
-        category_name = self.zhipu_api.detect_category(keyword, summary, self.category_names)
-        
-        # 获取分类ID并返回
-        if category_name:
-            category_id = self.wp_api.get_category_id_by_name(category_name)
-            if category_id:
-                logger.info(f"AI分配的分类: '{category_name}' (ID: {category_id})")
-                return [category_id]  # 只返回AI检测到的分类
+        # 先在本地判断，不够确定时再使用AI判断分类
+        category_name = self._local_category(keyword)
+        if category_name is None:
+            category_name, from_model = self.zhipu_api.detect_category(keyword, summary, self.category_names,
+                                                                       with_source=True)
+            if from_model:
+                self._learn_decision(keyword, category_name, [])
+        return self._category_ids_for(category_name)
+
+    def _category_ids_for(self, category_name: str) -> List[int]:
+        """将AI检测到的分类名称转换为分类ID列表
         
-        # 如果AI无法检测，则返回默认分类
-        logger.warning("AI无法确定分类，使用默认分类")
-        return [1]  # WordPress默认分类ID为1
+        Args:
+            category_name: 分类名称
+            
+        Returns:
+            分类ID列表，无法确定时返回默认分类
+        """
+        category_id = self.wp_api.get_category_id_by_name(category_name) if category_name else None
+        return self._category_ids_from(category_name, category_id)
     
     def _assign_tags_by_ai(self, keyword: str, content_data: Dict[str, Any]) -> List[int]:
         """使用AI为文章分配标签
@@ -160,35 +377,75 @@ class WordPressPublisher:
             # 从文章内容中提取摘要（取前300个字符）
             summary = content_data.get('text', '')[:300]
             
-            # 检测标签
-            tag_names = self.zhipu_api.detect_tags(keyword, summary, self.tag_names)
-            
-            tag_ids = []
-            for tag_name in tag_names:
-                tag_id = self.wp_api.get_tag_id_by_name(tag_name)
-                if tag_id:
-                    tag_ids.append(tag_id)
-                    logger.info(f"AI分配的标签: '{tag_name}' (ID: {tag_id})")
-            
-            if tag_ids:
-                return tag_ids
-                
-            # 如果没有检测到标签，使用默认标签
+            # 检测标签，本地不够确定时再使用AI
+            tag_names = self._local_tags(keyword)
+            if tag_names is None:
+                tag_names, from_model = self.zhipu_api.detect_tags(keyword, summary, self.tag_names,
+                                                                   with_source=True)
+                if from_model:
+                    self._learn_decision(keyword, None, tag_names)
+            return self._tag_ids_for(tag_names)
+        except Exception as e:
+            logger.error(f"AI分配标签出错: {str(e)}")
             return self.tags.copy()
+
+    def _tag_ids_for(self, tag_names: List[str]) -> List[int]:
+        """将AI检测到的标签名称转换为标签ID列表
+        
+        Args:
+            tag_names: 标签名称列表
+            
+        Returns:
+            标签ID列表，没有有效标签时返回配置中的所有标签
+        """
+        try:
+            return self._tag_ids_from([(tag_name, self.wp_api.get_tag_id_by_name(tag_name))
+                                       for tag_name in tag_names])
         except Exception as e:
             logger.error(f"AI分配标签出错: {str(e)}")
             return self.tags.copy()
     
-    def batch_publish_articles(self, keywords: List[str], delay_seconds: int = 300) -> List[Dict[str, Any]]:
+    def _assign_taxonomies_by_ai(self, keyword: str, content_data: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+        """使用AI一次请求同时为文章分配分类和标签
+        
+        Args:
+            keyword: 文章关键词
+            content_data: 文章内容数据
+            
+        Returns:
+            (分类ID列表, 标签ID列表)
+        """
+        # 只有一侧设置了名称时，合并请求没有意义，按单独检测处理
+        if not self.category_names or not self.tag_names:
+            return (self._assign_categories_by_ai(keyword, content_data),
+                    self._assign_tags_by_ai(keyword, content_data))
+
+        # 摘要长度与单独检测标签时一致（取前300个字符）
+        summary = content_data.get('text', '')[:300]
+        # 本地预分类器足够确定时不再调用AI
+        result = self._local_taxonomies(keyword)
+        if result is None:
+            result = self.classifier.classify(keyword, summary, self.category_names, self.tag_names)
+            if result.get('from_model'):
+                self._learn_decision(keyword, result.get('category'), result.get('tags', []))
+        return self._category_ids_for(result.get('category')), self._tag_ids_for(result.get('tags', []))
+
+    def batch_publish_articles(self, keywords: List[str], delay_seconds: int = 300,
+                               max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """批量发布多篇文章
         
         Args:
             keywords: 关键词列表
             delay_seconds: 发布间隔时间（秒）
+            max_workers: 并发工作线程数，大于1时启用并发流水线模式，默认使用配置值
             
         Returns:
             包含所有发布结果的列表
         """
+        workers = max_workers if max_workers is not None else self.max_workers
+        if workers > 1 and len(keywords) > 1:
+            return self._concurrent_batch_publish(keywords, delay_seconds, workers)
+
         results = []
 
         for i, keyword in enumerate(keywords):
@@ -207,3 +464,91 @@ class WordPressPublisher:
                 time.sleep(delay_seconds)
 
         return results
+
+    def _concurrent_batch_publish(self, keywords: List[str], delay_seconds: int,
+                                  max_workers: int) -> List[Dict[str, Any]]:
+        """并发流水线模式批量发布文章
+
+        内容获取、AI分类、图片上传等网络I/O在多个关键词之间重叠执行，
+        只有创建文章这一步受全局发布速率限制，结果按关键词顺序返回。
+
+        Args:
+            keywords: 关键词列表
+            delay_seconds: 未配置posts_per_minute时，用于推算发布速率的间隔时间（秒）
+            max_workers: 并发工作线程数
+
+        Returns:
+            包含所有发布结果的列表，顺序与关键词列表一致
+        """
+        rate_per_minute = publish_rate_per_minute(self.posts_per_minute, delay_seconds)
+        rate_limiter = RateLimiter(rate_per_minute)
+
+        rate_desc = f"{rate_per_minute:.2f} 篇/分钟" if rate_per_minute else "不限制"
+        logger.info(f"启用并发发布模式，工作线程数: {max_workers}，发布速率: {rate_desc}")
+
+        if self.publish_batch_size > 1:
+            return self._grouped_batch_publish(keywords, max_workers, rate_limiter)
+
+        def publish_one(index: int, keyword: str) -> Dict[str, Any]:
+            logger.info(f"开始处理第 {index + 1}/{len(keywords)} 篇文章，关键词: {keyword}")
+            try:
+                return self.auto_publish_article(keyword, rate_limiter=rate_limiter)
+            except Exception as e:
+                logger.error(f"发布文章 '{keyword}' 时出错: {str(e)}")
+                return {'success': False, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="publisher") as executor:
+            futures = [executor.submit(publish_one, i, keyword) for i, keyword in enumerate(keywords)]
+            # 按提交顺序收集结果，保证与关键词顺序一致
+            return [{'keyword': keyword, 'result': future.result()}
+                    for keyword, future in zip(keywords, futures)]
+
+    def _grouped_batch_publish(self, keywords: List[str], max_workers: int,
+                               rate_limiter: RateLimiter) -> List[Dict[str, Any]]:
+        """并发准备文章，并按publish_batch_size分组通过批量接口发布
+
+        Args:
+            keywords: 关键词列表
+            max_workers: 并发工作线程数
+            rate_limiter: 发布速率限制器，每篇文章获取一次许可
+
+        Returns:
+            包含所有发布结果的列表，顺序与关键词列表一致
+        """
+        results = [None] * len(keywords)
+        pending = []  # 已准备好待发布的(序号, prepare_article的结果)
+
+        def prepare_one(index: int, keyword: str) -> Dict[str, Any]:
+            logger.info(f"开始处理第 {index + 1}/{len(keywords)} 篇文章，关键词: {keyword}")
+            try:
+                return self.prepare_article(keyword)
+            except Exception as e:
+                logger.error(f"准备文章 '{keyword}' 时出错: {str(e)}")
+                return {'success': False, 'error': str(e)}
+
+        def flush() -> None:
+            for _ in pending:
+                rate_limiter.acquire()
+            logger.info(f"批量发布 {len(pending)} 篇文章")
+            publish_results = self.wp_api.publish_posts([prepared['post'] for _, prepared in pending])
+            # 将每个子请求的结果对应回关键词，文章创建成功后登记其新上传的特色图片
+            for (index, prepared), result in zip(pending, publish_results):
+                results[index] = result
+                if result.get('success'):
+                    self.wp_api.remember_media(prepared.get('media'))
+            pending.clear()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="publisher") as executor:
+            futures = [executor.submit(prepare_one, i, keyword) for i, keyword in enumerate(keywords)]
+            for index, future in enumerate(futures):
+                prepared = future.result()
+                if not prepared.get('success'):
+                    results[index] = prepared
+                    continue
+                pending.append((index, prepared))
+                if len(pending) >= self.publish_batch_size:
+                    flush()
+            if pending:
+                flush()
+
+        return [{'keyword': keyword, 'result': result} for keyword, result in zip(keywords, results)]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from utils.local_classifier import LocalClassifier
+from utils.formatters.stylesheet import get_style_mode, set_style_mode, write_stylesheet
+from config.api_config import LOCAL_CLASSIFIER_THRESHOLD
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+
+class PublisherBase:
+    """WordPressPublisher与AsyncWordPressPublisher共用的逻辑
+
+    只包含不涉及网络请求的部分：本地预分类器的判断与学习、分类标签名称到ID的结果整理、
+    共享样式表的准备。两个发布器只负责以同步或异步方式调用API客户端。
+    """
+
+    def _init_local_classifier(self, config: Dict[str, Any]) -> None:
+        """创建本地预分类器：置信度足够高的文章直接在本地判断，不调用AI"""
+        self.local_classifier = None
+        local_threshold = float(config.get('local_classifier_threshold', LOCAL_CLASSIFIER_THRESHOLD))
+        if self.zhipu_api and local_threshold > 0:
+            self.local_classifier = LocalClassifier(self.category_names, self.tag_names, local_threshold,
+                                                    store=self.zhipu_api.cache)
+
+    def _learn_decision(self, keyword: str, category_name: Optional[str], tag_names: List[str]) -> None:
+        """让本地预分类器学习AI做出的分类决定，只应传入模型本次成功给出的结果（不含默认值和缓存结果）"""
+        if self.local_classifier:
+            self.local_classifier.learn(keyword, category_name, tag_names)
+
+    def _local_category(self, keyword: str) -> Optional[str]:
+        """在本地判断分类，不够确定时返回None（需要调用AI）"""
+        if not self.local_classifier:
+            return None
+        category_name = self.local_classifier.detect_category(keyword)
+        self.local_classifier.record(category_name is not None)
+        return category_name
+
+    def _local_tags(self, keyword: str) -> Optional[List[str]]:
+        """在本地判断标签，不够确定时返回None（需要调用AI）"""
+        if not self.local_classifier:
+            return None
+        tag_names = self.local_classifier.detect_tags(keyword)
+        self.local_classifier.record(tag_names is not None)
+        return tag_names
+
+    def _local_taxonomies(self, keyword: str) -> Optional[Dict[str, Any]]:
+        """在本地同时判断分类和标签，不够确定时返回None（需要调用AI）"""
+        if not self.local_classifier:
+            return None
+        return self.local_classifier.classify(keyword, self.category_names, self.tag_names)
+
+    @staticmethod
+    def _category_ids_from(category_name: Optional[str], category_id: Optional[int]) -> List[int]:
+        """整理AI检测到的分类对应的分类ID列表
+
+        Args:
+            category_name: 分类名称
+            category_id: 该名称在站点上的ID，未找到时为None
+
+        Returns:
+            分类ID列表，无法确定时返回默认分类
+        """
+        if category_name and category_id:
+            logger.info(f"AI分配的分类: '{category_name}' (ID: {category_id})")
+            return [category_id]  # 只返回AI检测到的分类
+
+        # 如果AI无法检测，则返回默认分类
+        logger.warning("AI无法确定分类，使用默认分类")
+        return [1]  # WordPress默认分类ID为1
+
+    def _tag_ids_from(self, tag_pairs: List[Tuple[str, Optional[int]]]) -> List[int]:
+        """整理AI检测到的标签对应的标签ID列表
+
+        Args:
+            tag_pairs: (标签名称, 站点上的ID)列表，未找到的ID为None
+
+        Returns:
+            标签ID列表，没有有效标签时返回配置中的所有标签
+        """
+        tag_ids = []
+        for tag_name, tag_id in tag_pairs:
+            if tag_id:
+                tag_ids.append(tag_id)
+                logger.info(f"AI分配的标签: '{tag_name}' (ID: {tag_id})")
+
+        # 如果没有检测到标签，使用默认标签
+        return tag_ids or self.tags.copy()
+
+    @staticmethod
+    def _stylesheet_to_register() -> Optional[str]:
+        """写出带版本号的共享样式表文件
+
+        Returns:
+            shared模式下返回需要在站点注册的样式表文件路径，其他模式返回None
+        """
+        mode = get_style_mode()
+        if mode == 'inline':
+            return None
+
+        path = write_stylesheet()
+        if mode == 'external':
+            logger.info(f"文章不再内联样式，请确保主题已引入共享样式表: {path}")
+            return None
+        return path
+
+    @staticmethod
+    def _handle_stylesheet_result(result: Dict[str, Any], path: str) -> None:
+        """处理在站点注册共享样式表的结果，注册失败时本次运行退回内联样式"""
+        if not result.get('success'):
+            set_style_mode('inline')
+            logger.warning(f"无法在站点注册共享样式表: {result.get('error')}，本次运行仍内联样式；"
+                           f"可将 {path} 的内容添加到站点的额外CSS中，并将style_mode设为external")
@@ -5,29 +5,137 @@
 
 import sys
 import os
+import asyncio
+import logging
+import argparse
 import traceback
 
 # 添加项目根目录到系统路径
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, ROOT_DIR)
 
-# 创建日志目录
-log_dir = os.path.join(ROOT_DIR, 'logs')
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
 # 导入自定义模块
 from utils.logger_config import setup_logger
 from config.loader import load_config
 from config.validator import validate_config
+from config.api_config import PUBLISH_INTERVAL
 from core.publisher import WordPressPublisher
-
-# 设置日志记录器 - 每次运行创建新的日志文件
-logger = setup_logger()
+from core.async_publisher import async_batch_publish_articles
+from api.resilience import get_resilience_stats
+from utils.image_encoder import get_image_stats, shutdown_image_pool
+from api.classification_cache import get_classification_cache_stats
+from utils.local_classifier import get_local_classifier_stats
+from utils.formatters.stylesheet import get_style_stats
+from core.job_store import open_job_store
+from core.job_workers import run_fetch, run_render, run_publish
+
+# 获取logger，处理器在main()中设置：进程池的spawn工作进程会以__mp_main__重新导入本模块，
+# 导入时不能创建日志目录或日志文件
+logger = logging.getLogger("WordPressPublisher")
+
+
+def log_stats(article_count: int) -> None:
+    """输出本次运行的上游、缓存、样式和图片编码统计
+
+    Args:
+        article_count: 本次处理的文章数
+    """
+    # 输出各上游主机的重试与熔断统计
+    for host, stats in get_resilience_stats().items():
+        logger.info(f"上游 {host}: 请求 {stats['requests']} 次，重试 {stats['retries']} 次，"
+                    f"失败 {stats['failures']} 次，熔断拒绝 {stats['short_circuited']} 次，"
+                    f"熔断器状态 {stats['state']}")
+
+    # 输出分类结果缓存统计
+    cache_stats = get_classification_cache_stats()
+    if cache_stats['hits'] or cache_stats['misses']:
+        logger.info(f"AI分类缓存: 命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次，"
+                    f"淘汰 {cache_stats['evictions']} 条")
+
+    # 输出本地预分类统计
+    local_stats = get_local_classifier_stats()
+    if local_stats['resolved'] or local_stats['deferred']:
+        logger.info(f"本地预分类: 本地判断 {local_stats['resolved']} 次（节省AI调用），"
+                    f"交给AI {local_stats['deferred']} 次，学习新决定 {local_stats['learned']} 条")
+
+    # 输出共享样式表去重统计
+    style_stats = get_style_stats()
+    if style_stats['blocks'] and article_count:
+        logger.info(f"共享样式表: 省略 {style_stats['blocks']} 个内联样式块，节省 {style_stats['bytes_saved']} 字节"
+                    f"（平均每篇 {style_stats['bytes_saved'] // article_count} 字节）")
+
+    # 输出图片编码统计
+    image_stats = get_image_stats()
+    if image_stats['images']:
+        logger.info(f"图片编码: 共 {image_stats['images']} 张，失败 {image_stats['failures']} 张"
+                    f"（超时 {image_stats['timeouts']} 张），平均编码 {image_stats['avg_encode_seconds'] * 1000:.0f} ms，"
+                    f"最长 {image_stats['max_encode_seconds'] * 1000:.0f} ms，"
+                    f"平均排队 {image_stats['avg_wait_seconds'] * 1000:.0f} ms，"
+                    f"体积 {image_stats['bytes_in']} → {image_stats['bytes_out']} 字节")
+
+
+def parse_args(argv=None):
+    """解析命令行参数：不带子命令时按原方式一次性获取并发布配置中的全部关键词"""
+    parser = argparse.ArgumentParser(description="WordPress自动发布工具")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    enqueue = subparsers.add_parser('enqueue', help="将关键词加入任务队列（默认使用配置中的关键词）")
+    enqueue.add_argument('keywords', nargs='*', help="关键词")
+
+    for name, help_text in (('fetch', "获取阶段：为排队的任务获取文章内容"),
+                            ('render', "渲染阶段：批量格式化已获取的文章"),
+                            ('publish', "发布阶段：分配分类标签、上传特色图片并发布已渲染的文章"),
+                            ('run', "依次运行获取、渲染和发布阶段")):
+        worker = subparsers.add_parser(name, help=help_text)
+        worker.add_argument('--limit', type=int, default=None, help="每个阶段最多处理的任务数")
+        if name != 'run':
+            worker.add_argument('--poll', type=float, default=0,
+                                help="大于0时持续运行，没有任务时每隔指定秒数重新检查")
+
+    subparsers.add_parser('status', help="查看任务队列各阶段的任务数和最近的失败")
+    subparsers.add_parser('retry', help="重置已达到最大尝试次数的失败任务")
+    return parser.parse_args(argv)
+
+
+def run_queue_command(config, args) -> int:
+    """执行任务队列子命令"""
+    store = open_job_store(config)
+    try:
+        if args.command == 'enqueue':
+            keywords = args.keywords or config.get('keywords', [])
+            added = store.enqueue(keywords)
+            logger.info(f"已加入 {added} 个新任务（共提交 {len(keywords)} 个关键词）")
+        elif args.command == 'retry':
+            logger.info(f"已重置 {store.retry_failed()} 个失败任务")
+        elif args.command in ('fetch', 'render', 'publish', 'run'):
+            processed = 0
+            poll = getattr(args, 'poll', 0)
+            if args.command in ('fetch', 'run'):
+                processed += run_fetch(config, store, args.limit, poll)
+            if args.command in ('render', 'run'):
+                processed += run_render(config, store, args.limit, poll)
+            if args.command in ('publish', 'run'):
+                processed += run_publish(config, store, args.limit, poll)
+            logger.info(f"本次共处理 {processed} 个任务阶段")
+            log_stats(processed)
+
+        # 各命令执行后都输出队列状态
+        for stage, count in store.counts().items():
+            failed = f"（{count['failed']} 个已达到最大尝试次数）" if count['failed'] else ""
+            print(f"{stage:<15} {count['total']:6d}{failed}")
+        if args.command == 'status':
+            for job in store.failures():
+                print(f"❌ '{job['keyword']}' 在 {job['stage']} 阶段失败 {job['attempts']} 次: {job['error']}")
+    finally:
+        store.close()
+    return 0
 
 
-def main():
+def main(argv=None):
     """主程序入口"""
+    args = parse_args(argv)
+    # 设置日志记录器 - 每次运行创建新的日志文件（同时创建日志目录）
+    setup_logger()
     try:
         # 加载配置
         config = load_config()
@@ -37,8 +145,9 @@ def main():
             logger.error("配置验证失败，程序退出")
             sys.exit(1)
 
-        # 初始化发布器
-        publisher = WordPressPublisher(config)
+        # 任务队列子命令：各阶段分别推进持久化的任务
+        if args.command:
+            return run_queue_command(config, args)
 
         # 获取关键词列表
         keywords = config.get('keywords', [])
@@ -47,16 +156,29 @@ def main():
             keywords = ["旅游业最新发展"]
 
         # 获取发布间隔
-        publish_interval = config.get('publish_interval', 10)
-
-        # 批量发布文章
-        logger.info(f"开始批量发布文章，共 {len(keywords)} 篇，间隔 {publish_interval} 秒")
-        results = publisher.batch_publish_articles(keywords, delay_seconds=publish_interval)
+        publish_interval = config.get('publish_interval', PUBLISH_INTERVAL)
+
+        if config.get('use_async', False):
+            # 使用asyncio异步客户端批量发布文章
+            logger.info(f"开始异步批量发布文章，共 {len(keywords)} 篇")
+            results = asyncio.run(async_batch_publish_articles(config, keywords, delay_seconds=publish_interval))
+        else:
+            # 初始化发布器
+            publisher = WordPressPublisher(config)
+
+            # 批量发布文章
+            if publisher.max_workers > 1:
+                logger.info(f"开始并发批量发布文章，共 {len(keywords)} 篇，工作线程数 {publisher.max_workers}")
+            else:
+                logger.info(f"开始批量发布文章，共 {len(keywords)} 篇，间隔 {publish_interval} 秒")
+            results = publisher.batch_publish_articles(keywords, delay_seconds=publish_interval)
 
         # 统计发布结果
         success_count = sum(1 for item in results if item.get('result', {}).get('success', False))
         logger.info(f"文章发布完成，成功: {success_count}/{len(results)}")
 
+        log_stats(len(results))
+
         # 打印发布结果
         for item in results:
             keyword = item.get('keyword', '')
@@ -72,6 +194,8 @@ def main():
         logger.error(traceback.format_exc())
         print(f"程序执行出错: {str(e)}")
         return 1
+    finally:
+        shutdown_image_pool()
         
     return 0
 
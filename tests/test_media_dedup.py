@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""特色图片去重缓存与放弃文章时删除媒体之间的并发测试"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.media_stream import spool_image
+from api.site_cache import SiteCache
+from api.wordpress_api import WordPressAPI
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+IMAGE_URL = 'https://images.example.com/featured.png'
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """模拟WordPress媒体接口：记录被删除的媒体，已删除的媒体GET返回404"""
+
+    def __init__(self):
+        self.deleted = set()
+
+    def get(self, url, params=None):
+        return FakeResponse(404 if int(url.rsplit('/', 1)[1]) in self.deleted else 200)
+
+    def delete(self, url, params=None):
+        self.deleted.add(int(url.rsplit('/', 1)[1]))
+        return FakeResponse(200)
+
+
+class FakeWordPressAPI(WordPressAPI):
+    """下载和上传不访问网络，每次上传分配新的媒体ID"""
+
+    def __init__(self):
+        super().__init__('https://wp.example.com', 'user', 'password')
+        self.session = FakeSession()
+        self._next_id = 100
+        self._id_lock = threading.Lock()
+
+    def _download_image(self, image_url):
+        return spool_image([PNG_HEADER])
+
+    def _upload_image(self, image_url, image):
+        with self._id_lock:
+            self._next_id += 1
+            return {'success': True, 'media_id': self._next_id}
+
+
+@pytest.fixture
+def wp_api(tmp_path):
+    api = FakeWordPressAPI()
+    api.attach_site_cache(SiteCache(str(tmp_path / 'site_cache.db')))
+    return api
+
+
+def test_concurrent_article_does_not_reuse_upload_of_abandoned_article(wp_api):
+    """文章A上传图片后、创建文章前，文章B使用同一图片；A被放弃删除媒体后，B引用的媒体仍然存在"""
+    a_uploaded = threading.Event()
+    b_uploaded = threading.Event()
+    a_abandoned = threading.Event()
+    results = {}
+
+    def article_a():
+        results['a'] = wp_api.upload_media(IMAGE_URL)
+        a_uploaded.set()
+        assert b_uploaded.wait(5)
+        # 文章A获取内容失败，删除本次新上传的特色图片
+        wp_api.delete_media(results['a']['media_id'])
+        a_abandoned.set()
+
+    def article_b():
+        assert a_uploaded.wait(5)
+        results['b'] = wp_api.upload_media(IMAGE_URL)
+        b_uploaded.set()
+        assert a_abandoned.wait(5)
+        # 文章B创建成功，登记其特色图片
+        wp_api.remember_media(results['b'])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for future in [executor.submit(article_a), executor.submit(article_b)]:
+            future.result()
+
+    assert not results['b'].get('reused')
+    assert results['b']['media_id'] != results['a']['media_id']
+    assert results['b']['media_id'] not in wp_api.session.deleted
+
+    # 之后的文章复用已发布文章的媒体，而不是被删除的媒体
+    later = wp_api.upload_media(IMAGE_URL)
+    assert later == {'success': True, 'media_id': results['b']['media_id'], 'reused': True}
+
+
+def test_uploads_are_shared_only_after_remember_media(wp_api):
+    """并发上传同一图片时各自得到新媒体，登记后才会被复用"""
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        uploads = list(executor.map(lambda _: wp_api.upload_media(IMAGE_URL), range(4)))
+
+    assert all(upload['success'] and not upload.get('reused') for upload in uploads)
+    assert len({upload['media_id'] for upload in uploads}) == 4
+    assert wp_api._find_cached_media(source_url=IMAGE_URL) is None
+
+    wp_api.remember_media(uploads[0])
+    assert wp_api.upload_media(IMAGE_URL)['media_id'] == uploads[0]['media_id']
+
+
+def test_remember_media_ignores_reused_and_failed_results(wp_api):
+    wp_api.remember_media(None)
+    wp_api.remember_media({'success': False, 'error': 'boom'})
+    wp_api.remember_media({'success': True, 'media_id': 7, 'reused': True})
+    assert wp_api._find_cached_media(source_url=IMAGE_URL) is None
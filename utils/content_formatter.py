@@ -1,9 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, Optional
 import os
 import sys
+import logging
+import itertools
+import multiprocessing
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # 添加项目根目录到系统路径，确保导入能正确工作
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,6 +20,38 @@ from utils.formatters.article_formatter import format_article_content as format_
 from utils.formatters.paragraph_formatter import format_paragraphs
 from utils.formatters.question_formatter import format_related_questions
 from utils.formatters.source_formatter import format_sources
+from utils.formatters.stylesheet import get_style_mode, set_style_mode, get_style_stats, merge_style_stats
+from utils.formatters.templates import get_template_dir, load_templates
+from config.api_config import FORMAT_WORKERS, FORMAT_CHUNK_SIZE, FORMAT_POOL_MIN
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 工作进程当前生效的样式输出方式和主题目录，相同时不重复加载
+_worker_settings = None
+
+
+def _format_chunk(contents: List[Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """在工作进程中格式化一批文章
+
+    Args:
+        contents: 文章内容数据列表
+        settings: 主进程的样式输出方式、主题目录和本批发布时间
+
+    Returns:
+        包含articles（格式化结果列表）和style_stats（本批样式统计增量）的字典
+    """
+    global _worker_settings
+    current = (settings['style_mode'], settings['template_dir'])
+    if _worker_settings != current:
+        set_style_mode(settings['style_mode'])
+        load_templates(settings['template_dir'])
+        _worker_settings = current
+
+    before = get_style_stats()
+    articles = [ContentFormatter._format_one(content_data, settings['timestamp']) for content_data in contents]
+    after = get_style_stats()
+    return {'articles': articles, 'style_stats': {key: after[key] - before[key] for key in after}}
 
 
 class ContentFormatter:
@@ -36,6 +75,81 @@ class ContentFormatter:
             ContentFormatter._format_sources
         )
 
+    @staticmethod
+    def format_many(contents: Iterable[Dict[str, Any]], workers: Optional[int] = FORMAT_WORKERS,
+                    chunk_size: int = FORMAT_CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+        """批量格式化文章，按输入顺序逐篇返回结果
+
+        整批共用一个发布时间和已加载的模板、样式设置；文章数达到FORMAT_POOL_MIN且workers不为0时，
+        按chunk_size分批提交到进程池并行格式化，进程池不可用时退回当前进程。
+
+        Args:
+            contents: 文章内容数据的可迭代对象
+            workers: 格式化进程数，0表示在当前进程中格式化，None表示按CPU核数自动设置
+            chunk_size: 每次提交给格式化进程的文章数
+
+        Yields:
+            包含格式化标题和内容的字典，与输入一一对应
+        """
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        contents = iter(contents)
+        head = list(itertools.islice(contents, FORMAT_POOL_MIN))
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1 or len(head) < FORMAT_POOL_MIN:
+            for content_data in itertools.chain(head, contents):
+                yield ContentFormatter._format_one(content_data, timestamp)
+            return
+
+        settings = {'style_mode': get_style_mode(), 'template_dir': get_template_dir(), 'timestamp': timestamp}
+        chunk_size = max(1, chunk_size)
+        pending = itertools.chain(head, contents)
+        chunks = iter(lambda: list(itertools.islice(pending, chunk_size)), [])
+
+        # 使用spawn避免fork后子进程继承发布线程已持有的锁；在途批次数有上限，不会一次读入全部输入
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        in_flight = deque()
+        futures = deque()
+        try:
+            for chunk in chunks:
+                in_flight.append(chunk)
+                futures.append(executor.submit(_format_chunk, chunk, settings))
+                while len(futures) >= workers * 2:
+                    articles = ContentFormatter._collect(futures[0])
+                    futures.popleft()
+                    in_flight.popleft()
+                    yield from articles
+            while futures:
+                articles = ContentFormatter._collect(futures[0])
+                futures.popleft()
+                in_flight.popleft()
+                yield from articles
+        except BrokenProcessPool as e:
+            logger.warning(f"格式化进程池不可用: {str(e)}，剩余文章将在当前进程中格式化")
+            for content_data in itertools.chain(itertools.chain.from_iterable(in_flight), pending):
+                yield ContentFormatter._format_one(content_data, timestamp)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _collect(future) -> List[Dict[str, str]]:
+        """取回一批格式化结果，并合并工作进程中的样式统计"""
+        result = future.result()
+        merge_style_stats(result['style_stats'])
+        return result['articles']
+
+    @staticmethod
+    def _format_one(content_data: Dict[str, Any], timestamp: str) -> Dict[str, str]:
+        """使用整批共用的发布时间格式化单篇文章"""
+        return format_article(
+            content_data,
+            format_paragraphs,
+            format_related_questions,
+            format_sources,
+            timestamp=timestamp
+        )
+
     @staticmethod
     def _format_paragraphs(text: str, content_data: Dict[str, Any] = None) -> str:
         """将文本分段并添加HTML标签，同时将Markdown格式转换为HTML格式"""
@@ -1,25 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import re
-from typing import Dict, Any
+"""正文段落格式化
 
+逐行单遍将Markdown转换为HTML：标题、列表、加粗、引用标记和段落。
+所有正则均预编译且锚定在单行内，不会跨行回溯，处理时间与文本长度成线性关系；
+输出先收集到列表中，最后一次性拼接。
+"""
 
-def format_paragraphs(text: str, content_data: Dict[str, Any] = None) -> str:
-    """将文本分段并添加HTML标签，同时将Markdown格式转换为HTML格式
-    
-    Args:
-        text: 要格式化的文本内容
-        content_data: 包含来源等信息的数据字典
-    
-    Returns:
-        格式化后的HTML内容
-    """
-    if not text:
-        return '<p>暂无相关内容</p>'
+import re
+from typing import Dict, Any, List
+
+from utils.formatters.stylesheet import style_block
 
-    # 添加现代化CSS样式 - Bootstrap/Tailwind风格的现代极简设计
-    formatted_text = '''
+# 正文样式 - Bootstrap/Tailwind风格的现代极简设计
+PARAGRAPH_STYLE = '''
     <style>
     .article-main-content {
         margin: 30px 0;
@@ -78,52 +73,84 @@ def format_paragraphs(text: str, content_data: Dict[str, Any] = None) -> str:
     </style>
     '''
 
-    # 替换Markdown标题为HTML标题
-    text = re.sub(r'##\s+(.+)', r'<h2>\1</h2>', text)
-    text = re.sub(r'###\s+(.+)', r'<h3>\1</h3>', text)
+# 标题：## 标题 / ### 标题
+_HEADING = re.compile(r'(#{2,3})\s+(.+)')
 
-    # 替换Markdown加粗为HTML加粗
-    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
+# 列表项：- 项目 / – 项目
+_LIST_ITEM = re.compile(r'[-–]\s+(.+)')
 
-    # 替换Markdown列表项为HTML列表项
-    text = re.sub(r'^–\s+(.+)$', r'<li>\1</li>', text, flags=re.MULTILINE)
-    text = re.sub(r'^-\s+(.+)$', r'<li>\1</li>', text, flags=re.MULTILINE)
+# 行内格式：**加粗** 与引用标记[数字]，合并为一个模式一次替换
+_INLINE = re.compile(r'\*\*([^*\n]+)\*\*|\[(\d+)\]')
 
-    # 检测并包装列表项
-    if re.search(r'<li>.+</li>', text):
-        # 如果有列表项但没有被ul包围，添加ul标签
-        if not re.search(r'<ul>.*<li>', text):
-            text = re.sub(r'(<li>.*</li>\n*)+', r'<ul>\n\g<0></ul>', text, flags=re.DOTALL)
 
-    # 处理引用标记[数字]为上标，并添加链接功能
-    # 首先收集所有引用标记和对应的来源链接
+def format_paragraphs(text: str, content_data: Dict[str, Any] = None) -> str:
+    """将文本分段并添加HTML标签，同时将Markdown格式转换为HTML格式
+    
+    Args:
+        text: 要格式化的文本内容
+        content_data: 包含来源等信息的数据字典
+    
+    Returns:
+        格式化后的HTML内容
+    """
+    if not text:
+        return '<p>暂无相关内容</p>'
+
+    # 收集引用标记对应的来源链接
     reference_links = {}
-    for i, source in enumerate(content_data.get('sources', []), 1):
+    for i, source in enumerate((content_data or {}).get('sources', []), 1):
         if source.get('link'):
             reference_links[str(i)] = source.get('link')
 
-    # 处理引用标记[数字]为带链接的上标
-    def add_reference_link(match):
-        ref_num = match.group(1)
+    def inline(match):
+        if match.group(1) is not None:
+            return f'<strong>{match.group(1)}</strong>'
+        ref_num = match.group(2)
         if ref_num in reference_links:
             return f'<sup><a href="{reference_links[ref_num]}" target="_blank">[{ref_num}]</a></sup>'
-        else:
-            return f'<sup>[{ref_num}]</sup>'
+        return f'<sup>[{ref_num}]</sup>'
+
+    def render(fragment: str) -> str:
+        # 不含*和[的行无需进入正则
+        if '*' in fragment or '[' in fragment:
+            return _INLINE.sub(inline, fragment)
+        return fragment
 
-    text = re.sub(r'\[(\d+)\]', add_reference_link, text)
+    # 添加样式（共享样式表模式下省略）
+    output: List[str] = [style_block(PARAGRAPH_STYLE)]
+    append = output.append
+    in_list = False
 
-    paragraphs = text.split('\n')
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            # 空行不结束列表，列表项之间允许空行
+            continue
+
+        first = line[0]
+        item = _LIST_ITEM.fullmatch(line) if first in '-–' else None
+        if item:
+            if not in_list:
+                append('<ul>\n')
+                in_list = True
+            append(f'<li>{render(item.group(1))}</li>\n')
+            continue
+
+        if in_list:
+            append('</ul>\n')
+            in_list = False
+
+        heading = _HEADING.fullmatch(line) if first == '#' else None
+        if heading:
+            level = len(heading.group(1))
+            append(f'<h{level}>{render(heading.group(2))}</h{level}>\n')
+        elif first == '<':
+            # 原文中的HTML直接保留
+            append(render(line) + '\n')
+        else:
+            append(f'<p>{render(line)}</p>\n')
 
-    for para in paragraphs:
-        if para.strip():
-            # 如果是HTML标签，直接添加
-            if re.match(r'^<[^>]+>', para.strip()):
-                formatted_text += para.strip() + '\n'
-            # 否则包装为段落
-            elif not para.strip().startswith('<li>') and not para.strip().startswith(
-                    '<ul>') and not para.strip().startswith('</ul>'):
-                formatted_text += f'<p>{para.strip()}</p>\n'
-            else:
-                formatted_text += para.strip() + '\n'
+    if in_list:
+        append('</ul>\n')
 
-    return formatted_text
+    return ''.join(output)
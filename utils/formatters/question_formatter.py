@@ -3,21 +3,11 @@
 
 from typing import List
 
+from utils.formatters.stylesheet import style_block
+from utils.formatters.templates import get_template
 
-def format_related_questions(questions: List[str]) -> str:
-    """格式化相关问题，添加现代化UI样式
-    
-    Args:
-        questions: 相关问题列表
-        
-    Returns:
-        格式化后的HTML内容
-    """
-    if not questions:
-        return ''
-
-    # 添加现代极简CSS样式 - 使用指定的颜色方案
-    html = '''
+# 相关问题样式 - 现代极简设计，使用指定的颜色方案
+QUESTION_STYLE = '''
     <style>
     .related-questions {
         margin: 30px 0;
@@ -93,14 +83,23 @@ def format_related_questions(questions: List[str]) -> str:
     </style>
     '''
 
-    html += '<div class="related-questions">\n'
-    html += '<h3>相关问题</h3>\n'
-    html += '<ul class="questions-list">\n'
 
-    for question in questions:
-        html += f'<li class="question-item">{question}</li>\n'
+def format_related_questions(questions: List[str]) -> str:
+    """格式化相关问题，添加现代化UI样式
+    
+    Args:
+        questions: 相关问题列表
+        
+    Returns:
+        格式化后的HTML内容
+    """
+    if not questions:
+        return ''
 
-    html += '</ul>\n'
-    html += '</div>\n'
+    # 问题项渲染到列表缓冲区后一次拼接
+    render_item = get_template('question_item.html').render
+    items = ''.join([render_item(question=question, index=i + 1) for i, question in enumerate(questions)])
 
-    return html
+    # 添加样式（共享样式表模式下省略）
+    return get_template('questions.html').render(style=style_block(QUESTION_STYLE), items=items,
+                                                 count=len(questions))
@@ -3,21 +3,11 @@
 
 from typing import List, Dict
 
+from utils.formatters.stylesheet import style_block
+from utils.formatters.templates import get_template
 
-def format_sources(sources: List[Dict[str, str]]) -> str:
-    """格式化信息来源，使用纯CSS实现手风琴效果，确保在WordPress环境中正常工作
-    
-    Args:
-        sources: 信息来源列表
-        
-    Returns:
-        格式化后的HTML内容
-    """
-    if not sources:
-        return ''
-
-    # 添加纯CSS样式实现手风琴效果
-    html = '''
+# 信息来源样式 - 纯CSS实现手风琴效果，确保在WordPress环境中正常工作
+SOURCE_STYLE = '''
     <style>
     .article-sources {
         margin: 30px 0;
@@ -187,33 +177,35 @@ def format_sources(sources: List[Dict[str, str]]) -> str:
     </style>
     '''
 
-    html += '<div class="article-sources">\n'
-    html += '<h3>信息来源</h3>\n'
 
+def format_sources(sources: List[Dict[str, str]]) -> str:
+    """格式化信息来源，使用纯CSS实现手风琴效果，确保在WordPress环境中正常工作
+    
+    Args:
+        sources: 信息来源列表
+        
+    Returns:
+        格式化后的HTML内容
+    """
+    if not sources:
+        return ''
+
+    render_item = get_template('source_item.html').render
+    render_snippet = get_template('source_snippet.html').render
+
+    # 来源项渲染到列表缓冲区后一次拼接
+    items = []
     for i, source in enumerate(sources):
         title = source.get('title', '')
         link = source.get('link', '')
         snippet = source.get('snippet', '')
 
         if title and link:
-            html += f'<div class="accordion" id="source-{i+1}">\n'
-            html += f'  <input type="checkbox" class="accordion-checkbox" id="accordion-{i+1}">\n'
-            html += f'  <label class="accordion-header" for="accordion-{i+1}">\n'
-            html += f'    <span class="accordion-title">{title}</span>\n'
-            html += f'    <span class="accordion-icon"></span>\n'
-            html += f'  </label>\n'
-            html += f'  <div class="accordion-content">\n'
-            html += f'    <div class="accordion-inner">\n'
-            
+            # 摘要已经通过CSS控制为3行显示，超出部分隐藏并显示省略号
             if snippet:
-                # 摘要已经通过CSS控制为3行显示，超出部分隐藏并显示省略号
-                html += f'      <div class="accordion-snippet">{snippet}</div>\n'
-            
-            html += f'      <a href="{link}" target="_blank" class="source-link-btn">查看原文</a>\n'
-            html += f'    </div>\n'
-            html += f'  </div>\n'
-            html += f'</div>\n'
-
-    html += '</div>\n'
+                snippet = render_snippet(snippet=snippet, index=i + 1)
+            items.append(render_item(index=i + 1, title=title, link=link, snippet=snippet))
 
-    return html
+    # 添加纯CSS样式实现手风琴效果（共享样式表模式下省略）
+    return get_template('sources.html').render(style=style_block(SOURCE_STYLE), items=''.join(items),
+                                               count=len(sources))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文章样式输出方式
+
+inline（默认）：每篇文章内联各部分的<style>块。
+shared：文章只输出带class的标记，全部样式合并为一个带版本号的样式表，
+        每个站点只注册一次（写入站点全局样式的自定义CSS），注册失败时本次运行退回inline。
+external：同shared只输出标记，样式表（见write_stylesheet生成的文件）由主题自行引入。
+"""
+
+import os
+import hashlib
+import textwrap
+import threading
+from typing import Dict, Any
+
+from config.api_config import STYLE_MODE, STYLE_ASSET_DIR
+
+STYLE_MODES = ('inline', 'shared', 'external')
+
+_mode = STYLE_MODE
+
+# 省略的<style>块统计
+_stats = {'blocks': 0, 'bytes_saved': 0}
+_stats_lock = threading.Lock()
+
+# 各样式块的UTF-8字节数，避免每篇文章重复编码
+_block_sizes: Dict[str, int] = {}
+
+
+def configure_styles(config: Dict[str, Any]) -> str:
+    """根据配置设置样式输出方式
+
+    Args:
+        config: 配置字典，读取style_mode字段
+
+    Returns:
+        生效的样式输出方式
+    """
+    mode = config.get('style_mode', STYLE_MODE)
+    set_style_mode(mode if mode in STYLE_MODES else STYLE_MODE)
+    return _mode
+
+
+def set_style_mode(mode: str) -> None:
+    """设置样式输出方式：inline、shared 或 external"""
+    global _mode
+    if mode not in STYLE_MODES:
+        raise ValueError(f"不支持的样式输出方式: {mode}")
+    _mode = mode
+
+
+def get_style_mode() -> str:
+    """获取当前的样式输出方式"""
+    return _mode
+
+
+def style_block(css: str) -> str:
+    """返回需要内联到文章中的样式块，共享样式表模式下返回空字符串并记录节省的字节数
+
+    Args:
+        css: 完整的<style>块
+
+    Returns:
+        inline模式下原样返回，否则返回空字符串
+    """
+    if _mode == 'inline':
+        return css
+    size = _block_sizes.get(css)
+    if size is None:
+        size = _block_sizes[css] = len(css.encode('utf-8'))
+    with _stats_lock:
+        _stats['blocks'] += 1
+        _stats['bytes_saved'] += size
+    return ''
+
+
+def get_stylesheet() -> str:
+    """合并所有格式化模块的样式，生成共享样式表（不含<style>标签）"""
+    # 在函数内导入，避免与各格式化模块循环导入
+    from utils.formatters.article_formatter import ARTICLE_STYLE
+    from utils.formatters.paragraph_formatter import PARAGRAPH_STYLE
+    from utils.formatters.question_formatter import QUESTION_STYLE
+    from utils.formatters.source_formatter import SOURCE_STYLE
+
+    parts = []
+    for css in (ARTICLE_STYLE, PARAGRAPH_STYLE, QUESTION_STYLE, SOURCE_STYLE):
+        css = css.replace('<style>', '').replace('</style>', '')
+        parts.append(textwrap.dedent(css).strip())
+    return '\n\n'.join(parts) + '\n'
+
+
+def stylesheet_version() -> str:
+    """共享样式表的版本号（内容摘要），样式变化时版本号随之变化"""
+    return hashlib.sha256(get_stylesheet().encode('utf-8')).hexdigest()[:12]
+
+
+def write_stylesheet(directory: str = None) -> str:
+    """将共享样式表写入带版本号的文件，供主题引入或手动添加到站点的额外CSS
+
+    Args:
+        directory: 输出目录，默认为STYLE_ASSET_DIR（相对项目根目录）
+
+    Returns:
+        样式表文件路径
+    """
+    directory = directory or STYLE_ASSET_DIR
+    if not os.path.isabs(directory):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        directory = os.path.join(base_dir, directory)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    path = os.path.join(directory, f"article-styles.{stylesheet_version()}.css")
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_stylesheet())
+    return path
+
+
+def merge_style_stats(stats: Dict[str, int]) -> None:
+    """合并其他进程（例如批量格式化的工作进程）中的样式统计"""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] += stats.get(key, 0)
+
+
+def get_style_stats() -> Dict[str, int]:
+    """获取共享样式表模式下省略的<style>块数和节省的字节数"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文章HTML布局模板
+
+文章外层布局、相关问题和信息来源的HTML结构由模板描述，模板在导入（或加载主题目录）时预编译为
+Python函数，渲染时直接求值一个f-string；列表项渲染到列表缓冲区后只拼接一次。
+
+模板使用 string.Template 语法：$name 或 ${name} 为字段，$$ 为字面量 $。
+在 template_dir 指定的主题目录中放置同名文件（例如 article.html）即可替换对应模板，
+缺少的文件继续使用内置默认模板。
+"""
+
+import os
+import string
+import keyword
+import logging
+from typing import Dict, Any
+
+from config.api_config import TEMPLATE_DIR
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 内置默认模板：文件名 → 模板内容
+DEFAULT_TEMPLATES = {
+    # 文章外层布局
+    'article.html': '''${style}<div class="article-container">
+        <div class="article-main-content">
+            ${paragraphs}
+        </div>
+        
+        <div class="article-divider"></div>
+        
+        ${questions}
+        
+        <div class="article-divider"></div>
+        
+        ${sources}
+        
+        <div class="article-footer">
+            <p>本文由AI自动生成，内容仅供参考。</p>
+            <p class="timestamp">发布时间：${timestamp}</p>
+        </div>
+    </div>
+    ''',
+    # 相关问题列表及单个问题
+    'questions.html': '''${style}<div class="related-questions">
+<h3>相关问题</h3>
+<ul class="questions-list">
+${items}</ul>
+</div>
+''',
+    'question_item.html': '''<li class="question-item">${question}</li>
+''',
+    # 信息来源列表、单个来源及其摘要
+    'sources.html': '''${style}<div class="article-sources">
+<h3>信息来源</h3>
+${items}</div>
+''',
+    'source_item.html': '''<div class="accordion" id="source-${index}">
+  <input type="checkbox" class="accordion-checkbox" id="accordion-${index}">
+  <label class="accordion-header" for="accordion-${index}">
+    <span class="accordion-title">${title}</span>
+    <span class="accordion-icon"></span>
+  </label>
+  <div class="accordion-content">
+    <div class="accordion-inner">
+${snippet}      <a href="${link}" target="_blank" class="source-link-btn">查看原文</a>
+    </div>
+  </div>
+</div>
+''',
+    'source_snippet.html': '''      <div class="accordion-snippet">${snippet}</div>
+''',
+}
+
+# 各模板可用的字段，主题模板使用了未知字段时不予加载
+TEMPLATE_FIELDS = {
+    'article.html': {'style', 'paragraphs', 'questions', 'sources', 'timestamp', 'keyword', 'title'},
+    'questions.html': {'style', 'items', 'count'},
+    'question_item.html': {'question', 'index'},
+    'sources.html': {'style', 'items', 'count'},
+    'source_item.html': {'index', 'title', 'link', 'snippet'},
+    'source_snippet.html': {'snippet', 'index'},
+}
+
+
+class CompiledTemplate:
+    """预编译的模板：编译为以字段为关键字参数、返回f-string的函数，渲染开销与手写f-string相同"""
+
+    def __init__(self, name: str, source: str):
+        """编译模板
+
+        Args:
+            name: 模板名称（用于错误信息）
+            source: 模板内容
+
+        Raises:
+            ValueError: 模板语法错误
+        """
+        self.name = name
+        parts = []
+        fields = []
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            parts.append(self._escape(source[position:match.start()]))
+            position = match.end()
+            if match.group('escaped') is not None:
+                parts.append('$')
+                continue
+            field = match.group('named') or match.group('braced')
+            if field is None or keyword.iskeyword(field):
+                line = source.count('\n', 0, match.start()) + 1
+                raise ValueError(f"模板 {name} 在第 {line} 行存在无效的占位符")
+            parts.append('{' + field + '}')
+            if field not in fields:
+                fields.append(field)
+        parts.append(self._escape(source[position:]))
+
+        self.fields = frozenset(fields)
+        # 字段作为仅限关键字参数，多余的字段被忽略
+        params = f"*, {', '.join(fields)}, " if fields else ''
+        code = f"lambda {params}**_extra: f{''.join(parts)!r}"
+        self.render = eval(compile(code, f'<template {name}>', 'eval'), {})
+
+    @staticmethod
+    def _escape(literal: str) -> str:
+        return literal.replace('{', '{{').replace('}', '}}')
+
+
+def _compile_all(directory: str = None) -> Dict[str, CompiledTemplate]:
+    """编译内置模板，并用主题目录中的同名文件覆盖"""
+    templates = {name: CompiledTemplate(name, source) for name, source in DEFAULT_TEMPLATES.items()}
+    if not directory:
+        return templates
+
+    overridden = []
+    for name in DEFAULT_TEMPLATES:
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                template = CompiledTemplate(name, f.read())
+            unknown = template.fields - TEMPLATE_FIELDS[name]
+            if unknown:
+                raise ValueError(f"未知字段 {', '.join(sorted(unknown))}，可用字段: {', '.join(sorted(TEMPLATE_FIELDS[name]))}")
+        except Exception as e:
+            logger.warning(f"无法加载主题模板 {path}: {str(e)}，将使用默认模板")
+            continue
+        templates[name] = template
+        overridden.append(name)
+
+    if overridden:
+        logger.info(f"已从 {directory} 加载主题模板: {', '.join(overridden)}")
+    else:
+        logger.warning(f"主题目录 {directory} 中没有可用的模板，将使用默认模板")
+    return templates
+
+
+# 导入时预编译内置模板
+_templates = _compile_all()
+_template_dir = None
+
+
+def load_templates(directory: str = None) -> None:
+    """加载主题目录中的模板（为空时恢复内置默认模板）
+
+    Args:
+        directory: 主题目录，相对路径相对项目根目录
+    """
+    global _templates, _template_dir
+    if directory and not os.path.isabs(directory):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        directory = os.path.join(base_dir, directory)
+    if directory and not os.path.isdir(directory):
+        logger.warning(f"主题目录 {directory} 不存在，将使用默认模板")
+        directory = None
+    # 整体替换模板表，渲染中的线程仍使用旧模板
+    _templates = _compile_all(directory)
+    _template_dir = directory
+
+
+def configure_templates(config: Dict[str, Any]) -> None:
+    """根据配置加载主题模板
+
+    Args:
+        config: 配置字典，读取template_dir字段
+    """
+    load_templates(config.get('template_dir', TEMPLATE_DIR))
+
+
+def get_template_dir() -> str:
+    """获取当前加载的主题目录，使用内置模板时返回None"""
+    return _template_dir
+
+
+def get_template(name: str) -> CompiledTemplate:
+    """获取预编译的模板
+
+    Args:
+        name: 模板文件名，例如article.html
+
+    Returns:
+        CompiledTemplate实例
+    """
+    return _templates[name]
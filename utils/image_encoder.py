@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""图片处理流水线与编码进程池
+
+特色图片上传前先缩小到目标尺寸，再按配置的格式（WebP，可选AVIF/JPEG）和质量阶梯编码，
+从各候选结果（包括原图）中选出体积最小的一个上传。
+
+编码是CPU密集型操作，在发布线程中执行会占用GIL并拖慢整个流水线。
+这里把解码和编码放到独立的进程池中，通过有界信号量限制排队数量形成背压，
+并对单张图片设置超时（从任务开始执行时计时，不含排队时间），同时统计每张图片的排队与编码耗时。
+超时的任务无法取消，会一直占用工作进程，因此超时后终止该进程池中的工作进程，下次使用时重建。
+已落盘的图片只把文件路径传给工作进程，由工作进程自行读取，原图不经过序列化。
+"""
+
+import io
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Tuple, Optional, List, Union
+
+from config.api_config import (
+    IMAGE_WORKERS, IMAGE_QUEUE_SIZE, IMAGE_ENCODE_TIMEOUT, IMAGE_WIDTH, IMAGE_HEIGHT,
+    IMAGE_FORMATS, IMAGE_QUALITIES, IMAGE_TARGET_KB, IMAGE_MAX_MB
+)
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 当前生效的编码设置，由configure_images()根据配置文件更新
+_settings = {
+    'workers': IMAGE_WORKERS,
+    'queue_size': IMAGE_QUEUE_SIZE,
+    'timeout': IMAGE_ENCODE_TIMEOUT,
+    'max_width': IMAGE_WIDTH,
+    'max_height': IMAGE_HEIGHT,
+    'formats': IMAGE_FORMATS,
+    'qualities': IMAGE_QUALITIES,
+    'target_bytes': IMAGE_TARGET_KB * 1024,
+    'max_bytes': IMAGE_MAX_MB * 1024 * 1024,
+}
+
+# 支持的输出格式：配置名称 -> (Pillow格式名, 文件扩展名)
+_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'avif': ('AVIF', 'avif'),
+    'jpeg': ('JPEG', 'jpg'),
+    'jpg': ('JPEG', 'jpg'),
+}
+
+# 可以直接上传的原图格式：Pillow格式名 -> 文件扩展名
+_ORIGINAL_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# 进程池及限制同时提交数量的信号量（工作进程数 + 排队数量）
+_executor = None
+_slots = None
+_pool_lock = threading.Lock()
+
+# 等待编码任务开始执行时检查状态的间隔（秒）
+_START_POLL_INTERVAL = 0.05
+
+# 编码统计
+_stats = {
+    'images': 0,
+    'failures': 0,
+    'timeouts': 0,
+    'encode_seconds': 0.0,
+    'max_encode_seconds': 0.0,
+    'wait_seconds': 0.0,
+    'bytes_in': 0,
+    'bytes_out': 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _encode(img, pil_format: str, quality: int) -> bytes:
+    """按指定格式和质量编码图片"""
+    output = io.BytesIO()
+    if pil_format == 'JPEG':
+        img.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(output, format=pil_format, quality=quality)
+    return output.getvalue()
+
+
+def _encode_with_ladder(img, pil_format: str, qualities: List[int], target_bytes: int) -> bytes:
+    """按质量阶梯编码：未设置目标体积时使用第一档质量，否则从高到低直到不超过目标体积"""
+    if not target_bytes:
+        return _encode(img, pil_format, qualities[0])
+
+    data = None
+    for quality in qualities:
+        data = _encode(img, pil_format, quality)
+        if len(data) <= target_bytes:
+            break
+    return data
+
+
+def _source_size(source: Union[bytes, str]) -> int:
+    """原始图片的字节数"""
+    return os.path.getsize(source) if isinstance(source, str) else len(source)
+
+
+def _transcode(source: Union[bytes, str], options: Dict[str, Any]) -> Tuple[Optional[bytes], Optional[str], float, Optional[str]]:
+    """在工作进程中处理图片：缩小到目标尺寸，按各候选格式编码并选出体积最小的结果
+
+    Args:
+        source: 原始图片数据，或图片文件路径
+        options: 处理选项，包含max_width、max_height、formats、qualities、target_bytes，
+                 以及站点允许的扩展名allowed（None表示不限制）和单个文件上限max_upload_bytes
+
+    Returns:
+        元组(图片数据, 文件扩展名, 处理耗时秒数, 错误信息)，原图体积最小时图片数据为None，
+        失败时图片数据和扩展名均为None
+    """
+    started = time.perf_counter()
+    try:
+        # 需要安装Pillow库: pip install Pillow
+        from PIL import Image
+        try:
+            # AVIF需要Pillow 11.3+或安装pillow-avif-plugin
+            import pillow_avif  # noqa: F401
+        except ImportError:
+            pass
+
+        # 从二进制数据或文件创建图像对象，Pillow能解码的格式都可以处理
+        img = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+        img.load()
+        original_format = img.format
+
+        # 原图尺寸在目标范围内且格式可直接上传时，原图也作为候选（数据为None，由调用方直接使用原图）
+        max_size = (options['max_width'] or img.width, options['max_height'] or img.height)
+        allowed = options.get('allowed')
+        candidates = []
+        if original_format in _ORIGINAL_FORMATS and img.width <= max_size[0] and img.height <= max_size[1] \
+                and (allowed is None or _ORIGINAL_FORMATS[original_format] in allowed):
+            candidates.append((_source_size(source), None, _ORIGINAL_FORMATS[original_format]))
+
+        # 转换为RGB模式（去除透明通道，如果有）
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img = img.convert('RGBA')
+            background = Image.new('RGBA', img.size, (255, 255, 255))
+            img = Image.alpha_composite(background, img).convert('RGB')
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # 等比缩小到目标尺寸以内（不放大）
+        img.thumbnail(max_size, Image.LANCZOS)
+
+        # 加载全部格式插件后再检查可用的输出格式
+        Image.init()
+        formats = [name for name in options['formats']
+                   if Image.SAVE.get(_FORMATS[name][0]) and (allowed is None or _FORMATS[name][1] in allowed)]
+        # 配置的格式站点都不接受时，使用通用的JPEG
+        if not formats and allowed is not None and 'jpg' in allowed:
+            formats = ['jpeg']
+        for name in formats:
+            pil_format, extension = _FORMATS[name]
+            data = _encode_with_ladder(img, pil_format, options['qualities'], options['target_bytes'])
+            candidates.append((len(data), data, extension))
+
+        if not candidates:
+            return None, None, time.perf_counter() - started, "没有站点允许的输出格式"
+
+        if options.get('max_upload_bytes'):
+            candidates = [candidate for candidate in candidates if candidate[0] <= options['max_upload_bytes']]
+            if not candidates:
+                return None, None, time.perf_counter() - started, \
+                    f"处理后的图片仍超过站点上传上限 {options['max_upload_bytes']} 字节"
+
+        # 原图最小时不回传数据
+        _, data, extension = min(candidates, key=lambda candidate: candidate[0])
+        return data, extension, time.perf_counter() - started, None
+
+    except Exception as e:
+        return None, None, time.perf_counter() - started, str(e)
+
+
+def configure_images(config: Dict[str, Any]) -> Dict[str, Any]:
+    """根据配置文件更新图片编码设置，需在处理图片之前调用
+
+    Args:
+        config: 配置字典，读取image_workers、image_queue_size、image_encode_timeout、
+                image_width、image_height、image_formats、image_qualities、image_target_kb、image_max_mb字段
+
+    Returns:
+        更新后的编码设置
+    """
+    workers = config.get('image_workers', IMAGE_WORKERS)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(0, int(workers))
+
+    queue_size = config.get('image_queue_size', IMAGE_QUEUE_SIZE)
+    if queue_size is None:
+        queue_size = workers * 2
+
+    shutdown_image_pool()
+    _settings['workers'] = workers
+    _settings['queue_size'] = max(0, int(queue_size))
+    _settings['timeout'] = float(config.get('image_encode_timeout', IMAGE_ENCODE_TIMEOUT))
+    _settings['max_width'] = int(config.get('image_width') or 0)
+    _settings['max_height'] = int(config.get('image_height') or 0)
+    if 'image_width' not in config and 'image_height' not in config:
+        _settings['max_width'], _settings['max_height'] = IMAGE_WIDTH, IMAGE_HEIGHT
+
+    formats = [name.lower() for name in config.get('image_formats', IMAGE_FORMATS)]
+    unknown = [name for name in formats if name not in _FORMATS]
+    if unknown:
+        logger.warning(f"不支持的图片格式 {unknown}，已忽略")
+    _settings['formats'] = [name for name in formats if name in _FORMATS]
+
+    qualities = sorted({int(quality) for quality in config.get('image_qualities', IMAGE_QUALITIES)}, reverse=True)
+    _settings['qualities'] = qualities or IMAGE_QUALITIES
+    _settings['target_bytes'] = int(float(config.get('image_target_kb', IMAGE_TARGET_KB)) * 1024)
+    _settings['max_bytes'] = int(float(config.get('image_max_mb', IMAGE_MAX_MB)) * 1024 * 1024)
+
+    logger.info(f"图片处理设置: 目标尺寸 {_settings['max_width'] or '不限'}x{_settings['max_height'] or '不限'}，"
+                f"输出格式 {_settings['formats']}，质量阶梯 {_settings['qualities']}，"
+                f"目标体积 {str(_settings['target_bytes'] // 1024) + ' KB' if _settings['target_bytes'] else '不限'}")
+    if workers:
+        logger.info(f"图片编码进程池设置: 进程数 {workers}，最大排队 {_settings['queue_size']} 张，"
+                    f"单张超时 {_settings['timeout']} 秒")
+    else:
+        logger.info("图片编码进程池已关闭，将在当前线程中编码")
+    return dict(_settings)
+
+
+def _get_executor() -> Tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    """获取进程池，首次使用时创建"""
+    global _executor, _slots
+
+    with _pool_lock:
+        if _executor is None:
+            workers = _settings['workers']
+            if workers is None:
+                workers = os.cpu_count() or 1
+            # 发布流程中已有多个线程在运行，使用spawn避免fork后子进程继承已持有的锁
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _slots = threading.BoundedSemaphore(workers + (_settings['queue_size'] or 0))
+        return _executor, _slots
+
+
+def shutdown_image_pool() -> None:
+    """关闭进程池，下次使用时按当前设置重建"""
+    global _executor, _slots
+
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+        _slots = None
+
+
+def _discard_executor(executor: ProcessPoolExecutor, terminate: bool = False) -> None:
+    """丢弃出现问题的进程池，下次使用时重建；其他线程已经重建的新进程池不受影响
+
+    Args:
+        executor: 出现问题的进程池
+        terminate: 是否终止其工作进程（编码超时后，卡住的任务会一直占用工作进程）
+    """
+    global _executor, _slots
+
+    with _pool_lock:
+        if _executor is executor:
+            _executor = None
+            _slots = None
+    if terminate:
+        # ProcessPoolExecutor没有公开的终止接口，该进程池中其他进行中的任务会以BrokenProcessPool结束
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+    executor.shutdown(wait=False)
+
+
+def _wait_until_started(future) -> float:
+    """等待任务离开队列、开始执行（或已结束）
+
+    Returns:
+        等待的秒数
+    """
+    started = time.perf_counter()
+    while not future.running() and not future.done():
+        wait([future], timeout=_START_POLL_INTERVAL)
+    return time.perf_counter() - started
+
+
+def _record(encode_seconds: float, wait_seconds: float, failed: bool = False, timed_out: bool = False,
+            bytes_in: int = 0, bytes_out: int = 0) -> None:
+    """记录单张图片的编码统计"""
+    with _stats_lock:
+        _stats['images'] += 1
+        _stats['bytes_in'] += bytes_in
+        _stats['bytes_out'] += bytes_out
+        _stats['encode_seconds'] += encode_seconds
+        _stats['max_encode_seconds'] = max(_stats['max_encode_seconds'], encode_seconds)
+        _stats['wait_seconds'] += wait_seconds
+        if failed:
+            _stats['failures'] += 1
+        if timed_out:
+            _stats['timeouts'] += 1
+
+
+def get_max_image_bytes() -> int:
+    """允许下载的最大图片字节数，0表示不限制"""
+    return _settings['max_bytes']
+
+
+def _processing_options() -> Dict[str, Any]:
+    """当前图片处理选项（传给工作进程）"""
+    return {key: _settings[key] for key in ('max_width', 'max_height', 'formats', 'qualities', 'target_bytes')}
+
+
+def optimize_image(source: Union[bytes, str], allowed_extensions: Optional[List[str]] = None,
+                   max_upload_bytes: int = 0) -> Tuple[Union[bytes, str], Optional[str]]:
+    """缩小并重新编码图片，返回各候选格式（包括原图）中体积最小的结果，进程池已满时阻塞等待空位
+
+    Args:
+        source: 原始图片数据，或图片文件路径（工作进程按路径读取，避免在进程间复制大图）
+        allowed_extensions: 站点允许上传的扩展名，None表示不限制
+        max_upload_bytes: 站点单个文件上传上限，0表示不限制
+
+    Returns:
+        元组(图片数据, 文件扩展名)，原图体积最小时返回source对象本身，处理失败时返回(source, None)
+    """
+    options = _processing_options()
+    options['allowed'] = sorted(allowed_extensions) if allowed_extensions is not None else None
+    options['max_upload_bytes'] = max_upload_bytes
+    if not _settings['workers']:
+        data, extension, encode_seconds, error = _transcode(source, options)
+        wait_seconds = 0.0
+    else:
+        executor = None
+        wait_seconds = 0.0
+        try:
+            executor, slots = _get_executor()
+            # 背压：进程池和队列都已满时在这里阻塞，避免无限堆积待编码图片
+            slots.acquire()
+            try:
+                future = executor.submit(_transcode, source, options)
+            except Exception:
+                slots.release()
+                raise
+            # 任务真正结束时才释放名额
+            future.add_done_callback(lambda _: slots.release())
+            # 超时从任务开始执行时计算，排队等待其他图片的时间不计入
+            wait_seconds = _wait_until_started(future)
+            data, extension, encode_seconds, error = future.result(timeout=_settings['timeout'] or None)
+        except FutureTimeoutError:
+            # 已开始的任务无法取消，终止工作进程并重建进程池，避免卡住的任务一直占用名额
+            _discard_executor(executor, terminate=True)
+            _record(_settings['timeout'], wait_seconds, failed=True, timed_out=True)
+            logger.warning(f"处理图片超时（{_settings['timeout']} 秒），将使用原始格式，已重建图片编码进程池")
+            return source, None
+        except BrokenProcessPool as e:
+            # 工作进程异常退出，丢弃进程池，下次使用时重建
+            if executor is not None:
+                _discard_executor(executor)
+            _record(0.0, wait_seconds, failed=True)
+            logger.warning(f"图片编码进程池异常: {str(e)}，将使用原始格式")
+            return source, None
+        except Exception as e:
+            _record(0.0, 0.0, failed=True)
+            logger.warning(f"提交图片编码任务失败: {str(e)}，将使用原始格式")
+            return source, None
+
+    if error:
+        _record(encode_seconds, wait_seconds, failed=True)
+        logger.warning(f"处理图片失败: {error}")
+        return source, None
+
+    bytes_in = _source_size(source)
+    bytes_out = bytes_in if data is None else len(data)
+    _record(encode_seconds, wait_seconds, bytes_in=bytes_in, bytes_out=bytes_out)
+    logger.info(f"图片处理完成（{extension}格式），编码耗时 {encode_seconds * 1000:.0f} ms，"
+                f"排队 {wait_seconds * 1000:.0f} ms，{bytes_in} → {bytes_out} 字节")
+    return (source if data is None else data), extension
+
+
+def get_image_stats() -> Dict[str, Any]:
+    """获取图片编码统计
+
+    Returns:
+        包含图片数、失败数、超时数、平均/最大编码耗时和平均排队耗时（秒）、处理前后总字节数的字典
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    count = stats['images'] or 1
+    stats['avg_encode_seconds'] = stats['encode_seconds'] / count
+    stats['avg_wait_seconds'] = stats['wait_seconds'] / count
+    return stats
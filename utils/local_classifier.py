@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""本地预分类器
+
+在调用智普AI之前，先用字符n-gram的TF-IDF相似度在本地判断文章的分类和标签。
+每个分类/标签的特征来自其名称和以往模型对相似关键词做出的决定；关键词直接包含某个名称时视为完全匹配（ASCII名称需为完整单词）。
+分类取相似度最高者，要求领先次高者足够多；标签可以有多个，无法比较领先幅度，改为要求关键词与标签名称本身至少有一个共同的双字n-gram，
+避免只靠学到的关键词特征打上无关标签（例如“如何学习”因历史关键词“留学如何学习英语”被打上“留学”）。
+置信度达到阈值的文章直接使用本地结果（耗时为微秒级），其余仍交给模型判断，并把模型的决定用于后续学习。
+"""
+
+import re
+import math
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.api_config import LOCAL_CLASSIFIER_THRESHOLD, LOCAL_CLASSIFIER_HISTORY
+
+# 获取logger
+logger = logging.getLogger("WordPressPublisher")
+
+# 名称本身的n-gram权重，高于从历史决定中学到的关键词
+_NAME_WEIGHT = 3
+
+# 归一化时去掉的标点和空白
+_STRIP_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+# 中日韩文字，含有这些文字的名称按子串判断是否被关键词包含
+_CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+# 本地判断统计（进程内所有预分类器共用）
+_stats = {'resolved': 0, 'deferred': 0, 'learned': 0}
+_stats_lock = threading.Lock()
+
+
+def _normalize(text: str) -> str:
+    return _STRIP_PATTERN.sub('', (text or '').lower())
+
+
+def _ngrams(text: str) -> Counter:
+    """提取文本的单字和双字n-gram"""
+    text = _normalize(text)
+    grams = Counter(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _name_grams(name: str) -> frozenset:
+    """名称本身的双字n-gram，单字名称取该字"""
+    text = _normalize(name)
+    if len(text) < 2:
+        return frozenset(text)
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+class _LabelIndex:
+    """一组候选名称（分类或标签）的TF-IDF索引"""
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self._docs = {name: Counter({gram: count * _NAME_WEIGHT for gram, count in _ngrams(name).items()})
+                      for name in self.names}
+        self._matchers = {name: self._matcher(name) for name in self.names}
+        self._name_grams = {name: _name_grams(name) for name in self.names}
+        self._vectors = None
+        self._idf = {}
+        self._unseen_idf = 1.0
+
+    @staticmethod
+    def _matcher(name: str):
+        """构造判断关键词是否直接包含名称的函数
+
+        含中日韩文字的名称按归一化后的子串判断；纯ASCII名称按单词边界匹配，
+        避免 "AI" 这样的短名称命中 "MAIL服务器配置"。
+        """
+        normalized_name = _normalize(name)
+        if not normalized_name:
+            return lambda keyword: False
+        if _CJK_PATTERN.search(name):
+            return lambda keyword: normalized_name in _STRIP_PATTERN.sub('', keyword.lower())
+        words = re.findall(r'[a-z0-9]+', name.lower())
+        if not words:
+            return lambda keyword: normalized_name in _STRIP_PATTERN.sub('', keyword.lower())
+        pattern = re.compile(r'(?<![a-z0-9])' + r'[\W_]*'.join(map(re.escape, words)) + r'(?![a-z0-9])')
+        return lambda keyword: pattern.search(keyword.lower()) is not None
+
+    def overlaps_name(self, name: str, keyword: str) -> bool:
+        """关键词是否与名称本身至少有一个共同的双字n-gram（单字名称为该字）"""
+        grams = self._name_grams.get(name)
+        return bool(grams) and not grams.isdisjoint(_ngrams(keyword))
+
+    def learn(self, name: str, keyword: str) -> None:
+        """将关键词的n-gram加入某个名称的特征"""
+        if name in self._docs:
+            self._docs[name].update(_ngrams(keyword))
+            self._vectors = None
+
+    def _build(self) -> None:
+        document_frequency = Counter()
+        for doc in self._docs.values():
+            document_frequency.update(doc.keys())
+        total = len(self._docs)
+        self._idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+        # 未在任何名称中出现的n-gram按最稀有处理
+        self._unseen_idf = math.log(1 + total) + 1
+
+        self._vectors = {}
+        for name, doc in self._docs.items():
+            vector = {gram: count * self._idf[gram] for gram, count in doc.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+            self._vectors[name] = {gram: value / norm for gram, value in vector.items()}
+
+    def scores(self, keyword: str) -> List[Tuple[str, float]]:
+        """计算关键词与每个名称的相似度，按相似度从高到低排序
+
+        关键词直接包含名称（ASCII名称需为完整单词）时相似度为1.0，否则为TF-IDF向量的余弦相似度。
+        """
+        if self._vectors is None:
+            self._build()
+
+        grams = _ngrams(keyword)
+        query = {gram: count * self._idf.get(gram, self._unseen_idf) for gram, count in grams.items()}
+        # 范数包含未知的n-gram，关键词中与名称无关的部分越多相似度越低
+        norm = math.sqrt(sum(value * value for value in query.values())) or 1.0
+        keyword = keyword or ''
+
+        scores = []
+        for name, vector in self._vectors.items():
+            if self._matchers[name](keyword):
+                score = 1.0
+            else:
+                score = sum(value * vector.get(gram, 0.0) for gram, value in query.items()) / norm
+            scores.append((name, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+
+class LocalClassifier:
+    """基于字符n-gram TF-IDF相似度的本地预分类器，线程安全"""
+
+    def __init__(self, categories: List[str], available_tags: List[str],
+                 threshold: float = LOCAL_CLASSIFIER_THRESHOLD, store=None,
+                 history: int = LOCAL_CLASSIFIER_HISTORY):
+        """初始化预分类器
+
+        Args:
+            categories: 可选分类列表
+            available_tags: 可用标签列表
+            threshold: 置信度阈值（0-1），分类取最高与次高相似度之差，标签取相似度（且需与标签名称有共同n-gram）
+            store: 保存历史决定的分类结果缓存（ClassificationCache），为None时只在本次运行中学习
+            history: 启动时加载的历史决定条数
+        """
+        self.threshold = threshold
+        self.store = store
+        self._lock = threading.Lock()
+        self._categories = _LabelIndex(categories)
+        self._tags = _LabelIndex(available_tags)
+
+        if store is not None:
+            try:
+                decisions = store.load_decisions(history)
+            except Exception as e:
+                logger.warning(f"加载历史分类决定失败: {str(e)}")
+                decisions = []
+            for decision in decisions:
+                self._learn(decision['keyword'], decision.get('category'), decision.get('tags') or [])
+            if decisions:
+                logger.info(f"本地预分类器已从 {len(decisions)} 条历史分类决定中学习")
+
+    def detect_category(self, keyword: str) -> Optional[str]:
+        """在本地判断文章分类
+
+        Args:
+            keyword: 文章关键词
+
+        Returns:
+            置信度达到阈值时返回分类名称，否则返回None
+        """
+        with self._lock:
+            scores = self._categories.scores(keyword)
+        if not scores:
+            return None
+        best, best_score = scores[0]
+        runner_up = scores[1][1] if len(scores) > 1 else 0.0
+        return best if best_score - runner_up >= self.threshold else None
+
+    def detect_tags(self, keyword: str) -> Optional[List[str]]:
+        """在本地判断文章标签
+
+        Args:
+            keyword: 文章关键词
+
+        Returns:
+            相似度达到阈值且与关键词有共同n-gram的1-3个标签，没有时返回None
+        """
+        with self._lock:
+            scores = self._tags.scores(keyword)
+            tags = [name for name, score in scores
+                    if score >= self.threshold and self._tags.overlaps_name(name, keyword)]
+        return tags[:3] or None
+
+    def classify(self, keyword: str, categories: List[str],
+                 available_tags: List[str]) -> Optional[Dict[str, Any]]:
+        """在本地同时判断文章的分类和标签，任一项不够确定时返回None
+
+        Args:
+            keyword: 文章关键词
+            categories: 可选分类列表（为空时不判断分类）
+            available_tags: 可用标签列表（为空时不判断标签）
+
+        Returns:
+            包含category和tags的字典，或None
+        """
+        category = self.detect_category(keyword) if categories else ""
+        tags = self.detect_tags(keyword) if available_tags else []
+        if category is None or tags is None:
+            self._count('deferred')
+            return None
+
+        self._count('resolved')
+        logger.info(f"本地预分类: '{keyword}' → 分类 '{category}'，标签 {', '.join(tags)}")
+        return {'category': category, 'tags': tags}
+
+    def record(self, resolved: bool) -> None:
+        """记录单独检测分类或标签时本地判断是否成功"""
+        self._count('resolved' if resolved else 'deferred')
+
+    def learn(self, keyword: str, category: Optional[str], tags: List[str]) -> None:
+        """学习模型对某个关键词做出的决定，并持久化供下次运行使用
+
+        Args:
+            keyword: 文章关键词
+            category: 模型判断的分类名称
+            tags: 模型判断的标签列表
+        """
+        self._learn(keyword, category, tags)
+        self._count('learned')
+        if self.store is not None:
+            try:
+                self.store.save_decision(keyword, category, tags)
+            except Exception as e:
+                logger.warning(f"保存分类决定失败: {str(e)}")
+
+    def _learn(self, keyword: str, category: Optional[str], tags: List[str]) -> None:
+        with self._lock:
+            if category:
+                self._categories.learn(category, keyword)
+            for tag in tags:
+                self._tags.learn(tag, keyword)
+
+    @staticmethod
+    def _count(key: str) -> None:
+        with _stats_lock:
+            _stats[key] += 1
+
+
+def get_local_classifier_stats() -> Dict[str, int]:
+    """获取本地预分类统计：resolved为本地判断成功（即节省的AI调用）次数，deferred为交给AI的次数"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# 中日韩文字大约每个字一个token，其余字符大约每4个一个token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def publish_rate_per_minute(posts_per_minute: float, delay_seconds: float) -> float:
+    """计算发布速率：优先使用配置的posts_per_minute，否则按发布间隔换算
+
+    Args:
+        posts_per_minute: 配置的发布速率（篇/分钟），0表示未配置
+        delay_seconds: 发布间隔时间（秒）
+
+    Returns:
+        每分钟允许发布的篇数，0表示不限制
+    """
+    if posts_per_minute:
+        return posts_per_minute
+    if delay_seconds and delay_seconds > 0:
+        return 60.0 / delay_seconds
+    return 0
+
+
+class RateLimiter:
+    """线程安全的速率限制器，按固定间隔发放许可（每分钟N次）"""
+
+    def __init__(self, rate_per_minute: float):
+        """初始化速率限制器
+
+        Args:
+            rate_per_minute: 每分钟允许的次数，小于等于0表示不限制
+        """
+        self.rate_per_minute = rate_per_minute
+        self.interval = 60.0 / rate_per_minute if rate_per_minute and rate_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def acquire(self) -> float:
+        """获取一个许可，必要时阻塞等待
+
+        Returns:
+            实际等待的秒数
+        """
+        if self.interval <= 0:
+            return 0.0
+
+        # 在锁内预约时间槽，锁外睡眠，避免阻塞其他线程排队
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.interval
+        wait = slot - now
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AsyncRateLimiter:
+    """asyncio版本的速率限制器，按固定间隔发放许可（每分钟N次）"""
+
+    def __init__(self, rate_per_minute: float):
+        """初始化速率限制器
+
+        Args:
+            rate_per_minute: 每分钟允许的次数，小于等于0表示不限制
+        """
+        self.rate_per_minute = rate_per_minute
+        self.interval = 60.0 / rate_per_minute if rate_per_minute and rate_per_minute > 0 else 0.0
+        self._next_time = 0.0
+
+    async def acquire(self) -> float:
+        """获取一个许可，必要时挂起等待
+
+        Returns:
+            实际等待的秒数
+        """
+        if self.interval <= 0:
+            return 0.0
+
+        # 单线程事件循环内预约时间槽无需加锁
+        now = time.monotonic()
+        slot = max(now, self._next_time)
+        self._next_time = slot + self.interval
+        wait = slot - now
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int = 0) -> int:
+    """估算一次聊天请求消耗的token数（提示词+预留的回复长度）
+
+    Args:
+        messages: 消息列表
+        max_tokens: 回复的最大token数
+
+    Returns:
+        估算的token数
+    """
+    text = ''.join(message.get('content') or '' for message in messages)
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + 4 * len(messages) + max_tokens
+
+
+class _TokenBucket:
+    """按每分钟额度匀速补充的令牌桶，容量为一分钟的额度"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute) if per_minute and per_minute > 0 else 0.0
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """返回取出amount个令牌前需要等待的秒数"""
+        if self.capacity <= 0:
+            return 0.0
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # 单次请求超过一分钟额度时按满桶放行，避免永远等待
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        """按实际用量修正预估：多预留的还回桶中，少算的从桶中扣除（可为负，之后的请求相应等待更久）"""
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class _TokenBucketState:
+    """请求数、token数和并发数三项限制的共用状态"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_in_flight: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max(0, int(max_in_flight or 0))
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._in_flight = 0
+
+    def _wait_time(self, tokens: int) -> Optional[float]:
+        """返回放行前需要等待的秒数，需要等待其他请求完成时返回None"""
+        if self.max_in_flight and self._in_flight >= self.max_in_flight:
+            return None
+        now = time.monotonic()
+        return max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+
+    def _take(self, tokens: int) -> None:
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self._in_flight += 1
+
+    def _release(self, reserved: int, used: Optional[int]) -> None:
+        self._in_flight -= 1
+        if used is not None:
+            self._tokens.refund(reserved - used)
+
+
+class TokenBucketLimiter(_TokenBucketState):
+    """线程安全的令牌桶限流器，同时限制每分钟请求数、每分钟token数和同时进行的请求数
+
+    调用方按到达顺序排队（先到先得），只有队首的调用方会等待令牌，避免大请求被小请求一直插队。
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_in_flight: int = 0):
+        """初始化限流器
+
+        Args:
+            requests_per_minute: 每分钟最多请求数，0表示不限制
+            tokens_per_minute: 每分钟最多token数，0表示不限制
+            max_in_flight: 同时进行的最多请求数，0表示不限制
+        """
+        super().__init__(requests_per_minute, tokens_per_minute, max_in_flight)
+        self._condition = threading.Condition()
+        self._queue = deque()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """排队获取一次请求的许可，必要时阻塞等待；请求结束后必须调用release
+
+        Args:
+            tokens: 预估的token数
+
+        Returns:
+            实际等待的秒数
+        """
+        start = time.monotonic()
+        ticket = object()
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    if self._queue[0] is ticket:
+                        wait = self._wait_time(tokens)
+                        if wait is not None and wait <= 0:
+                            self._take(tokens)
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+        return time.monotonic() - start
+
+    def release(self, reserved: int = 0, used: Optional[int] = None) -> None:
+        """请求结束后归还并发名额，并按实际token用量修正预估
+
+        Args:
+            reserved: acquire时预估的token数
+            used: 响应中的实际token用量，未知时为None
+        """
+        with self._condition:
+            self._release(reserved, used)
+            self._condition.notify_all()
+
+
+class AsyncTokenBucketLimiter(_TokenBucketState):
+    """asyncio版本的令牌桶限流器，asyncio.Lock按到达顺序唤醒，保证先到先得"""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_in_flight: int = 0):
+        """初始化限流器
+
+        Args:
+            requests_per_minute: 每分钟最多请求数，0表示不限制
+            tokens_per_minute: 每分钟最多token数，0表示不限制
+            max_in_flight: 同时进行的最多请求数，0表示不限制
+        """
+        super().__init__(requests_per_minute, tokens_per_minute, max_in_flight)
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Event()
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """排队获取一次请求的许可，必要时挂起等待；请求结束后必须调用release
+
+        Args:
+            tokens: 预估的token数
+
+        Returns:
+            实际等待的秒数
+        """
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                wait = self._wait_time(tokens)
+                if wait is None:
+                    self._released.clear()
+                    await self._released.wait()
+                elif wait > 0:
+                    await asyncio.sleep(wait)
+                else:
+                    self._take(tokens)
+                    break
+        return time.monotonic() - start
+
+    def release(self, reserved: int = 0, used: Optional[int] = None) -> None:
+        """请求结束后归还并发名额，并按实际token用量修正预估
+
+        Args:
+            reserved: acquire时预估的token数
+            used: 响应中的实际token用量，未知时为None
+        """
+        self._release(reserved, used)
+        self._released.set()